@@ -3,6 +3,7 @@
 import requests
 from config import API_BASE_URL
 from state_manager.app_state import current_app_state
+from api_client.pagination import get_all_pages
 
 def get_categories():
     """Busca todas as categorias de produtos da API."""
@@ -17,9 +18,7 @@ def get_categories():
     print(f"CategoryService: Buscando categorias em {url}") # Debug
 
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status() # Lança erro para status 4xx/5xx
-        categories = response.json()
+        categories = get_all_pages(url, headers) # Lança erro para status 4xx/5xx; junta todas as páginas
         print(f"CategoryService: {len(categories)} categorias recebidas.") # Debug
         return True, categories
     except requests.exceptions.HTTPError as http_err:
@@ -32,4 +31,7 @@ def get_categories():
     except requests.exceptions.RequestException as req_err:
         error_detail = f"Erro de conexão ao buscar categorias: {req_err}"
         print(f"CategoryService: {error_detail}") # Debug
-        return False, {'detail': error_detail}
\ No newline at end of file
+        return False, {'detail': error_detail}
+    except ValueError as val_err:
+        print(f"CategoryService: {val_err}") # Debug
+        return False, {'detail': str(val_err)}
\ No newline at end of file
@@ -3,6 +3,7 @@
 import requests
 from config import API_BASE_URL
 from state_manager.app_state import current_app_state
+from api_client.pagination import get_all_pages, get_changes
 
 def get_clients():
     """Busca todos os clientes da API."""
@@ -15,9 +16,7 @@ def get_clients():
     print(f"ClientService: Buscando clientes em {url}")
 
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        clients = response.json()
+        clients = get_all_pages(url, headers) # A listagem é paginada; junta todas as páginas
         print(f"ClientService: {len(clients)} clientes recebidos.")
         return True, clients
     except requests.exceptions.HTTPError as http_err:
@@ -29,6 +28,9 @@ def get_clients():
         error_detail = f"Erro de conexão ao buscar clientes: {req_err}"
         print(f"ClientService: {error_detail}")
         return False, {'detail': error_detail}
+    except ValueError as val_err:
+        print(f"ClientService: {val_err}")
+        return False, {'detail': str(val_err)}
 
 def get_client_by_id(client_id):
     """Busca os detalhes de um cliente específico pela API."""
@@ -156,21 +158,28 @@ def delete_client(client_id):
         print(f"ClientService: {error_detail}")
         return False, {'detail': error_detail}
 
-def search_clients(search_term):
-    """Busca clientes na API usando um termo de pesquisa (nome, CPF, etc.)."""
+def search_clients(search_term, limit=50):
+    """
+    Busca clientes na API usando um termo de pesquisa: CPF ou telefone (só os números já bastam),
+    e-mail ou começo do nome. Traz só a primeira página (até 'limit' clientes), já que o atendente
+    refina a busca em vez de rolar milhares de resultados.
+    """
     token = current_app_state.get_access_token()
     if not token:
         return False, {'detail': "Token de acesso não encontrado. Faça login."}
 
     headers = {'Authorization': f'Bearer {token}'}
     # Adiciona o parâmetro 'search' à URL, codificando o search_term
-    url = f"{API_BASE_URL}/clientes/?search={requests.utils.quote(search_term)}"
+    url = f"{API_BASE_URL}/clientes/?search={requests.utils.quote(search_term)}&page_size={limit}"
     print(f"ClientService: Buscando clientes com termo '{search_term}' em {url}")
 
     try:
         response = requests.get(url, headers=headers, timeout=10)
         response.raise_for_status()
-        clients = response.json()
+        data = response.json()
+        if not isinstance(data, dict) or 'results' not in data:
+            raise ValueError(f"Formato de resposta inesperado da API em {url}.")
+        clients = data['results']
         print(f"ClientService: Busca por '{search_term}' retornou {len(clients)} clientes.")
         return True, clients
     except requests.exceptions.HTTPError as http_err:
@@ -183,4 +192,34 @@ def search_clients(search_term):
     except requests.exceptions.RequestException as req_err:
         error_detail = f"Erro de conexão ao buscar clientes por termo '{search_term}': {req_err}"
         print(f"ClientService: {error_detail}")
-        return False, {'detail': error_detail}
\ No newline at end of file
+        return False, {'detail': error_detail}
+    except ValueError as val_err:
+        print(f"ClientService: {val_err}")
+        return False, {'detail': str(val_err)}
+
+def get_client_changes(cursor='0'):
+    """
+    Busca só os clientes criados/alterados e excluídos desde o cursor da última sincronização.
+    Retorna (True, {'alterados': [...], 'removidos': [ids], 'cursor': novo_cursor}) ou (False, erro).
+    """
+    token = current_app_state.get_access_token()
+    if not token:
+        return False, {'detail': "Token de acesso não encontrado. Faça login."}
+    headers = {'Authorization': f'Bearer {token}'}
+    url = f"{API_BASE_URL}/clientes/"
+    try:
+        changed, deleted, new_cursor = get_changes(url, cursor, headers=headers)
+        print(f"ClientService: {len(changed)} clientes alterados e {len(deleted)} removidos desde a última sincronização.")
+        return True, {'alterados': changed, 'removidos': deleted, 'cursor': new_cursor}
+    except requests.exceptions.HTTPError as http_err:
+        error_detail = (f"Erro HTTP ao sincronizar clientes: {http_err.response.status_code} - "
+                        f"{http_err.response.text}")
+        print(f"ClientService: {error_detail}")
+        return False, {'detail': error_detail}
+    except requests.exceptions.RequestException as req_err:
+        error_detail = f"Erro de conexão ao sincronizar clientes: {req_err}"
+        print(f"ClientService: {error_detail}")
+        return False, {'detail': error_detail}
+    except ValueError as val_err:
+        print(f"ClientService: {val_err}")
+        return False, {'detail': str(val_err)}
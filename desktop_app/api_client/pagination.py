@@ -0,0 +1,95 @@
+# desktop_app/api_client/pagination.py
+
+import copy
+from collections import OrderedDict
+
+import requests
+from urllib3.util import make_headers
+
+# Codificações que o urllib3 sabe descomprimir neste ambiente: gzip/deflate sempre, 'br' com o pacote
+# brotli e 'zstd' com o zstandard instalados. O requests descomprime a resposta sozinho (response.json()).
+ACCEPT_ENCODING = make_headers(accept_encoding=True)['accept-encoding']
+
+# Listagens já baixadas, por URL + parâmetros da primeira página: {chave: (etag, itens)}.
+# As listagens de catálogo (produtos, categorias, clientes, grupos) devolvem um ETag que muda
+# sempre que a tabela muda; se o servidor responder 304, os itens guardados ainda valem.
+# LRU pequeno: só as listagens mais recentes ficam guardadas, e a memória não cresce ao longo do
+# turno com cada combinação de filtros pedida.
+ETAG_CACHE_MAX_ENTRIES = 8
+_etag_cache = OrderedDict()
+
+def _cache_key(url, params):
+    return (url, tuple(sorted((params or {}).items())))
+
+def clear_etag_cache():
+    """Descarta as listagens guardadas (ex: ao fazer logout)."""
+    _etag_cache.clear()
+
+def get_all_pages(url, headers, params=None, timeout=10):
+    """
+    Busca uma listagem paginada da API (paginação por cursor) seguindo os links 'next'
+    até o fim e retorna todos os itens em uma única lista.
+    Também aceita uma resposta sem paginação (lista pura).
+    A primeira página é pedida com If-None-Match quando já temos a listagem guardada: um 304
+    significa que nada mudou na tabela, e a listagem inteira é reaproveitada sem baixar nenhuma página.
+    Erros do requests (HTTPError, RequestException) são repassados para o serviço que chamou.
+    """
+    key = _cache_key(url, params)
+    cached = _etag_cache.get(key)
+    if cached:
+        _etag_cache.move_to_end(key)
+    headers = {**headers, 'Accept-Encoding': ACCEPT_ENCODING} # Listagens grandes vêm comprimidas
+    first_headers = dict(headers)
+    if cached:
+        first_headers['If-None-Match'] = cached[0]
+
+    items = []
+    etag = None
+    first_page = True
+    while url:
+        response = requests.get(url, headers=first_headers if first_page else headers, params=params, timeout=timeout)
+        if first_page and cached and response.status_code == 304:
+            return copy.deepcopy(cached[1]) # Cópia: quem chamou pode alterar a lista
+        response.raise_for_status()
+        if first_page:
+            etag = response.headers.get('ETag')
+            first_page = False
+        data = response.json()
+        if isinstance(data, list):
+            items += data
+            break
+        if not isinstance(data, dict) or 'results' not in data:
+            raise ValueError(f"Formato de resposta inesperado da API: {data}")
+        items.extend(data['results'])
+        url = data.get('next')
+        params = None # O link 'next' já traz todos os parâmetros (filtros, cursor, page_size)
+
+    if etag:
+        _etag_cache[key] = (etag, copy.deepcopy(items))
+        _etag_cache.move_to_end(key)
+        while len(_etag_cache) > ETAG_CACHE_MAX_ENTRIES:
+            _etag_cache.popitem(last=False) # A listagem usada há mais tempo
+    else:
+        _etag_cache.pop(key, None)
+    return items
+
+def get_changes(url, cursor='0', headers=None, page_size=500, timeout=10):
+    """
+    Sincronização incremental (?changed_since=) de produtos ou clientes.
+    Segue as páginas enquanto 'tem_mais' for verdadeiro e retorna (alterados, removidos, cursor):
+    os itens criados/alterados, os IDs excluídos e o cursor a guardar para a próxima chamada.
+    Com cursor='0' vem a tabela inteira (sem removidos), para montar o espelho local.
+    """
+    changed, deleted = [], []
+    headers = {**(headers or {}), 'Accept-Encoding': ACCEPT_ENCODING}
+    while True:
+        response = requests.get(url, headers=headers, params={'changed_since': cursor, 'page_size': page_size}, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+        if not isinstance(data, dict) or 'alterados' not in data:
+            raise ValueError(f"Formato de resposta inesperado da API: {data}")
+        changed.extend(data['alterados'])
+        deleted.extend(data['removidos'])
+        cursor = data['cursor']
+        if not data['tem_mais']:
+            return changed, deleted, cursor
@@ -1,8 +1,11 @@
 # desktop_app/api_client/product_service.py
 
+import csv
+import os
 import requests
-from config import API_BASE_URL
+from config import API_BASE_URL, API_ASYNC_BASE_URL
 from state_manager.app_state import current_app_state
+from api_client.pagination import get_all_pages, get_changes
 
 # ... (funções get_products, create_product, get_product_by_id, update_product que já temos) ...
 def get_products():
@@ -10,12 +13,10 @@ def get_products():
     if not token:
         return False, {'detail': "Token de acesso não encontrado. Faça login."}
     headers = {'Authorization': f'Bearer {token}'}
-    url = f"{API_BASE_URL}/produtos/"
+    url = f"{API_ASYNC_BASE_URL}/produtos/"
     print(f"ProductService: Buscando produtos em {url}")
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        products = response.json()
+        products = get_all_pages(url, headers) # A listagem é paginada; junta todas as páginas
         print(f"ProductService: {len(products)} produtos recebidos.")
         return True, products
     except requests.exceptions.HTTPError as http_err:
@@ -27,6 +28,9 @@ def get_products():
         error_detail = f"Erro de conexão ao buscar produtos: {req_err}"
         print(f"ProductService: {error_detail}")
         return False, {'detail': error_detail}
+    except ValueError as val_err:
+        print(f"ProductService: {val_err}")
+        return False, {'detail': str(val_err)}
 
 def create_product(product_data):
     token = current_app_state.get_access_token()
@@ -161,21 +165,28 @@ def delete_product(product_id):
         print(f"ProductService: {error_detail}") # Debug
         return False, {'detail': error_detail}
     
-def search_products_for_sale(search_term):
-    """Busca produtos na API usando um termo de pesquisa (nome, código, etc.)."""
+def search_products_for_sale(search_term, limit=20):
+    """
+    Busca produtos na API usando um termo de pesquisa (nome, código, etc.). Traz só a primeira
+    página (até 'limit' produtos, os mais relevantes): o PDV usa os primeiros resultados, e uma
+    busca ampla como "a" não baixa o catálogo inteiro.
+    """
     token = current_app_state.get_access_token()
     if not token:
         return False, {'detail': "Token de acesso não encontrado. Faça login."}
 
     headers = {'Authorization': f'Bearer {token}'}
     # Adiciona o parâmetro 'search' à URL
-    url = f"{API_BASE_URL}/produtos/?search={requests.utils.quote(search_term)}"
+    url = f"{API_ASYNC_BASE_URL}/produtos/?search={requests.utils.quote(search_term)}&page_size={limit}"
     print(f"ProductService: Buscando produtos para venda em {url}") # Debug
 
     try:
         response = requests.get(url, headers=headers, timeout=10)
         response.raise_for_status()
-        products = response.json() # API retorna uma lista de produtos correspondentes
+        data = response.json()
+        if not isinstance(data, dict) or 'results' not in data:
+            raise ValueError(f"Formato de resposta inesperado da API em {url}.")
+        products = data['results']
         print(f"ProductService: Busca por '{search_term}' retornou {len(products)} produtos.") # Debug
         return True, products
     except requests.exceptions.HTTPError as http_err:
@@ -188,4 +199,163 @@ def search_products_for_sale(search_term):
     except requests.exceptions.RequestException as req_err:
         error_detail = f"Erro de conexão ao buscar produtos por termo '{search_term}': {req_err}"
         print(f"ProductService: {error_detail}") # Debug
-        return False, {'detail': error_detail}
\ No newline at end of file
+        return False, {'detail': error_detail}
+    except ValueError as val_err:
+        print(f"ProductService: {val_err}") # Debug
+        return False, {'detail': str(val_err)}
+
+def get_product_by_barcode(barcode):
+    """
+    Busca exata pelo código de barras (GET /produtos/barcode/<codigo>/), usada pelo PDV antes da busca por texto.
+    Retorna (True, produto), (True, None) se nenhum produto tiver esse código, ou (False, erro).
+    """
+    token = current_app_state.get_access_token()
+    if not token:
+        return False, {'detail': "Token de acesso não encontrado. Faça login."}
+
+    headers = {'Authorization': f'Bearer {token}'}
+    url = f"{API_ASYNC_BASE_URL}/produtos/barcode/{requests.utils.quote(barcode, safe='')}/"
+    print(f"ProductService: Buscando produto por código de barras em {url}") # Debug
+
+    try:
+        response = requests.get(url, headers=headers, timeout=10)
+        if response.status_code == 404:
+            return True, None # Código não cadastrado: o PDV cai para a busca por texto
+        response.raise_for_status()
+        return True, response.json()
+    except requests.exceptions.HTTPError as http_err:
+        error_detail = (
+            f"Erro HTTP ao buscar produto pelo código '{barcode}': {http_err.response.status_code} - "
+            f"{http_err.response.text}"
+        )
+        print(f"ProductService: {error_detail}") # Debug
+        return False, {'detail': error_detail}
+    except requests.exceptions.RequestException as req_err:
+        error_detail = f"Erro de conexão ao buscar produto pelo código '{barcode}': {req_err}"
+        print(f"ProductService: {error_detail}") # Debug
+        return False, {'detail': error_detail}
+
+def get_product_changes(cursor='0'):
+    """
+    Busca só os produtos criados/alterados e excluídos desde o cursor da última sincronização.
+    Retorna (True, {'alterados': [...], 'removidos': [ids], 'cursor': novo_cursor}) ou (False, erro).
+    """
+    token = current_app_state.get_access_token()
+    if not token:
+        return False, {'detail': "Token de acesso não encontrado. Faça login."}
+    headers = {'Authorization': f'Bearer {token}'}
+    url = f"{API_BASE_URL}/produtos/"
+    try:
+        changed, deleted, new_cursor = get_changes(url, cursor, headers=headers)
+        print(f"ProductService: {len(changed)} produtos alterados e {len(deleted)} removidos desde a última sincronização.")
+        return True, {'alterados': changed, 'removidos': deleted, 'cursor': new_cursor}
+    except requests.exceptions.HTTPError as http_err:
+        error_detail = (f"Erro HTTP ao sincronizar produtos: {http_err.response.status_code} - "
+                        f"{http_err.response.text}")
+        print(f"ProductService: {error_detail}")
+        return False, {'detail': error_detail}
+    except requests.exceptions.RequestException as req_err:
+        error_detail = f"Erro de conexão ao sincronizar produtos: {req_err}"
+        print(f"ProductService: {error_detail}")
+        return False, {'detail': error_detail}
+    except ValueError as val_err:
+        print(f"ProductService: {val_err}")
+        return False, {'detail': str(val_err)}
+
+# Content-Type do corpo por extensão do arquivo de catálogo
+IMPORT_CONTENT_TYPES = {'.csv': 'text/csv', '.jsonl': 'application/x-ndjson', '.ndjson': 'application/x-ndjson'}
+
+def import_products_file(file_path):
+    """
+    Envia um catálogo (CSV com cabeçalho ou JSON lines) para /produtos/importar/.
+    O arquivo é enviado em streaming (o objeto de arquivo vai direto para o requests), sem ser lido
+    inteiro em memória. Retorna (True, relatório) com criados/atualizados/erros ou (False, erro).
+    """
+    token = current_app_state.get_access_token()
+    if not token:
+        return False, {'detail': "Token de acesso não encontrado. Faça login."}
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in IMPORT_CONTENT_TYPES:
+        return False, {'detail': "Use um arquivo .csv ou .jsonl."}
+    headers = {'Authorization': f'Bearer {token}', 'Content-Type': IMPORT_CONTENT_TYPES[extension]}
+    url = f"{API_BASE_URL}/produtos/importar/"
+    print(f"ProductService: Importando catálogo {file_path} em {url}")
+    try:
+        with open(file_path, 'rb') as catalog_file:
+            # Sem timeout de leitura: o servidor só responde depois de gravar todas as linhas
+            response = requests.post(url, headers=headers, data=catalog_file, timeout=(10, None))
+        response.raise_for_status()
+        report = response.json()
+        print(f"ProductService: Importação concluída: {report['criados']} criados, "
+              f"{report['atualizados']} atualizados, {report['total_erros']} erros.")
+        return True, report
+    except requests.exceptions.HTTPError as http_err:
+        error_detail = (f"Erro HTTP ao importar produtos: {http_err.response.status_code} - "
+                        f"{http_err.response.text}")
+        print(f"ProductService: {error_detail}")
+        return False, {'detail': error_detail}
+    except requests.exceptions.RequestException as req_err:
+        error_detail = f"Erro de conexão ao importar produtos: {req_err}"
+        print(f"ProductService: {error_detail}")
+        return False, {'detail': error_detail}
+    except (OSError, ValueError) as err:
+        print(f"ProductService: {err}")
+        return False, {'detail': str(err)}
+
+def read_stock_count_file(file_path):
+    """
+    Lê o arquivo da contagem física: CSV com cabeçalho 'codigoBarras' e 'quantidade' (',' ou ';').
+    O mesmo código contado em lugares diferentes (loja e depósito) é somado.
+    Retorna a lista de itens no formato de /produtos/ajuste-estoque/; lança ValueError se o arquivo for inválido.
+    """
+    counts = {}
+    with open(file_path, newline='', encoding='utf-8-sig') as count_file:
+        header = count_file.readline()
+        delimiter = ';' if header.count(';') > header.count(',') else ','
+        columns = [column.strip() for column in next(csv.reader([header], delimiter=delimiter), [])]
+        if 'codigoBarras' not in columns or 'quantidade' not in columns:
+            raise ValueError("O arquivo de contagem deve ter as colunas 'codigoBarras' e 'quantidade'.")
+        for line_number, row in enumerate(csv.DictReader(count_file, fieldnames=columns, delimiter=delimiter), start=2):
+            barcode = (row.get('codigoBarras') or '').strip()
+            if not barcode:
+                continue
+            try:
+                quantity = int((row.get('quantidade') or '').strip())
+            except ValueError:
+                raise ValueError(f"Linha {line_number}: quantidade inválida para o código {barcode}.")
+            counts[barcode] = counts.get(barcode, 0) + quantity
+    return [{'codigoBarras': barcode, 'quantidade': quantity} for barcode, quantity in counts.items()]
+
+def adjust_stock(items):
+    """
+    Envia a contagem física para /produtos/ajuste-estoque/ em uma única requisição.
+    Retorna (True, resultado com os deltas) ou (False, erro); se algum item for inválido,
+    o servidor não altera nada e 'erros' traz a lista dos itens com problema.
+    """
+    token = current_app_state.get_access_token()
+    if not token:
+        return False, {'detail': "Token de acesso não encontrado. Faça login."}
+    headers = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
+    url = f"{API_BASE_URL}/produtos/ajuste-estoque/"
+    print(f"ProductService: Enviando contagem de {len(items)} produtos para {url}")
+    try:
+        response = requests.post(url, headers=headers, json={'itens': items}, timeout=(10, 120))
+        if response.status_code == 400:
+            return False, response.json() # {'detail': ..., 'erros': [{'item': posição, 'erros': {...}}]}
+        response.raise_for_status()
+        result = response.json()
+        print(f"ProductService: Ajuste concluído: {result['ajustados']} produtos ajustados, "
+              f"{result['inalterados']} sem diferença.")
+        return True, result
+    except requests.exceptions.HTTPError as http_err:
+        error_detail = (f"Erro HTTP ao ajustar estoque: {http_err.response.status_code} - "
+                        f"{http_err.response.text}")
+        print(f"ProductService: {error_detail}")
+        return False, {'detail': error_detail}
+    except requests.exceptions.RequestException as req_err:
+        error_detail = f"Erro de conexão ao ajustar estoque: {req_err}"
+        print(f"ProductService: {error_detail}")
+        return False, {'detail': error_detail}
+    except ValueError as val_err:
+        print(f"ProductService: {val_err}")
+        return False, {'detail': str(val_err)}
@@ -1,8 +1,9 @@
 # desktop_app/api_client/sale_service.py
 
 import requests
-from config import API_BASE_URL
+from config import API_BASE_URL, API_ASYNC_BASE_URL
 from state_manager.app_state import current_app_state
+from api_client.pagination import get_all_pages
 
 def create_sale(sale_data):
     # ... (código da função create_sale que já temos) ...
@@ -68,21 +69,10 @@ def get_sales(filters=None):
     print(f"SaleService: Buscando vendas em {url} com filtros: {params}") # Debug
 
     try:
-        response = requests.get(url, headers=headers, params=params, timeout=10) # Adicionado params
-        response.raise_for_status()
-        sales = response.json() # A API retorna uma lista de vendas ou um objeto com 'results' se paginado
-
-        # Se a API retornar um objeto com 'results' (paginação do DRF)
-        if isinstance(sales, dict) and 'results' in sales:
-            sales_list = sales['results']
-            print(f"SaleService: {len(sales_list)} vendas recebidas (de {sales.get('count', '?')} no total).") # Debug
-            return True, sales_list # Retorna apenas a lista de resultados por enquanto
-        elif isinstance(sales, list):
-            print(f"SaleService: {len(sales)} vendas recebidas.") # Debug
-            return True, sales
-        else:
-            print(f"SaleService: Resposta inesperada da API ao listar vendas: {sales}")
-            return False, {'detail': 'Formato de resposta inesperado da API.'}
+        # A API pagina a listagem ('results' + link 'next'); get_all_pages junta todas as páginas
+        sales_list = get_all_pages(url, headers, params=params) # Adicionado params
+        print(f"SaleService: {len(sales_list)} vendas recebidas.") # Debug
+        return True, sales_list
 
     except requests.exceptions.HTTPError as http_err:
         error_detail = (
@@ -95,6 +85,52 @@ def get_sales(filters=None):
         error_detail = f"Erro de conexão ao buscar vendas: {req_err}"
         print(f"SaleService: {error_detail}") # Debug
         return False, {'detail': error_detail}
+    except ValueError as val_err:
+        print(f"SaleService: Resposta inesperada da API ao listar vendas: {val_err}")
+        return False, {'detail': 'Formato de resposta inesperado da API.'}
+
+def export_sale_items_csv(file_path, filters=None):
+    """
+    Baixa o CSV de itens vendidos (/vendas/exportar/) com os filtros do relatório e grava direto
+    no arquivo, em blocos, à medida que chega (stream=True): nem o servidor nem o desktop montam
+    o arquivo inteiro em memória. Retorna (True, {'rows': nº de itens}) ou (False, erro).
+    """
+    token = current_app_state.get_access_token()
+    if not token:
+        return False, {'detail': "Token de acesso não encontrado. Faça login."}
+
+    headers = {'Authorization': f'Bearer {token}'}
+    url = f"{API_BASE_URL}/vendas/exportar/"
+    params = {key: value for key, value in (filters or {}).items() if value}
+    print(f"SaleService: Exportando itens vendidos de {url} com filtros: {params}") # Debug
+
+    try:
+        # Timeout só para conectar e entre blocos: a exportação inteira pode levar mais que isso
+        with requests.get(url, headers=headers, params=params, stream=True, timeout=(10, 60)) as response:
+            response.raise_for_status()
+            newlines = 0
+            with open(file_path, 'wb') as csv_file:
+                for chunk in response.iter_content(chunk_size=64 * 1024): # Já descomprimido (gzip/br/zstd)
+                    csv_file.write(chunk)
+                    newlines += chunk.count(b'\n')
+        rows = max(newlines - 1, 0) # Menos o cabeçalho (campos com quebra de linha contariam a mais)
+        print(f"SaleService: Exportação gravada em {file_path} ({rows} itens).") # Debug
+        return True, {'rows': rows}
+    except requests.exceptions.HTTPError as http_err:
+        error_detail = (
+            f"Erro HTTP ao exportar vendas: {http_err.response.status_code} - "
+            f"{http_err.response.text}"
+        )
+        print(f"SaleService: {error_detail}") # Debug
+        return False, {'detail': error_detail}
+    except requests.exceptions.RequestException as req_err:
+        error_detail = f"Erro de conexão ao exportar vendas: {req_err}"
+        print(f"SaleService: {error_detail}") # Debug
+        return False, {'detail': error_detail}
+    except OSError as os_err:
+        error_detail = f"Erro ao gravar o arquivo {file_path}: {os_err}"
+        print(f"SaleService: {error_detail}") # Debug
+        return False, {'detail': error_detail}
 
 def get_sale_details(sale_id):
     """
@@ -105,7 +141,7 @@ def get_sale_details(sale_id):
         return False, {'detail': "Token de acesso não encontrado. Faça login."}
 
     headers = {'Authorization': f'Bearer {token}'}
-    url = f"{API_BASE_URL}/vendas/{sale_id}/" # Endpoint para detalhes de uma venda
+    url = f"{API_ASYNC_BASE_URL}/vendas/{sale_id}/" # Endpoint para detalhes de uma venda
     print(f"SaleService: Buscando detalhes da venda ID {sale_id} em {url}")
 
     try:
@@ -4,6 +4,7 @@ import requests
 import json # Para o corpo do POST/PUT
 from config import API_BASE_URL
 from state_manager.app_state import current_app_state
+from api_client.pagination import get_all_pages
 
 def _get_auth_headers():
     """Retorna os cabeçalhos de autenticação ou None se não houver token."""
@@ -25,21 +26,9 @@ def get_users():
     url = f"{API_BASE_URL}/usuarios/"
     print(f"UserService: Buscando usuários em {url}")
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        users = response.json()
-        # DRF ModelViewSet geralmente retorna uma lista diretamente para listagem sem paginação
-        # Se houver paginação, seria users.get('results', [])
-        if isinstance(users, dict) and 'results' in users: # Lida com paginação
-            users_list = users['results']
-            print(f"UserService: {len(users_list)} usuários recebidos (de {users.get('count', '?')}).")
-            return True, users_list
-        elif isinstance(users, list):
-            print(f"UserService: {len(users)} usuários recebidos.")
-            return True, users
-        else:
-            print(f"UserService: Resposta inesperada ao listar usuários: {users}")
-            return False, {'detail': 'Formato de resposta inesperado da API.'}
+        users_list = get_all_pages(url, headers) # Lida com paginação (segue os links 'next')
+        print(f"UserService: {len(users_list)} usuários recebidos.")
+        return True, users_list
     except requests.exceptions.HTTPError as http_err:
         error_detail = f"Erro HTTP ao buscar usuários: {http_err.response.status_code} - {http_err.response.text}"
         print(f"UserService: {error_detail}")
@@ -48,6 +37,9 @@ def get_users():
         error_detail = f"Erro de conexão ao buscar usuários: {req_err}"
         print(f"UserService: {error_detail}")
         return False, {'detail': error_detail}
+    except ValueError as val_err:
+        print(f"UserService: Resposta inesperada ao listar usuários: {val_err}")
+        return False, {'detail': 'Formato de resposta inesperado da API.'}
 
 def get_user_details(user_id):
     """Busca os detalhes de um usuário específico."""
@@ -143,19 +135,9 @@ def get_groups():
     url = f"{API_BASE_URL}/grupos/" # Endpoint de listagem de grupos
     print(f"UserService: Buscando grupos em {url}")
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        groups = response.json()
-        if isinstance(groups, dict) and 'results' in groups: # Lida com paginação
-            groups_list = groups['results']
-            print(f"UserService: {len(groups_list)} grupos recebidos (de {groups.get('count', '?')}).")
-            return True, groups_list
-        elif isinstance(groups, list):
-            print(f"UserService: {len(groups)} grupos recebidos.")
-            return True, groups
-        else:
-            print(f"UserService: Resposta inesperada ao listar grupos: {groups}")
-            return False, {'detail': 'Formato de resposta inesperado da API para grupos.'}
+        groups_list = get_all_pages(url, headers) # Lida com paginação (segue os links 'next')
+        print(f"UserService: {len(groups_list)} grupos recebidos.")
+        return True, groups_list
     except requests.exceptions.HTTPError as http_err:
         error_detail = f"Erro HTTP ao buscar grupos: {http_err.response.status_code} - {http_err.response.text}"
         print(f"UserService: {error_detail}")
@@ -164,6 +146,9 @@ def get_groups():
         error_detail = f"Erro de conexão ao buscar grupos: {req_err}"
         print(f"UserService: {error_detail}")
         return False, {'detail': error_detail}
+    except ValueError as val_err:
+        print(f"UserService: Resposta inesperada ao listar grupos: {val_err}")
+        return False, {'detail': 'Formato de resposta inesperado da API para grupos.'}
 
 # delete_user pode ser implementado depois, ou podemos focar em ativar/desativar (update com is_active=False)
 # def delete_user(user_id):
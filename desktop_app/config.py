@@ -1,3 +1,7 @@
 # desktop_app/config.py
 
-API_BASE_URL = "http://127.0.0.1:8000/api" # URL base da nossa API Django
\ No newline at end of file
+API_BASE_URL = "http://127.0.0.1:8000/api" # URL base da nossa API Django
+
+# Leituras frequentes (catálogo, busca, código de barras e detalhe da venda) nas views async da API.
+# Funcionam em qualquer servidor; sob ASGI (ex: uvicorn) não ocupam uma thread por requisição em espera.
+API_ASYNC_BASE_URL = f"{API_BASE_URL}/async"
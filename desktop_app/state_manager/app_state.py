@@ -1,5 +1,7 @@
 # desktop_app/state_manager/app_state.py
 # ... (outras partes da classe AppState) ...
+from api_client.pagination import clear_etag_cache
+
 class AppState:
     _instance = None
 
@@ -66,6 +68,7 @@ class AppState:
         self.user_id_logged_in = None
         self.user_groups = []
         self.is_superuser_logged_in = False
+        clear_etag_cache() # Listagens guardadas pelo ETag não passam para o próximo usuário
         print("AppState: Estado de autenticação limpo (logout).")
 
     def is_authenticated(self):
@@ -2,9 +2,9 @@
 
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QLabel, QPushButton,
                              QTableWidget, QTableWidgetItem, QMessageBox,
-                             QHBoxLayout, QHeaderView, QDialog)
+                             QHBoxLayout, QHeaderView, QDialog, QFileDialog, QApplication)
 from PyQt5.QtCore import Qt
-from api_client.product_service import get_products, create_product, get_product_by_id, update_product, delete_product  # Importa a função do serviço
+from api_client.product_service import get_products, create_product, get_product_by_id, update_product, delete_product, import_products_file, read_stock_count_file, adjust_stock  # Importa a função do serviço
 from state_manager.app_state import current_app_state # Para verificar permissões
 from .add_edit_product_dialog import AddEditProductDialog
 
@@ -64,6 +64,14 @@ class ProductWidget(QWidget):
             self.delete_button.setEnabled(False) # Habilita quando um item é selecionado
             buttons_layout.addWidget(self.delete_button)
 
+            self.import_button = QPushButton("Importar Catálogo...")
+            self.import_button.clicked.connect(self.handle_import_catalog)
+            buttons_layout.addWidget(self.import_button)
+
+            self.stock_count_button = QPushButton("Ajuste de Estoque (Contagem)...")
+            self.stock_count_button.clicked.connect(self.handle_stock_count)
+            buttons_layout.addWidget(self.stock_count_button)
+
         self.products_table.itemSelectionChanged.connect(self.handle_table_selection_change)
 
         self.main_layout.addLayout(buttons_layout)
@@ -139,6 +147,76 @@ class ProductWidget(QWidget):
         else:
             print("ProductWidget: Diálogo de adicionar produto cancelado.") # Debug
 
+    def handle_import_catalog(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Importar Catálogo de Produtos", "", "Catálogo (*.csv *.jsonl *.ndjson)"
+        )
+        if not file_path:
+            return
+        QApplication.setOverrideCursor(Qt.WaitCursor) # Catálogos grandes levam alguns segundos
+        try:
+            success, report_or_error = import_products_file(file_path)
+        finally:
+            QApplication.restoreOverrideCursor()
+        if not success:
+            QMessageBox.critical(self, "Erro ao Importar Catálogo", report_or_error.get('detail', "Erro desconhecido."))
+            return
+        message = (f"{report_or_error['linhas']} linhas lidas: {report_or_error['criados']} produtos criados, "
+                   f"{report_or_error['atualizados']} atualizados, {report_or_error['total_erros']} com erro.")
+        if report_or_error['erros']:
+            first_errors = [
+                f"Linha {erro['linha']}: " + "; ".join(f"{campo}: {msg}" for campo, msg in erro['erros'].items())
+                for erro in report_or_error['erros'][:10]
+            ]
+            message += "\n\nPrimeiros erros:\n" + "\n".join(first_errors)
+        QMessageBox.information(self, "Importação Concluída", message)
+        self.load_products_data()
+
+    def handle_stock_count(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Ajuste de Estoque pela Contagem", "", "Contagem (*.csv)"
+        )
+        if not file_path:
+            return
+        try:
+            items = read_stock_count_file(file_path)
+        except (OSError, ValueError) as err:
+            QMessageBox.critical(self, "Erro na Contagem", str(err))
+            return
+        if not items:
+            QMessageBox.warning(self, "Ajuste de Estoque", "O arquivo não tem nenhuma contagem.")
+            return
+        answer = QMessageBox.question(
+            self, "Confirmar Ajuste",
+            f"O estoque de {len(items)} produtos passará a ser a quantidade contada. Continuar?",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+        )
+        if answer != QMessageBox.Yes:
+            return
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            success, result = adjust_stock(items)
+        finally:
+            QApplication.restoreOverrideCursor()
+        if not success:
+            message = result.get('detail', "Erro desconhecido.")
+            if result.get('erros'): # Nenhum estoque foi alterado
+                first_errors = [
+                    (f"{items[erro['item']]['codigoBarras']}: " if erro['item'] is not None else "")
+                    + "; ".join(erro['erros'].values())
+                    for erro in result['erros'][:10]
+                ]
+                message += "\nNenhum estoque foi alterado.\n\nPrimeiros erros:\n" + "\n".join(first_errors)
+            QMessageBox.critical(self, "Erro no Ajuste de Estoque", message)
+            return
+        message = f"{result['ajustados']} produtos ajustados, {result['inalterados']} sem diferença."
+        if result['ajustes']:
+            surplus = sum(adjustment['delta'] for adjustment in result['ajustes'] if adjustment['delta'] > 0)
+            shortage = -sum(adjustment['delta'] for adjustment in result['ajustes'] if adjustment['delta'] < 0)
+            message += f"\n\nSobras: +{surplus} unidades\nFaltas: -{shortage} unidades"
+        QMessageBox.information(self, "Ajuste Concluído", message)
+        self.load_products_data()
+
     def handle_edit_product(self):
         selected_rows = self.products_table.selectionModel().selectedRows()
         if not selected_rows:
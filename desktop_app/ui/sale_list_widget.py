@@ -2,9 +2,11 @@
 
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
                              QTableWidget, QTableWidgetItem, QMessageBox, QHeaderView,
-                             QDateEdit, QLineEdit, QFormLayout, QGroupBox, QDialog, QApplication)
+                             QDateEdit, QLineEdit, QFormLayout, QGroupBox, QDialog, QApplication,
+                             QFileDialog)
 from PyQt5.QtCore import Qt, QDate
-from api_client.sale_service import get_sales, get_sale_details
+from api_client.sale_service import get_sales, get_sale_details, export_sale_items_csv
+from state_manager.app_state import current_app_state
 from .receipt_dialog import ReceiptDialog
 # from .sale_detail_dialog import SaleDetailDialog # Para mostrar detalhes dos itens da venda
 
@@ -84,6 +86,14 @@ class SaleListWidget(QWidget):
 
         # Adicionar o botão de detalhes a um novo layout horizontal ou diretamente ao layout principal
         details_button_layout = QHBoxLayout()
+        # Exportação dos itens vendidos no período (contabilidade); a API só permite para supervisores
+        # (ou superusuários do Django)
+        can_export = current_app_state.is_user_in_group('SUPERVISOR') or \
+                     current_app_state.is_current_user_superuser()
+        if can_export:
+            self.export_button = QPushButton("Exportar Itens (CSV)...", self)
+            self.export_button.clicked.connect(self.handle_export_csv)
+            details_button_layout.addWidget(self.export_button)
         details_button_layout.addStretch() # Empurra o botão para a direita
         details_button_layout.addWidget(self.view_details_button)
         self.main_layout.addLayout(details_button_layout)
@@ -102,10 +112,7 @@ class SaleListWidget(QWidget):
         self.vendedor_username_input.clear()
         self.load_sales_data()
 
-    def load_sales_data(self):
-        print("SaleListWidget: Carregando dados das vendas...") # Debug
-        self.sales_table.setRowCount(0) # Limpa a tabela
-
+    def current_filters(self):
         # Coleta os filtros
         filters = {
             'data_inicio': self.data_inicio_input.date().toString("yyyy-MM-dd"),
@@ -116,9 +123,30 @@ class SaleListWidget(QWidget):
         }
         # Remove filtros vazios para não enviar parâmetros em branco para a API,
         # a menos que a API espere explicitamente por eles.
-        active_filters = {k: v for k, v in filters.items() if v}
+        return {k: v for k, v in filters.items() if v}
+
+    def handle_export_csv(self):
+        filters = self.current_filters()
+        suggested_name = f"itens_vendidos_{filters['data_inicio']}_{filters['data_fim']}.csv"
+        file_path, _ = QFileDialog.getSaveFileName(self, "Exportar Itens Vendidos", suggested_name, "CSV (*.csv)")
+        if not file_path:
+            return
+        QApplication.setOverrideCursor(Qt.WaitCursor) # Um ano de vendas pode levar alguns segundos
+        try:
+            success, result = export_sale_items_csv(file_path, filters)
+        finally:
+            QApplication.restoreOverrideCursor()
+        if success:
+            QMessageBox.information(self, "Exportação Concluída",
+                                    f"{result['rows']} itens exportados para:\n{file_path}")
+        else:
+            QMessageBox.critical(self, "Erro ao Exportar", result.get('detail', "Erro desconhecido ao exportar."))
+
+    def load_sales_data(self):
+        print("SaleListWidget: Carregando dados das vendas...") # Debug
+        self.sales_table.setRowCount(0) # Limpa a tabela
 
-        success, data_or_error = get_sales(active_filters)
+        success, data_or_error = get_sales(self.current_filters())
 
         if success:
             sales_list = data_or_error # get_sales já retorna a lista 'results' se houver paginação
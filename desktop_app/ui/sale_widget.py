@@ -1,5 +1,7 @@
 # desktop_app/ui/sale_widget.py
 
+import re
+
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
                              QPushButton, QTableWidget, QTableWidgetItem, QHeaderView,
                              QDoubleSpinBox, QSpinBox, QComboBox, QMessageBox, QFormLayout,
@@ -7,13 +9,19 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdi
 from PyQt5.QtCore import Qt
 
 # Importações dos serviços e estado
-from api_client.product_service import search_products_for_sale
+from api_client.product_service import search_products_for_sale, get_product_by_barcode
 # from api_client.client_service import get_clients, search_clients # Para quando implementar busca de cliente
 from api_client.sale_service import create_sale
 from state_manager.app_state import current_app_state
 from .select_client_dialog import SelectClientDialog
 from .receipt_dialog import ReceiptDialog
 
+# EAN-8, UPC-A, EAN-13 e GTIN-14 (e códigos internos numéricos a partir de 6 dígitos)
+BARCODE_PATTERN = re.compile(r'^\d{6,14}$')
+
+def looks_like_barcode(text):
+    return bool(BARCODE_PATTERN.match(text))
+
 class SaleWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -191,42 +199,56 @@ class SaleWidget(QWidget):
         self.client_search_input.clear() # Limpa também o campo de busca de cliente
         print("SaleWidget: Seleção de cliente limpa.")
 
-    def handle_add_product_to_sale(self):
-        search_term = self.product_search_input.text().strip()
-        quantity_to_add = self.product_quantity_spinbox.value()
-
-        if not search_term:
-            QMessageBox.warning(self, "Adicionar Produto", "Digite o nome ou código do produto para buscar.")
-            self.product_search_input.setFocus()
-            return
-        if quantity_to_add <= 0:
-            QMessageBox.warning(self, "Adicionar Produto", "A quantidade deve ser pelo menos 1.")
-            self.product_quantity_spinbox.setFocus()
-            return
-        
-        print(f"SaleWidget: Buscando produto '{search_term}' para adicionar {quantity_to_add} unidade(s).")
+    def search_product_by_text(self, search_term):
+        """Busca por nome/código (?search=) e escolhe o produto; retorna None se não houver ou em caso de erro."""
         success, products_or_error = search_products_for_sale(search_term)
 
         if not success:
             error_message = products_or_error.get('detail', "Erro ao buscar produto.")
             QMessageBox.critical(self, "Erro na Busca", error_message)
-            return
+            return None
 
         found_products = products_or_error
-        selected_product_data = None
 
         if not found_products:
             QMessageBox.information(self, "Busca de Produto", f"Nenhum produto encontrado para '{search_term}'.")
-            return
+            return None
         elif len(found_products) == 1:
-            selected_product_data = found_products[0]
-            print(f"SaleWidget: Produto único encontrado: {selected_product_data.get('nomeProduto')}")
+            print(f"SaleWidget: Produto único encontrado: {found_products[0].get('nomeProduto')}")
         else:
             QMessageBox.information(self, "Múltiplos Produtos",
                                   f"{len(found_products)} produtos encontrados para '{search_term}'.\n"
                                   "Selecionando o primeiro da lista para este exemplo.\n"
                                   "(Funcionalidade de seleção múltipla a ser implementada).")
-            selected_product_data = found_products[0]
+        return found_products[0]
+
+    def handle_add_product_to_sale(self):
+        search_term = self.product_search_input.text().strip()
+        quantity_to_add = self.product_quantity_spinbox.value()
+
+        if not search_term:
+            QMessageBox.warning(self, "Adicionar Produto", "Digite o nome ou código do produto para buscar.")
+            self.product_search_input.setFocus()
+            return
+        if quantity_to_add <= 0:
+            QMessageBox.warning(self, "Adicionar Produto", "A quantidade deve ser pelo menos 1.")
+            self.product_quantity_spinbox.setFocus()
+            return
+        
+        print(f"SaleWidget: Buscando produto '{search_term}' para adicionar {quantity_to_add} unidade(s).")
+        selected_product_data = None
+
+        # Leitor de código de barras: busca exata pelo índice (uma leitura) antes da busca por texto
+        if looks_like_barcode(search_term):
+            success, product_or_error = get_product_by_barcode(search_term)
+            if success and product_or_error:
+                selected_product_data = product_or_error
+                print(f"SaleWidget: Produto encontrado pelo código de barras: {selected_product_data.get('nomeProduto')}")
+            elif not success:
+                print(f"SaleWidget: Falha na busca por código de barras, tentando busca por texto. {product_or_error.get('detail')}")
+
+        if selected_product_data is None:
+            selected_product_data = self.search_product_by_text(search_term)
 
         if not selected_product_data:
             return
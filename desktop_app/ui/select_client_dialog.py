@@ -7,6 +7,8 @@ from PyQt5.QtCore import Qt
 from api_client.client_service import search_clients # Para buscar clientes
 """from .select_client_dialog import SelectClientDialog"""
 
+SEARCH_RESULTS_LIMIT = 50 # A API devolve só a primeira página da busca
+
 class SelectClientDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -25,7 +27,7 @@ class SelectClientDialog(QDialog):
         # Layout de Busca
         search_layout = QHBoxLayout()
         self.search_input = QLineEdit(self)
-        self.search_input.setPlaceholderText("Digite nome, CPF ou e-mail para buscar...")
+        self.search_input.setPlaceholderText("Digite o começo do nome, CPF, telefone ou e-mail...")
         self.search_input.returnPressed.connect(self.handle_search) # Busca ao pressionar Enter
         search_button = QPushButton("Buscar Cliente", self)
         search_button.clicked.connect(self.handle_search)
@@ -44,6 +46,8 @@ class SelectClientDialog(QDialog):
         self.results_table.setSelectionMode(QTableWidget.SingleSelection)
         self.results_table.doubleClicked.connect(self.handle_select_and_accept) # Seleciona com duplo clique
         main_layout.addWidget(self.results_table)
+        self.results_info_label = QLabel("", self) # Avisa quando a busca trouxe só os primeiros resultados
+        main_layout.addWidget(self.results_info_label)
 
         # Botões de Ação
         self.button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, self)
@@ -65,10 +69,11 @@ class SelectClientDialog(QDialog):
             return
 
         self.results_table.setRowCount(0) # Limpa resultados anteriores
+        self.results_info_label.setText("")
         self.button_box.button(QDialogButtonBox.Ok).setEnabled(False)
         print(f"SelectClientDialog: Buscando clientes com termo '{search_term}'")
 
-        success, clients_or_error = search_clients(search_term)
+        success, clients_or_error = search_clients(search_term, limit=SEARCH_RESULTS_LIMIT)
         if success and isinstance(clients_or_error, list):
             if not clients_or_error:
                 QMessageBox.information(self, "Busca de Clientes", "Nenhum cliente encontrado.")
@@ -80,6 +85,8 @@ class SelectClientDialog(QDialog):
                 self.results_table.setItem(row, 1, QTableWidgetItem(str(client_data.get('nome'))))
                 self.results_table.setItem(row, 2, QTableWidgetItem(str(client_data.get('cpf', 'N/A'))))
                 self.results_table.setItem(row, 3, QTableWidgetItem(str(client_data.get('email', 'N/A'))))
+            if len(clients_or_error) >= SEARCH_RESULTS_LIMIT:
+                self.results_info_label.setText(f"Mostrando os primeiros {SEARCH_RESULTS_LIMIT} clientes. Refine a busca para encontrar outros.")
             print(f"SelectClientDialog: {len(clients_or_error)} clientes carregados.")
         else:
             error_msg = clients_or_error.get('detail', "Erro ao buscar clientes.") if isinstance(clients_or_error, dict) else str(clients_or_error)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,11 +44,13 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
+    'django_filters',
     'vendas_api.apps.VendasApiConfig', # Ou 'vendas_api'
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'vendas_api.compressao.CompressaoMiddleware', # zstd/brotli/gzip conforme o Accept-Encoding; antes dos que leem o corpo
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware', # Adicionar aqui
     'django.middleware.common.CommonMiddleware',
@@ -156,12 +159,56 @@ AUTH_USER_MODEL = 'vendas_api.Usuario'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Usuário montado a partir do token (sem SELECT por requisição); ver SIMPLE_JWT abaixo
+        'rest_framework_simplejwt.authentication.JWTStatelessUserAuthentication',
         # 'rest_framework.authentication.SessionAuthentication', # Descomente se quiser usar o login do admin para testar a API no navegador
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         # Por padrão, todas as views da API exigirão que o usuário esteja autenticado.
         # Já sobrescrevemos isso em cada ViewSet com permissões mais específicas.
         'rest_framework.permissions.IsAuthenticated',
-    ]
-}
\ No newline at end of file
+    ],
+    # Todas as listagens são paginadas por chave (?cursor=...&page_size=...), ver vendas_api/pagination.py
+    'DEFAULT_PAGINATION_CLASS': 'vendas_api.pagination.KeysetPagination',
+    # JSON com orjson (opcional: sem o pacote, voltam ao json da biblioteca padrão), ver vendas_api/renderers.py
+    'DEFAULT_RENDERER_CLASSES': [
+        'vendas_api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'vendas_api.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Respostas menores que isto (bytes) não são comprimidas, ver vendas_api/compressao.py
+COMPRESSAO_TAMANHO_MINIMO = 1024
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Listagens de referência (categorias, grupos) já serializadas, ver vendas_api/cache_referencia.py.
+    # As chaves levam a versão da tabela (lida do banco), então o cache nunca serve dado velho.
+    # Em disco, compartilhado entre os processos do servidor e com o comando 'estatisticas_cache'
+    # (que roda em outro processo e não veria os contadores de um cache em memória).
+    'referencia': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache_referencia',
+        'TIMEOUT': 24 * 60 * 60, # Chaves de versões antigas expiram sozinhas
+    },
+    # Ou em um Redis (ou compatível, ex: Valkey) local; requer o pacote 'redis':
+    # 'referencia': {
+    #     'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+    #     'LOCATION': 'redis://127.0.0.1:6379/1',
+    #     'TIMEOUT': 24 * 60 * 60,
+    # },
+}
+
+SIMPLE_JWT = {
+    # Os grupos do usuário vão nos claims do token de acesso e são relidos a cada refresh,
+    # então mudanças de grupo/desativação levam no máximo ACCESS_TOKEN_LIFETIME para valer.
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=5),
+    'TOKEN_USER_CLASS': 'vendas_api.authentication.UsuarioToken',
+}
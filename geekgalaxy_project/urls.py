@@ -1,8 +1,8 @@
 from django.contrib import admin
 from django.urls import path, include # Certifique-se de que 'include' está importado
-from rest_framework_simplejwt.views import ( # Importar as views para JWT
-    TokenObtainPairView,
-    TokenRefreshView,
+from vendas_api.views import ( # Views de JWT que incluem os grupos do usuário nos claims
+    TokenComPapeisView,
+    TokenRefreshComPapeisView,
 )
 
 urlpatterns = [
@@ -17,9 +17,9 @@ urlpatterns = [
     # URLs para Autenticação por Token JWT
     # O front-end enviará o nome de usuário e senha para '/api/token/'
     # para obter os tokens de acesso e atualização.
-    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/token/', TokenComPapeisView.as_view(), name='token_obtain_pair'),
 
     # O front-end usará '/api/token/refresh/' para obter um novo token de acesso
     # quando o token de acesso atual expirar, usando o token de atualização.
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/refresh/', TokenRefreshComPapeisView.as_view(), name='token_refresh'),
 ]
\ No newline at end of file
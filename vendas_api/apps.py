@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class VendasApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'vendas_api'
+
+    def ready(self):
+        from . import busca # noqa: F401 - registra os sinais que mantêm o índice de busca dos produtos
+        from . import versoes # noqa: F401 - registra os sinais que incrementam as versões do catálogo (ETag)
+        from . import sincronizacao # noqa: F401 - registra as marcas de remoção de produtos e clientes
+        from . import movimentos # noqa: F401 - registra no livro-razão as edições manuais de estoque
@@ -0,0 +1,39 @@
+# vendas_api/authentication.py
+
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.models import TokenUser
+
+
+def adicionar_papeis_ao_token(token, user):
+    """
+    Grava no token os claims usados na autorização: username, grupos e flags de superusuário/staff.
+    É chamada apenas na emissão do token (login) e na renovação (refresh), que são os únicos
+    momentos em que os grupos são lidos do banco.
+    """
+    token['username'] = user.username
+    token['groups'] = sorted(user.groups.values_list('name', flat=True))
+    token['is_superuser'] = user.is_superuser
+    token['is_staff'] = user.is_staff
+    return token
+
+
+class UsuarioToken(TokenUser):
+    """
+    Usuário "sem estado" montado a partir dos claims do JWT (JWTStatelessUserAuthentication),
+    sem nenhuma consulta ao banco por requisição. Tem 'id', 'username', 'is_superuser' e 'is_staff'
+    como um Usuario; para gravar algo ligado ao usuário use request.user.pk (ex: usuario_id=...).
+    """
+
+    @cached_property
+    def papeis(self):
+        return frozenset(self.token.get('groups', ()))
+
+
+def usuario_tem_papel(user, nome_grupo):
+    """
+    Verifica se o usuário pertence ao grupo. Para usuários autenticados por token a resposta vem
+    dos claims (zero queries); para um Usuario do banco (admin, testes) consulta os grupos.
+    """
+    if isinstance(user, UsuarioToken):
+        return nome_grupo in user.papeis
+    return user.groups.filter(name=nome_grupo).exists()
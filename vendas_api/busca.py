@@ -0,0 +1,241 @@
+# vendas_api/busca.py
+
+import operator
+import re
+import unicodedata
+from functools import reduce
+
+from django.db import connection
+from django.db.models import Count, FloatField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import pre_save, post_save
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Produto, TermoBuscaProduto, Cliente
+
+# Campos do produto que entram na busca e o peso de cada um na relevância
+PESOS_CAMPOS = (('nomeProduto', 3), ('codigoBarras', 3), ('plataforma', 2), ('descricao', 1))
+TAMANHO_MAXIMO_TERMO = 100 # TermoBuscaProduto.termo
+
+# O índice FULLTEXT do InnoDB não guarda palavras menores que innodb_ft_min_token_size (padrão 3)
+# nem as stopwords padrão; exigidas com '+', elas fariam a busca inteira não encontrar nada
+TAMANHO_MINIMO_TOKEN_FULLTEXT = 3
+STOPWORDS_FULLTEXT = frozenset((
+    'a', 'about', 'an', 'are', 'as', 'at', 'be', 'by', 'com', 'de', 'en', 'for', 'from', 'how', 'i', 'in',
+    'is', 'it', 'la', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'what', 'when', 'where', 'who',
+    'will', 'with', 'und', 'www',
+))
+
+
+def normalizar(texto):
+    """'Acessório PS5/Xbox' -> 'acessorio ps5 xbox': minúsculas, sem acentos, só letras e dígitos."""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    return re.sub(r'[^a-z0-9]+', ' ', texto).strip()
+
+
+def digitos(texto):
+    """'123.456.789-00' -> '12345678900' (None se não houver dígitos)."""
+    return re.sub(r'\D', '', texto or '') or None
+
+
+def faixa_de_prefixo(campo, prefixo):
+    """
+    Filtro "campo começa com prefixo" como faixa [prefixo, prefixo + '{'), que usa o índice em
+    qualquer banco (o LIKE do startswith não usa índice no SQLite). Vale para valores normalizados
+    ou só com dígitos, em que todo caractere vem antes de '{' (logo depois de 'z').
+    """
+    return Q(**{f'{campo}__gte': prefixo, f'{campo}__lt': prefixo + '{'})
+
+
+def tokens(texto):
+    return normalizar(texto).split()
+
+
+def documento_busca(produto):
+    return ' '.join(filter(None, (normalizar(getattr(produto, campo)) for campo, _ in PESOS_CAMPOS)))
+
+
+def termos_do_produto(produto):
+    """{termo: peso}, somando os pesos quando o termo aparece em mais de um campo."""
+    termos = {}
+    for campo, peso in PESOS_CAMPOS:
+        for termo in set(tokens(getattr(produto, campo))):
+            termo = termo[:TAMANHO_MAXIMO_TERMO]
+            termos[termo] = termos.get(termo, 0) + peso
+    return termos
+
+
+def usa_fulltext():
+    """MySQL busca pelo índice FULLTEXT de documentoBusca; os outros bancos pelo índice invertido."""
+    return connection.vendor == 'mysql'
+
+
+def atualizar_termos(produtos, tamanho_lote=1000):
+    """Regrava as linhas de TermoBuscaProduto dos produtos informados (para gravações em lote, sem save())."""
+    produtos = list(produtos)
+    for inicio in range(0, len(produtos), tamanho_lote):
+        lote = produtos[inicio:inicio + tamanho_lote]
+        TermoBuscaProduto.objects.filter(produto__in=[p.pk for p in lote]).delete()
+        TermoBuscaProduto.objects.bulk_create([
+            TermoBuscaProduto(produto_id=produto.pk, termo=termo, peso=peso)
+            for produto in lote
+            for termo, peso in termos_do_produto(produto).items()
+        ], batch_size=tamanho_lote)
+
+
+def indexar_produtos(produtos, tamanho_lote=1000):
+    """Atualiza documentoBusca (e o índice invertido, fora do MySQL) de produtos gravados sem save()."""
+    produtos = list(produtos)
+    for produto in produtos:
+        produto.documentoBusca = documento_busca(produto)
+    Produto.objects.bulk_update(produtos, ['documentoBusca'], batch_size=tamanho_lote)
+    if not usa_fulltext():
+        atualizar_termos(produtos, tamanho_lote)
+
+
+def _atualizar_documento_busca(sender, instance, **kwargs):
+    instance.documentoBusca = documento_busca(instance)
+
+
+def _atualizar_termos_busca(sender, instance, raw=False, **kwargs):
+    if not raw and not usa_fulltext():
+        atualizar_termos([instance])
+
+
+pre_save.connect(_atualizar_documento_busca, sender=Produto, dispatch_uid='busca_documento_produto')
+post_save.connect(_atualizar_termos_busca, sender=Produto, dispatch_uid='busca_termos_produto')
+
+
+def termo_indexavel(parte):
+    return len(parte) >= TAMANHO_MINIMO_TOKEN_FULLTEXT and parte not in STOPWORDS_FULLTEXT
+
+
+def separar_termos(partes):
+    """
+    (obrigatórios, opcionais), a mesma regra em todos os bancos: os termos que o índice FULLTEXT
+    guarda são obrigatórios; os curtos demais e as stopwords ('2', 'the') só contam na relevância.
+    Se nenhum termo for indexável ('de', 'x'), todos são obrigatórios.
+    """
+    obrigatorios = [parte for parte in partes if termo_indexavel(parte)]
+    if not obrigatorios:
+        return partes, []
+    return obrigatorios, [parte for parte in partes if not termo_indexavel(parte)]
+
+
+def consulta_fulltext(obrigatorios, opcionais):
+    """(['fifa'], ['2']) -> '+fifa* 2*' (MATCH ... AGAINST em BOOLEAN MODE)."""
+    return ' '.join([f'+{parte}*' for parte in obrigatorios] + [f'{parte}*' for parte in opcionais])
+
+
+def buscar_produtos(queryset, texto):
+    """
+    Filtra o queryset de produtos pelos termos de 'texto' (todos precisam casar, por prefixo e sem
+    acento: 'acess' encontra 'Acessório') e anota 'relevancia' para a ordenação.
+    Termos curtos e stopwords são opcionais quando há outros termos (ver separar_termos).
+    - MySQL: MATCH(documentoBusca) AGAINST ('+termo1* +termo2*' IN BOOLEAN MODE) no índice FULLTEXT.
+      Se só houver termos que o índice não guarda ('de', 'x'), varre documentoBusca com LIKE,
+      casando o começo das palavras como nos outros caminhos.
+    - Outros bancos: varredura por faixa no índice (termo, produto) de TermoBuscaProduto, com a
+      relevância somando os pesos dos campos em que cada termo aparece.
+    """
+    partes = tokens(texto)
+    if not partes:
+        return queryset
+    obrigatorios, opcionais = separar_termos(partes)
+    if usa_fulltext():
+        if not termo_indexavel(obrigatorios[0]):
+            # documentoBusca é normalizado (palavras separadas por espaço): começo do texto ou depois de um espaço
+            filtro = reduce(operator.and_, (
+                Q(documentoBusca__startswith=parte) | Q(documentoBusca__contains=f' {parte}') for parte in obrigatorios
+            ))
+            return queryset.filter(filtro).annotate(relevancia=Value(0.0, output_field=FloatField()))
+        consulta = consulta_fulltext(obrigatorios, opcionais)
+        coluna = f"{connection.ops.quote_name(Produto._meta.db_table)}.{connection.ops.quote_name('documentoBusca')}"
+        relevancia = RawSQL(f"MATCH({coluna}) AGAINST (%s IN BOOLEAN MODE)", (consulta,), output_field=FloatField())
+        return queryset.annotate(relevancia=relevancia).filter(relevancia__gt=0)
+
+    # Prefixo de cada termo como varredura de intervalo no índice (termo, produto); os opcionais
+    # entram na relevância
+    por_prefixo = [faixa_de_prefixo('termo', parte) for parte in partes]
+    casamentos = TermoBuscaProduto.objects.filter(reduce(operator.or_, por_prefixo))
+    casados = casamentos.values('produto')
+    if len(partes) > 1: # Produtos que casaram com TODOS os termos obrigatórios
+        exigidos = [faixa_de_prefixo('termo', parte) for parte in obrigatorios]
+        casados = (
+            casados.annotate(**{f'casou_{i}': Count('pk', filter=condicao) for i, condicao in enumerate(exigidos)})
+            .filter(**{f'casou_{i}__gt': 0 for i in range(len(exigidos))})
+        )
+    relevancia = (
+        casamentos.filter(produto=OuterRef('pk')).values('produto')
+        .annotate(total=Sum('peso')).values('total')
+    )
+    return queryset.filter(pk__in=casados.values('produto')).annotate(relevancia=Subquery(relevancia))
+
+
+def termos_da_busca(request, parametro='search'):
+    return tokens(request.query_params.get(parametro, '')) if request is not None else []
+
+
+class BuscaProdutoFilter(BaseFilterBackend):
+    """
+    Substitui o SearchFilter (OR de quatro LIKE '%termo%') em ?search=, usando buscar_produtos.
+    Sem ?ordering=, o ProdutoViewSet ordena o resultado por relevância.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        if not termos_da_busca(request, self.search_param):
+            return queryset
+        return buscar_produtos(queryset, request.query_params[self.search_param])
+
+
+# --- Clientes ---
+
+def _atualizar_colunas_busca_cliente(sender, instance, **kwargs):
+    instance.cpfDigitos = digitos(instance.cpf)
+    instance.telefoneDigitos = digitos(instance.telefone)
+    instance.nomeNormalizado = normalizar(instance.nome)
+
+
+pre_save.connect(_atualizar_colunas_busca_cliente, sender=Cliente, dispatch_uid='busca_colunas_cliente')
+
+
+def classificar_busca_cliente(texto):
+    """
+    Decide por qual coluna buscar o que o atendente digitou:
+    - ('documento', '12345'): só números e pontuação de CPF/telefone -> prefixo de cpfDigitos ou telefoneDigitos;
+    - ('email', 'fulano@'): tem '@' -> começo do e-mail;
+    - ('nome', 'joao da'): o resto -> prefixo de nomeNormalizado (sem acento e sem diferenciar maiúsculas).
+    Retorna None se não sobrar nada para buscar.
+    """
+    texto = (texto or '').strip()
+    if not texto:
+        return None
+    if re.fullmatch(r'[\d\s.()/+-]+', texto):
+        numeros = digitos(texto)
+        return ('documento', numeros) if numeros else None
+    if '@' in texto:
+        return ('email', texto)
+    nome = normalizar(texto)
+    return ('nome', nome) if nome else None
+
+
+def buscar_clientes(queryset, texto):
+    busca = classificar_busca_cliente(texto)
+    if busca is None:
+        return queryset
+    tipo, valor = busca
+    if tipo == 'documento':
+        return queryset.filter(faixa_de_prefixo('cpfDigitos', valor) | faixa_de_prefixo('telefoneDigitos', valor))
+    if tipo == 'email':
+        return queryset.filter(email__istartswith=valor) # Raro no PDV; sem índice próprio
+    return queryset.filter(faixa_de_prefixo('nomeNormalizado', valor))
+
+
+class BuscaClienteFilter(BaseFilterBackend):
+    """?search= dos clientes: CPF/telefone por dígitos, e-mail ou prefixo do nome (ver classificar_busca_cliente)."""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        return buscar_clientes(queryset, request.query_params.get(self.search_param, ''))
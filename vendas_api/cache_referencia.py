@@ -0,0 +1,80 @@
+# vendas_api/cache_referencia.py
+
+import hashlib
+
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+from .versoes import versoes_atuais
+
+ALIAS_CACHE = 'referencia' # Ver CACHES em settings.py
+CHAVE_ACERTOS = 'estatisticas:acertos'
+CHAVE_FALHAS = 'estatisticas:falhas'
+
+
+def _cache():
+    return caches[ALIAS_CACHE]
+
+
+def _contar(chave):
+    cache = _cache()
+    cache.add(chave, 0, timeout=None)
+    try:
+        cache.incr(chave)
+    except ValueError: # A chave expirou/foi removida entre o add e o incr
+        cache.set(chave, 1, timeout=None)
+
+
+def estatisticas():
+    """
+    Acertos e falhas acumulados no backend, compartilhados entre os processos (o padrão é o cache em
+    disco). Nele o incr não é atômico: com acessos simultâneos a contagem é aproximada.
+    """
+    acertos, falhas = (_cache().get(chave, 0) for chave in (CHAVE_ACERTOS, CHAVE_FALHAS))
+    total = acertos + falhas
+    return {'acertos': acertos, 'falhas': falhas, 'taxa_acerto': acertos / total if total else 0.0}
+
+
+def zerar_estatisticas():
+    _cache().delete_many([CHAVE_ACERTOS, CHAVE_FALHAS])
+
+
+class CacheListagemMixin:
+    """
+    Guarda a listagem já serializada (response.data) no cache 'referencia', sob a chave
+
+        listagem:<tabela><versão>...:<hash da URL absoluta>
+
+    A versão vem de VersaoTabela, incrementada pelos post_save/post_delete de versoes.py: uma
+    gravação muda a chave e a entrada antiga deixa de ser usada (e expira pelo TIMEOUT), sem
+    precisar apagar nada. Se o ETagPorVersaoMixin vier antes na herança, as versões que ele já
+    leu são reaproveitadas e um acerto custa só essa consulta.
+    Cada resposta leva X-Cache: HIT ou MISS.
+    """
+    tabelas_cache = ()
+
+    def chave_cache(self, request):
+        lidas = getattr(self, 'versoes_lidas', {})
+        if all(nome in lidas for nome in self.tabelas_cache):
+            versoes = [lidas[nome] for nome in self.tabelas_cache]
+        else:
+            versoes = versoes_atuais(self.tabelas_cache)
+        marca = '.'.join(f'{nome}{versao}' for nome, versao in zip(self.tabelas_cache, versoes))
+        # URL absoluta (esquema e host): os links next/previous guardados são absolutos, e um terminal
+        # que acessa por outro endereço (IP da rede, proxy) não pode receber os links de outro
+        url = hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+        return f'listagem:{marca}:{url}'
+
+    def list(self, request, *args, **kwargs):
+        chave = self.chave_cache(request) # Antes de ler as linhas, como no ETag
+        dados = _cache().get(chave)
+        if dados is not None:
+            _contar(CHAVE_ACERTOS)
+            return Response(dados, status=status.HTTP_200_OK, headers={'X-Cache': 'HIT'})
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            _cache().set(chave, response.data)
+            _contar(CHAVE_FALHAS)
+            response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,114 @@
+# vendas_api/cancelamento.py
+
+from collections import defaultdict
+
+from django.db import transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .estoque import repor_estoque
+from .movimentos import registrar_movimentos
+from .models import Venda, ItemVenda
+from .resumos import estado_resumo, registrar_vendas_alteradas, data_da_venda, totais_dos_itens, registrar_itens_vendidos
+
+# Resultado de cada venda no cancelamento em lote
+CANCELADA = 'CANCELADA'
+JA_CANCELADA = 'JA_CANCELADA'
+NAO_ENCONTRADA = 'NAO_ENCONTRADA'
+TRANSICAO_INVALIDA = 'TRANSICAO_INVALIDA'
+
+
+class VendaAlteradaConcorrentemente(APIException):
+    """Outra operação mudou a venda entre a leitura e a gravação (409: releia e tente de novo)."""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'A venda foi alterada por outra operação. Atualize os dados e tente novamente.'
+    default_code = 'conflict'
+
+
+def transicao_permitida(status_atual, novo_status):
+    """Consulta Venda.TRANSICOES_STATUS_VENDA; manter o mesmo status é sempre permitido (repetição idempotente)."""
+    return novo_status == status_atual or novo_status in Venda.TRANSICOES_STATUS_VENDA.get(status_atual, ())
+
+
+def atualizar_venda_se_inalterada(venda, **campos):
+    """
+    Grava 'campos' com um UPDATE condicional
+
+        UPDATE venda SET ... WHERE id = %s AND statusVenda = <lido> AND formaPagamento = <lido>
+
+    e só então os aplica em 'venda'. Se outra transação mudou o status (ou a forma de pagamento,
+    que também decide a linha do resumo) depois que a venda foi lida, nenhuma linha é atualizada
+    e a função retorna False: entre dois cancelamentos simultâneos, exatamente um vence, sem
+    SELECT ... FOR UPDATE.
+    """
+    atualizadas = Venda.objects.filter(
+        pk=venda.pk, statusVenda=venda.statusVenda, formaPagamento=venda.formaPagamento
+    ).update(**campos)
+    if not atualizadas:
+        return False
+    for campo, valor in campos.items():
+        setattr(venda, campo, valor)
+    return True
+
+
+@transaction.atomic
+def cancelar_vendas(venda_ids):
+    """
+    Cancela várias vendas com um número fixo de comandos, independente de quantas vendas e itens:
+    - um SELECT ... FOR UPDATE das vendas (em ordem de id, como o estoque) e um SELECT dos itens;
+    - um único UPDATE de estoque somando os itens de todas as vendas por produto (repor_estoque)
+      e um INSERT em lote dos movimentos de estoque (um por venda e produto);
+    - um único UPDATE trocando statusVenda/statusPagamento de todas as vendas;
+    - os resumos (VendaResumoDiario e ProdutoVendaDiaria), agrupados por chave e por dia.
+
+    Retorna {venda_id: CANCELADA | JA_CANCELADA | TRANSICAO_INVALIDA | NAO_ENCONTRADA}, na ordem dos ids recebidos.
+    """
+    venda_ids = list(dict.fromkeys(venda_ids)) # Remove repetidos mantendo a ordem
+    vendas = {
+        venda.pk: venda
+        for venda in Venda.objects.select_for_update().filter(pk__in=venda_ids).order_by('pk')
+    }
+    resultados = {}
+    a_cancelar = []
+    for venda_id in venda_ids:
+        venda = vendas.get(venda_id)
+        if venda is None:
+            resultados[venda_id] = NAO_ENCONTRADA
+        elif venda.statusVenda == 'CANCELADA':
+            resultados[venda_id] = JA_CANCELADA
+        elif not transicao_permitida(venda.statusVenda, 'CANCELADA'):
+            resultados[venda_id] = TRANSICAO_INVALIDA
+        else:
+            resultados[venda_id] = CANCELADA
+            a_cancelar.append(venda)
+    if not a_cancelar:
+        return resultados
+
+    ids_a_cancelar = [venda.pk for venda in a_cancelar]
+    itens_por_venda = defaultdict(list)
+    quantidades = defaultdict(int)
+    devolvidos = defaultdict(int) # {(venda_id, produto_id): quantidade}, para o livro-razão
+    for item in ItemVenda.objects.filter(venda_id__in=ids_a_cancelar).only('venda_id', 'produto_id', 'quantidade', 'precoUnitarioVenda'):
+        itens_por_venda[item.venda_id].append(item)
+        quantidades[item.produto_id] += item.quantidade
+        devolvidos[item.venda_id, item.produto_id] += item.quantidade
+
+    repor_estoque(quantidades)
+    registrar_movimentos('CANCELAMENTO', [(produto_id, qtd, venda_id) for (venda_id, produto_id), qtd in devolvidos.items()])
+    # As vendas estão travadas; o filtro de status é só a mesma guarda usada no cancelamento individual
+    Venda.objects.filter(pk__in=ids_a_cancelar).exclude(statusVenda='CANCELADA').update(statusVenda='CANCELADA', statusPagamento='CANCELADO_ESTORNADO')
+
+    alteracoes = []
+    itens_por_dia = defaultdict(list)
+    for venda in a_cancelar:
+        estado_anterior = estado_resumo(venda)
+        venda.statusVenda, venda.statusPagamento = 'CANCELADA', 'CANCELADO_ESTORNADO'
+        alteracoes.append((estado_anterior, venda))
+        itens_por_dia[data_da_venda(venda)].extend(itens_por_venda[venda.pk])
+    registrar_vendas_alteradas(alteracoes)
+    for data, itens in itens_por_dia.items():
+        registrar_itens_vendidos(data, totais_dos_itens(itens), sinal=-1)
+
+    # RF017 - Simular comunicação com sistema financeiro
+    print(f"LOG: Vendas {', '.join(str(pk) for pk in ids_a_cancelar)} canceladas. Códigos enviados ao sistema financeiro.")
+    return resultados
@@ -0,0 +1,166 @@
+# vendas_api/compressao.py
+
+import gzip
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import zstandard
+except ImportError: # Dependência opcional
+    zstandard = None
+
+try:
+    import brotli
+except ImportError: # Dependência opcional
+    brotli = None
+
+TAMANHO_MINIMO_PADRAO = 1024 # Abaixo disso os cabeçalhos e o custo de CPU não compensam
+TIPOS_COMPRIMIVEIS = ('application/json', 'text/')
+_re_codificacao = _lazy_re_compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+class _Gzip:
+    nome = 'gzip'
+
+    def comprimir(self, dados):
+        return gzip.compress(dados, compresslevel=6, mtime=0)
+
+    def fluxo(self):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) # 16+: cabeçalho gzip
+        return (lambda parte: compressor.compress(parte) + compressor.flush(zlib.Z_SYNC_FLUSH)), compressor.flush
+
+
+class _Zstd:
+    nome = 'zstd'
+
+    def comprimir(self, dados):
+        return zstandard.ZstdCompressor(level=3).compress(dados)
+
+    def fluxo(self):
+        compressor = zstandard.ZstdCompressor(level=3).compressobj()
+        return (lambda parte: compressor.compress(parte) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)), compressor.flush
+
+
+class _Brotli:
+    nome = 'br'
+
+    def comprimir(self, dados):
+        return brotli.compress(dados, quality=5) # Qualidade alta (11) é lenta demais para respostas dinâmicas
+
+    def fluxo(self):
+        compressor = brotli.Compressor(quality=5)
+        return (lambda parte: compressor.process(parte) + compressor.flush()), compressor.finish
+
+
+def codificadores_disponiveis():
+    """Em ordem de preferência do servidor: zstd e brotli (se instalados) comprimem mais e mais rápido que o gzip."""
+    codificadores = []
+    if zstandard is not None:
+        codificadores.append(_Zstd())
+    if brotli is not None:
+        codificadores.append(_Brotli())
+    codificadores.append(_Gzip())
+    return codificadores
+
+
+def escolher_codificador(accept_encoding):
+    """
+    Negocia pelo Accept-Encoding (com pesos q=): o aceito de maior peso; nos empates, a preferência
+    do servidor. Devolve None se o cliente não aceitar nenhum (ou não mandar o cabeçalho).
+    """
+    pesos = {}
+    for item in accept_encoding.split(','):
+        encontrado = _re_codificacao.match(item)
+        if not encontrado:
+            continue
+        try:
+            pesos[encontrado.group(1).lower()] = float(encontrado.group(2) or 1)
+        except ValueError:
+            continue
+    melhor, melhor_peso = None, 0
+    for codificador in codificadores_disponiveis():
+        peso = pesos.get(codificador.nome, pesos.get('*', 0))
+        if peso > melhor_peso:
+            melhor, melhor_peso = codificador, peso
+    return melhor
+
+
+class CompressaoMiddleware:
+    """
+    Comprime as respostas da API (listagens de produtos e vendas são JSON muito repetitivo) com
+    zstd, brotli ou gzip, conforme o Accept-Encoding do cliente.
+
+    - Respostas comuns só são comprimidas a partir de settings.COMPRESSAO_TAMANHO_MINIMO bytes.
+    - Respostas em streaming (StreamingHttpResponse, ex: exportação CSV) são comprimidas parte a
+      parte, com flush a cada parte: o cliente continua recebendo os dados enquanto são gerados.
+    - Um ETag forte vira fraco (W/"..."), como no GZipMiddleware do Django: o corpo comprimido não
+      é byte a byte a mesma representação. O If-None-Match usa comparação fraca (ver versoes.py).
+    - Funciona em WSGI e em ASGI sem trocar de thread (as views async de leitura_assincrona.py
+      passariam por um sync_to_async a cada requisição se o middleware fosse só síncrono).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.tamanho_minimo = getattr(settings, 'COMPRESSAO_TAMANHO_MINIMO', TAMANHO_MINIMO_PADRAO)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self._acall(request)
+        return self.comprimir_resposta(request, self.get_response(request))
+
+    async def _acall(self, request):
+        return self.comprimir_resposta(request, await self.get_response(request))
+
+    def comprimir_resposta(self, request, response):
+        if response.status_code in (204, 304) or response.has_header('Content-Encoding'):
+            return response
+        if not response.get('Content-Type', '').startswith(TIPOS_COMPRIMIVEIS):
+            return response
+        if not response.streaming and len(response.content) < self.tamanho_minimo:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codificador = escolher_codificador(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if codificador is None:
+            return response
+
+        if response.streaming:
+            comprimir_fluxo = self._comprimir_fluxo_async if response.is_async else self._comprimir_fluxo
+            response.streaming_content = comprimir_fluxo(codificador, response.streaming_content)
+            del response['Content-Length']
+        else:
+            comprimido = codificador.comprimir(response.content)
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response['Content-Length'] = str(len(comprimido))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = codificador.nome
+        return response
+
+    @staticmethod
+    def _comprimir_fluxo(codificador, partes):
+        comprimir, finalizar = codificador.fluxo()
+        for parte in partes:
+            if parte:
+                yield comprimir(parte)
+        yield finalizar()
+
+    @staticmethod
+    async def _comprimir_fluxo_async(codificador, partes):
+        comprimir, finalizar = codificador.fluxo()
+        async for parte in partes:
+            if parte:
+                yield comprimir(parte)
+        yield finalizar()
@@ -0,0 +1,193 @@
+# vendas_api/estoque.py
+
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .models import Produto
+from .movimentos import registrar_movimentos
+from .versoes import incrementar_versao
+
+
+class EstoqueInsuficiente(Exception):
+    """Lançada quando a baixa condicional não encontra estoque suficiente para algum produto."""
+
+    def __init__(self, faltas):
+        # faltas: lista de (produto_id, nomeProduto, disponível, solicitado)
+        self.faltas = faltas
+        mensagens = [
+            f"Estoque insuficiente para o produto '{nome}'. Disponível: {disponivel}, Solicitado: {solicitado}."
+            for _, nome, disponivel, solicitado in faltas
+        ]
+        super().__init__(' '.join(mensagens))
+
+
+def _quantidade_por_produto(quantidades):
+    """Expressão CASE que devolve, para cada linha de Produto, a quantidade informada em 'quantidades'."""
+    return Case(
+        *[When(pk=produto_id, then=Value(qtd)) for produto_id, qtd in sorted(quantidades.items())],
+        output_field=models.PositiveIntegerField()
+    )
+
+
+def baixar_estoque(quantidades):
+    """
+    Baixa o estoque de vários produtos com um único UPDATE condicional:
+
+        UPDATE produto SET quantidadeEstoque = quantidadeEstoque - CASE id ... END
+        WHERE id IN (...) AND quantidadeEstoque >= CASE id ... END ORDER BY id
+
+    'quantidades' é um dict {produto_id: quantidade}. A condição no WHERE é avaliada sobre a linha
+    já travada, então duas vendas simultâneas do mesmo produto nunca vendem além do estoque.
+    O ORDER BY id (respeitado pelo MySQL) trava as linhas sempre na mesma ordem, evitando deadlock
+    entre terminais que vendem os mesmos produtos em ordens diferentes.
+
+    Se algum produto não tiver estoque, lança EstoqueInsuficiente; deve ser chamada dentro de uma
+    transação para que as linhas já decrementadas pelo mesmo UPDATE sejam desfeitas.
+    """
+    if not quantidades:
+        return
+    quantidade = _quantidade_por_produto(quantidades)
+    atualizados = (
+        Produto.objects
+        .filter(pk__in=quantidades, quantidadeEstoque__gte=quantidade)
+        .order_by('pk')
+        .update(quantidadeEstoque=F('quantidadeEstoque') - quantidade, atualizadoEm=timezone.now())
+    )
+    if atualizados != len(quantidades):
+        # Leitura feita na mesma transação, com as linhas já travadas: reflete o estoque real
+        faltas = [
+            (produto_id, nome, disponivel, quantidades[produto_id])
+            for produto_id, nome, disponivel in (
+                Produto.objects.filter(pk__in=quantidades).order_by('pk')
+                .values_list('pk', 'nomeProduto', 'quantidadeEstoque')
+            )
+            if disponivel < quantidades[produto_id]
+        ]
+        raise EstoqueInsuficiente(faltas)
+    incrementar_versao('produto') # O UPDATE em massa não dispara post_save nem o auto_now de atualizadoEm
+
+
+def repor_estoque(quantidades):
+    """
+    Devolve ao estoque as quantidades {produto_id: quantidade} com um único UPDATE
+    (quantidadeEstoque = quantidadeEstoque + CASE id ... END), travando as linhas em ordem de id
+    como a baixar_estoque. Usada nos cancelamentos, dentro da transação que cancela as vendas.
+    """
+    if not quantidades:
+        return
+    Produto.objects.filter(pk__in=quantidades).order_by('pk').update(
+        quantidadeEstoque=F('quantidadeEstoque') + _quantidade_por_produto(quantidades),
+        atualizadoEm=timezone.now(), # .update() não aplica o auto_now
+    )
+    incrementar_versao('produto')
+
+
+TAMANHO_LOTE_AJUSTE = 1000 # Produtos por UPDATE (um CASE com até esse número de ramos)
+MAX_ITENS_AJUSTE = 100_000
+_QUANTIDADE_MAXIMA = 2_147_483_647 # PositiveIntegerField
+
+
+class AjusteInvalido(Exception):
+    """A contagem tem itens inválidos; nenhum estoque foi alterado. 'erros' lista {item, erros}."""
+
+    def __init__(self, erros):
+        self.erros = erros
+        super().__init__(f"{len(erros)} item(ns) inválido(s) na contagem.")
+
+
+def ler_contagens(itens):
+    """
+    Valida a contagem do inventário: lista de {'id' ou 'codigoBarras', 'quantidade'}. Os códigos de
+    barras são resolvidos em lotes pelo índice único. Devolve {produto_id: quantidade contada} ou lança
+    AjusteInvalido com todos os itens com problema (posição na lista começando em 0).
+    """
+    if not isinstance(itens, list) or not itens:
+        raise AjusteInvalido([{'item': None, 'erros': {'itens': "Envie uma lista não vazia de contagens."}}])
+    if len(itens) > MAX_ITENS_AJUSTE:
+        raise AjusteInvalido([{'item': None, 'erros': {'itens': f"Máximo de {MAX_ITENS_AJUSTE} itens por ajuste."}}])
+
+    erros, lidos = [], [] # lidos: (posição, id ou None, codigoBarras ou None, quantidade)
+    for posicao, item in enumerate(itens):
+        problemas = {}
+        if not isinstance(item, dict):
+            erros.append({'item': posicao, 'erros': {'item': "Cada contagem deve ser um objeto."}})
+            continue
+        produto_id, codigo = item.get('id'), item.get('codigoBarras')
+        if (produto_id is None) == (codigo in (None, '')):
+            problemas['produto'] = "Informe 'id' ou 'codigoBarras' (apenas um deles)."
+        elif produto_id is not None and (isinstance(produto_id, bool) or not isinstance(produto_id, int)):
+            problemas['id'] = "Deve ser um número inteiro."
+        quantidade = item.get('quantidade')
+        if isinstance(quantidade, bool) or not isinstance(quantidade, int) or not 0 <= quantidade <= _QUANTIDADE_MAXIMA:
+            problemas['quantidade'] = "Informe um número inteiro maior ou igual a zero."
+        if problemas:
+            erros.append({'item': posicao, 'erros': problemas})
+        else:
+            lidos.append((posicao, produto_id, None if produto_id is not None else str(codigo).strip(), quantidade))
+
+    ids_por_codigo, ids_existentes = {}, set()
+    codigos = sorted({codigo for _, produto_id, codigo, _ in lidos if produto_id is None})
+    ids = sorted({produto_id for _, produto_id, _, _ in lidos if produto_id is not None})
+    for inicio in range(0, len(codigos), TAMANHO_LOTE_AJUSTE):
+        ids_por_codigo.update(
+            Produto.objects.filter(codigoBarras__in=codigos[inicio:inicio + TAMANHO_LOTE_AJUSTE]).values_list('codigoBarras', 'pk')
+        )
+    for inicio in range(0, len(ids), TAMANHO_LOTE_AJUSTE):
+        ids_existentes.update(Produto.objects.filter(pk__in=ids[inicio:inicio + TAMANHO_LOTE_AJUSTE]).values_list('pk', flat=True))
+
+    contagens = {}
+    for posicao, produto_id, codigo, quantidade in lidos:
+        if produto_id is None:
+            produto_id = ids_por_codigo.get(codigo)
+            if produto_id is None:
+                erros.append({'item': posicao, 'erros': {'codigoBarras': f"Nenhum produto com o código de barras '{codigo}'."}})
+                continue
+        elif produto_id not in ids_existentes:
+            erros.append({'item': posicao, 'erros': {'id': f"Produto {produto_id} não existe."}})
+            continue
+        if produto_id in contagens:
+            # Contagens do mesmo produto em lugares diferentes devem ser somadas antes do envio
+            erros.append({'item': posicao, 'erros': {'produto': f"Produto {produto_id} informado mais de uma vez."}})
+            continue
+        contagens[produto_id] = quantidade
+    if erros:
+        raise AjusteInvalido(sorted(erros, key=lambda erro: erro['item']))
+    return contagens
+
+
+def ajustar_estoque(contagens):
+    """
+    Aplica a contagem física {produto_id: quantidade contada}, em lotes de TAMANHO_LOTE_AJUSTE:
+    lê o estoque atual com SELECT ... FOR UPDATE (em ordem de id, como a baixar_estoque) e grava só
+    os produtos com diferença em um UPDATE com CASE por lote:
+
+        UPDATE produto SET quantidadeEstoque = CASE id WHEN ... END WHERE id IN (...)
+
+    Os deltas vão para o livro-razão (MovimentoEstoque) em um INSERT por lote.
+    Tudo em uma transação: ou a contagem inteira é aplicada, ou nada. Devolve a lista
+    [(produto_id, quantidade anterior, quantidade contada)] dos produtos alterados, em ordem de id;
+    como a leitura é feita com as linhas travadas, o delta não perde vendas concorrentes.
+    """
+    ajustes = []
+    ids = sorted(contagens)
+    agora = timezone.now()
+    with transaction.atomic():
+        for inicio in range(0, len(ids), TAMANHO_LOTE_AJUSTE):
+            lote = ids[inicio:inicio + TAMANHO_LOTE_AJUSTE]
+            anteriores = list(
+                Produto.objects.select_for_update().filter(pk__in=lote).order_by('pk').values_list('pk', 'quantidadeEstoque')
+            )
+            alterados = {produto_id: contagens[produto_id] for produto_id, anterior in anteriores if anterior != contagens[produto_id]}
+            ajustes.extend((produto_id, anterior, contagens[produto_id]) for produto_id, anterior in anteriores if produto_id in alterados)
+            if alterados:
+                Produto.objects.filter(pk__in=alterados).update(
+                    quantidadeEstoque=_quantidade_por_produto(alterados),
+                    atualizadoEm=agora, # .update() não aplica o auto_now; a sincronização incremental depende dele
+                )
+                registrar_movimentos('AJUSTE', [
+                    (produto_id, contagens[produto_id] - anterior, None) for produto_id, anterior in anteriores if produto_id in alterados
+                ], momento=agora)
+        if ajustes:
+            incrementar_versao('produto')
+    return ajustes
@@ -0,0 +1,83 @@
+# vendas_api/exportacao.py
+
+import csv
+
+from django.db import models
+from django.db.models import ExpressionWrapper, F, Max, Min
+from django.utils import timezone
+
+from .models import ItemVenda
+
+# Linhas de ItemVenda lidas por consulta; a memória do servidor fica em torno de uma janela, qualquer que seja o período
+TAMANHO_JANELA_EXPORTACAO = 5000
+
+# (cabeçalho do CSV, caminho em ItemVenda): uma linha por item, com os dados da venda repetidos
+COLUNAS_EXPORTACAO = (
+    ('venda_id', 'venda_id'),
+    ('dataHoraVenda', 'venda__dataHoraVenda'),
+    ('statusVenda', 'venda__statusVenda'),
+    ('formaPagamento', 'venda__formaPagamento'),
+    ('statusPagamento', 'venda__statusPagamento'),
+    ('valorTotalVenda', 'venda__valorTotalVenda'),
+    ('vendedor', 'venda__usuario__username'),
+    ('cliente', 'venda__cliente__nome'),
+    ('cpfCliente', 'venda__cliente__cpf'),
+    ('item_id', 'id'),
+    ('produto_id', 'produto_id'),
+    ('codigoBarras', 'produto__codigoBarras'),
+    ('nomeProduto', 'produto__nomeProduto'),
+    ('categoria', 'produto__categoria__nomeCategoria'),
+    ('quantidade', 'quantidade'),
+    ('precoUnitarioVenda', 'precoUnitarioVenda'),
+    ('subtotal', 'subtotal'),
+)
+_POSICAO_DATA = 1
+
+
+class _Eco:
+    """Pseudo-arquivo para o csv.writer: devolve a linha formatada em vez de guardá-la."""
+
+    def write(self, valor):
+        return valor
+
+
+def linhas_exportacao(vendas):
+    """
+    Gera as linhas (tuplas) dos itens das vendas do queryset 'vendas', em ordem de ItemVenda.id
+    (a ordem em que foram vendidos).
+
+    Em vez de um único SELECT lido com .iterator() (o mysqlclient traz o resultado inteiro para a
+    memória do cliente antes da primeira linha), o intervalo de IDs dos itens é percorrido em
+    janelas de TAMANHO_JANELA_EXPORTACAO: cada janela é um SELECT pela faixa da PK, com os JOINs
+    de venda, usuário, cliente, produto e categoria, lido com .values_list().iterator().
+    """
+    itens = ItemVenda.objects.filter(venda__in=vendas.order_by().values('pk'))
+    limites = itens.aggregate(primeiro=Min('pk'), ultimo=Max('pk'))
+    if limites['primeiro'] is None:
+        return
+    campos = [caminho for _, caminho in COLUNAS_EXPORTACAO]
+    itens = itens.annotate(subtotal=ExpressionWrapper(
+        F('quantidade') * F('precoUnitarioVenda'), output_field=models.DecimalField(max_digits=12, decimal_places=2)
+    ))
+    for inicio in range(limites['primeiro'], limites['ultimo'] + 1, TAMANHO_JANELA_EXPORTACAO):
+        janela = (
+            itens.filter(pk__gte=inicio, pk__lt=inicio + TAMANHO_JANELA_EXPORTACAO)
+            .order_by('pk').values_list(*campos)
+        )
+        yield from janela.iterator(chunk_size=TAMANHO_JANELA_EXPORTACAO)
+
+
+def gerar_csv(vendas, separador=','):
+    """Gera o CSV (cabeçalho + uma linha por item) em pedaços de texto, um por janela de itens."""
+    escritor = csv.writer(_Eco(), delimiter=separador)
+    yield escritor.writerow([cabecalho for cabecalho, _ in COLUNAS_EXPORTACAO])
+    pedaco = []
+    for linha in linhas_exportacao(vendas):
+        linha = list(linha)
+        linha[_POSICAO_DATA] = timezone.localtime(linha[_POSICAO_DATA]).strftime('%Y-%m-%d %H:%M:%S')
+        pedaco.append(escritor.writerow(linha))
+        if len(pedaco) >= TAMANHO_JANELA_EXPORTACAO:
+            yield ''.join(pedaco)
+            pedaco = []
+    if pedaco:
+        yield ''.join(pedaco)
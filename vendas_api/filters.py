@@ -0,0 +1,38 @@
+# vendas_api/filters.py
+
+from datetime import datetime, time, timedelta
+
+import django_filters
+from django.utils import timezone
+
+from .models import Venda
+
+
+def inicio_do_dia(data):
+    """Converte uma data no datetime (com fuso) do início daquele dia."""
+    return timezone.make_aware(datetime.combine(data, time.min))
+
+
+class VendaFilter(django_filters.FilterSet):
+    """
+    Filtros do relatório de vendas (SaleListWidget).
+    Os filtros de data são convertidos em um intervalo sobre dataHoraVenda
+    (>= início do dia inicial e < início do dia seguinte ao final), e não em DATE(dataHoraVenda),
+    para que o banco use os índices compostos que começam por dataHoraVenda.
+    """
+    data_inicio = django_filters.DateFilter(method='filtrar_data_inicio')
+    data_fim = django_filters.DateFilter(method='filtrar_data_fim')
+    cliente_nome = django_filters.CharFilter(field_name='cliente__nome', lookup_expr='icontains')
+    vendedor_username = django_filters.CharFilter(field_name='usuario__username', lookup_expr='iexact')
+    statusVenda = django_filters.ChoiceFilter(choices=Venda.STATUS_VENDA_CHOICES)
+    formaPagamento = django_filters.ChoiceFilter(choices=Venda.FORMA_PAGAMENTO_CHOICES)
+
+    class Meta:
+        model = Venda
+        fields = ['data_inicio', 'data_fim', 'cliente_nome', 'vendedor_username', 'statusVenda', 'formaPagamento']
+
+    def filtrar_data_inicio(self, queryset, name, value):
+        return queryset.filter(dataHoraVenda__gte=inicio_do_dia(value))
+
+    def filtrar_data_fim(self, queryset, name, value):
+        return queryset.filter(dataHoraVenda__lt=inicio_do_dia(value + timedelta(days=1)))
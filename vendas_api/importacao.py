@@ -0,0 +1,200 @@
+# vendas_api/importacao.py
+
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import DatabaseError, connection, transaction
+
+from .busca import indexar_produtos
+from .models import CategoriaProduto, Produto
+from .movimentos import registrar_movimentos
+from .versoes import incrementar_versao
+
+TAMANHO_LOTE_IMPORTACAO = 1000
+MAX_ERROS_RELATORIO = 1000 # O relatório lista no máximo isso; 'total_erros' traz a contagem completa
+
+# Colunas aceitas (cabeçalho do CSV ou chaves de cada linha JSON); 'categoria' é o nome da categoria
+COLUNAS_IMPORTACAO = (
+    'codigoBarras', 'nomeProduto', 'descricao', 'valorUnitario', 'quantidadeEstoque',
+    'plataforma', 'prazoGarantia', 'categoria',
+)
+COLUNAS_OBRIGATORIAS = ('codigoBarras', 'nomeProduto', 'valorUnitario', 'categoria')
+_TAMANHOS_MAXIMOS = {'codigoBarras': 100, 'nomeProduto': 255, 'plataforma': 100, 'prazoGarantia': 100}
+_VALOR_MAXIMO = Decimal('99999999.99') # DecimalField(max_digits=10, decimal_places=2)
+
+
+class FormatoImportacaoInvalido(Exception):
+    """O arquivo inteiro não pode ser lido (formato desconhecido, cabeçalho sem as colunas obrigatórias)."""
+
+
+def _linhas_de_texto(partes):
+    """Decodifica as linhas (bytes) do corpo da requisição, uma de cada vez, sem ler o corpo inteiro."""
+    for numero, parte in enumerate(partes, start=1):
+        try:
+            yield parte.decode('utf-8-sig' if numero == 1 else 'utf-8')
+        except UnicodeDecodeError:
+            raise FormatoImportacaoInvalido(f"Linha {numero}: o arquivo deve estar em UTF-8.")
+
+
+def ler_csv(partes):
+    """Gera (nº da linha, dict) a partir de um CSV com cabeçalho; aceita ',' ou ';' como separador."""
+    linhas = _linhas_de_texto(partes)
+    cabecalho = next(linhas, '')
+    separador = ';' if cabecalho.count(';') > cabecalho.count(',') else ','
+    colunas = [coluna.strip() for coluna in next(csv.reader([cabecalho], delimiter=separador), [])]
+    faltando = [coluna for coluna in COLUNAS_OBRIGATORIAS if coluna not in colunas]
+    if faltando:
+        raise FormatoImportacaoInvalido(f"Cabeçalho sem as colunas obrigatórias: {', '.join(faltando)}.")
+    leitor = csv.DictReader(linhas, fieldnames=colunas, delimiter=separador)
+    for registro in leitor:
+        yield leitor.line_num + 1, registro # +1: o cabeçalho foi lido fora do DictReader
+
+
+def ler_jsonl(partes):
+    """Gera (nº da linha, dict) a partir de JSON lines (um objeto por linha; linhas vazias são ignoradas)."""
+    for numero, texto in enumerate(_linhas_de_texto(partes), start=1):
+        if not texto.strip():
+            continue
+        try:
+            registro = json.loads(texto)
+        except ValueError as exc:
+            yield numero, {'__erro__': f"JSON inválido: {exc}"}
+            continue
+        yield numero, registro if isinstance(registro, dict) else {'__erro__': "Cada linha deve ser um objeto JSON."}
+
+
+def _texto(valor):
+    return '' if valor is None else str(valor).strip()
+
+
+def converter_linha(registro, categorias):
+    """
+    Valida e converte uma linha. Devolve (campos, erros): 'campos' só tem as colunas presentes na
+    linha (as ausentes não são alteradas no produto existente); 'erros' é um dict {coluna: mensagem}.
+    """
+    if '__erro__' in registro:
+        return None, {'linha': registro['__erro__']}
+    campos, erros = {}, {}
+    for coluna in COLUNAS_OBRIGATORIAS:
+        if not _texto(registro.get(coluna)):
+            erros[coluna] = "Campo obrigatório."
+    for coluna, tamanho in _TAMANHOS_MAXIMOS.items():
+        if coluna in registro and len(_texto(registro[coluna])) > tamanho:
+            erros[coluna] = f"Máximo de {tamanho} caracteres."
+    if erros:
+        return None, erros
+
+    for coluna in ('codigoBarras', 'nomeProduto', 'descricao', 'plataforma', 'prazoGarantia'):
+        if coluna in registro:
+            valor = _texto(registro[coluna])
+            campos[coluna] = valor if valor or coluna in ('codigoBarras', 'nomeProduto') else None
+
+    try:
+        valor = Decimal(_texto(registro['valorUnitario']).replace(',', '.'))
+        if not valor.is_finite() or valor < 0 or valor > _VALOR_MAXIMO:
+            raise InvalidOperation
+        campos['valorUnitario'] = valor.quantize(Decimal('0.01'))
+    except InvalidOperation:
+        erros['valorUnitario'] = "Informe um valor entre 0 e 99999999.99."
+
+    if 'quantidadeEstoque' in registro and _texto(registro['quantidadeEstoque']):
+        try:
+            quantidade = int(_texto(registro['quantidadeEstoque']))
+            if quantidade < 0:
+                raise ValueError
+            campos['quantidadeEstoque'] = quantidade
+        except ValueError:
+            erros['quantidadeEstoque'] = "Informe um número inteiro maior ou igual a zero."
+
+    categoria_id = categorias.get(_texto(registro['categoria']).casefold())
+    if categoria_id is None:
+        erros['categoria'] = f"Categoria '{_texto(registro['categoria'])}' não existe."
+    else:
+        campos['categoria_id'] = categoria_id
+    return (None if erros else campos), erros
+
+
+def _gravar_lote(lote):
+    """
+    Upsert de um lote {codigoBarras: campos} com um INSERT ... ON CONFLICT/ON DUPLICATE KEY UPDATE.
+    Se o lote traz quantidadeEstoque, as diferenças vão para o livro-razão (MovimentoEstoque).
+    Devolve quantos produtos eram novos.
+    """
+    produtos, colunas = [], {'atualizadoEm'}
+    for campos in lote.values():
+        produtos.append(Produto(**campos))
+        colunas.update(campos)
+    colunas.discard('codigoBarras')
+    opcoes = {}
+    if connection.features.supports_update_conflicts_with_target:
+        opcoes['unique_fields'] = ['codigoBarras'] # O MySQL resolve o conflito por qualquer chave única
+    with transaction.atomic():
+        # Estoque anterior lido com as linhas travadas: uma venda concorrente não deixa o delta errado
+        anteriores = dict(
+            Produto.objects.select_for_update().filter(codigoBarras__in=lote).order_by('pk')
+            .values_list('codigoBarras', 'quantidadeEstoque')
+        )
+        Produto.objects.bulk_create(produtos, update_conflicts=True, update_fields=sorted(colunas), **opcoes)
+        if 'quantidadeEstoque' in colunas:
+            registrar_movimentos('IMPORTACAO', [
+                (produto_id, lote[codigo]['quantidadeEstoque'] - anteriores.get(codigo, 0), None)
+                for codigo, produto_id in Produto.objects.filter(codigoBarras__in=lote).values_list('codigoBarras', 'pk')
+            ])
+        # bulk_create não dispara os sinais de busca.py. O índice é refeito a partir das linhas gravadas:
+        # as colunas ausentes do arquivo (ex: plataforma) continuam no documento de busca
+        indexar_produtos(Produto.objects.filter(codigoBarras__in=lote))
+    return len(lote) - len(anteriores)
+
+
+def importar_produtos(registros):
+    """
+    Importa os produtos de 'registros' (iterável de (nº da linha, dict), ver ler_csv/ler_jsonl),
+    gravando em lotes de TAMANHO_LOTE_IMPORTACAO à medida que são lidos: o arquivo nunca fica
+    inteiro em memória. Cada lote é uma transação; um erro de banco em um lote é relatado nas
+    linhas dele e a importação continua. Como é um upsert, reenviar o arquivo (corrigido) é seguro.
+
+    As categorias são resolvidas pelo nome (sem diferenciar maiúsculas) com um dict carregado uma
+    vez. Se o mesmo código de barras aparece mais de uma vez no arquivo, vale a última linha de cada lote.
+    """
+    categorias = {nome.casefold(): pk for pk, nome in CategoriaProduto.objects.values_list('pk', 'nomeCategoria')}
+    resultado = {'linhas': 0, 'criados': 0, 'atualizados': 0, 'total_erros': 0, 'erros': []}
+
+    def registrar_erro(numero, codigo, erros):
+        resultado['total_erros'] += 1
+        if len(resultado['erros']) < MAX_ERROS_RELATORIO:
+            resultado['erros'].append({'linha': numero, 'codigoBarras': codigo, 'erros': erros})
+
+    def gravar(lote, linhas_do_lote):
+        try:
+            criados = _gravar_lote(lote)
+        except DatabaseError as exc:
+            for codigo, numero in linhas_do_lote.items():
+                registrar_erro(numero, codigo, {'banco': str(exc)})
+            return
+        resultado['criados'] += criados
+        resultado['atualizados'] += len(lote) - criados
+
+    # Um lote por conjunto de colunas: o upsert atualiza as mesmas colunas em todas as linhas do lote,
+    # e uma linha JSON sem 'descricao' não pode apagar a descrição de um produto existente
+    lotes = {}
+    for numero, registro in registros:
+        resultado['linhas'] += 1
+        campos, erros = converter_linha(registro, categorias)
+        if erros:
+            registrar_erro(numero, _texto(registro.get('codigoBarras')) or None, erros)
+            continue
+        lote, linhas_do_lote = lotes.setdefault(tuple(sorted(campos)), ({}, {}))
+        lote[campos['codigoBarras']] = campos
+        linhas_do_lote[campos['codigoBarras']] = numero
+        if len(lote) >= TAMANHO_LOTE_IMPORTACAO:
+            gravar(lote, linhas_do_lote)
+            lote.clear()
+            linhas_do_lote.clear()
+    for lote, linhas_do_lote in lotes.values():
+        if lote:
+            gravar(lote, linhas_do_lote)
+
+    if resultado['criados'] or resultado['atualizados']:
+        incrementar_versao('produto') # bulk_create não dispara os sinais de versoes.py
+    return resultado
@@ -0,0 +1,77 @@
+# vendas_api/itens.py
+
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .estoque import repor_estoque
+from .movimentos import registrar_movimentos
+from .models import Venda, ItemVenda
+from .resumos import estado_resumo, registrar_venda_alterada, data_da_venda, totais_dos_itens, registrar_itens_vendidos
+
+
+class ItensNaoEncontrados(Exception):
+    """Algum dos itens informados não existe ou não pertence à venda."""
+
+    def __init__(self, item_ids):
+        self.item_ids = item_ids
+        super().__init__(f"Itens não encontrados nesta venda: {', '.join(str(pk) for pk in item_ids)}.")
+
+
+class VendaJaCancelada(Exception):
+    """Itens de venda cancelada não podem ser removidos: o estoque deles já foi estornado."""
+
+
+def total_da_venda():
+    """Subquery SUM(quantidade * precoUnitarioVenda) dos itens da venda (OuterRef('pk')), 0.00 se não houver itens."""
+    total = (
+        ItemVenda.objects.filter(venda=OuterRef('pk'))
+        .values('venda')
+        .annotate(total=Sum(F('quantidade') * F('precoUnitarioVenda'), output_field=models.DecimalField(max_digits=10, decimal_places=2)))
+        .values('total')
+    )
+    return Coalesce(Subquery(total), Value(Decimal('0.00')), output_field=models.DecimalField(max_digits=10, decimal_places=2))
+
+
+@transaction.atomic
+def remover_itens(venda_id, item_ids):
+    """
+    RF015/RF008: remove itens de uma venda e estorna o estoque, com um número fixo de comandos
+    independente de quantos itens são removidos ou quantos restam na venda:
+    - SELECT ... FOR UPDATE da venda e dos itens a remover (nessa ordem, a mesma do cancelamento);
+    - um UPDATE de estoque com F() + CASE por produto (repor_estoque), um INSERT dos movimentos
+      de estoque e um DELETE dos itens;
+    - um UPDATE que grava o novo valorTotalVenda calculado no banco (SUM dos itens restantes);
+    - os resumos (VendaResumoDiario e ProdutoVendaDiaria).
+
+    Retorna a venda atualizada. Lança ItensNaoEncontrados (nada é removido) ou VendaJaCancelada.
+    """
+    item_ids = set(item_ids)
+    venda = Venda.objects.select_for_update().get(pk=venda_id)
+    if venda.statusVenda == 'CANCELADA':
+        raise VendaJaCancelada()
+    estado_anterior = estado_resumo(venda)
+
+    itens = list(
+        ItemVenda.objects.select_for_update().filter(venda=venda, pk__in=item_ids)
+        .only('id', 'produto_id', 'quantidade', 'precoUnitarioVenda').order_by('pk')
+    )
+    faltando = item_ids - {item.pk for item in itens}
+    if faltando:
+        raise ItensNaoEncontrados(sorted(faltando))
+
+    quantidades = {}
+    for item in itens:
+        quantidades[item.produto_id] = quantidades.get(item.produto_id, 0) + item.quantidade
+    repor_estoque(quantidades)
+    registrar_movimentos('REMOCAO_ITEM', [(produto_id, qtd, venda.pk) for produto_id, qtd in quantidades.items()])
+    ItemVenda.objects.filter(pk__in=item_ids).delete() # Sem sinais nem dependentes: um único DELETE
+
+    Venda.objects.filter(pk=venda.pk).update(valorTotalVenda=total_da_venda())
+    venda.refresh_from_db(fields=['valorTotalVenda'])
+
+    registrar_venda_alterada(estado_anterior, venda) # Ajusta a receita no resumo de vendas
+    registrar_itens_vendidos(data_da_venda(venda), totais_dos_itens(itens), sinal=-1)
+    return venda
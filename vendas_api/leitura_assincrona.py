@@ -0,0 +1,115 @@
+# vendas_api/leitura_assincrona.py
+"""
+Variantes async (ASGI) das leituras mais frequentes dos terminais, em /api/async/...:
+listagem/busca de produtos, produto por código de barras e detalhe da venda.
+
+O DRF não tem views async; estas são views async do Django que reaproveitam o ViewSet de cada
+endpoint (autenticação pelo token, permissões, filtros, ordenação, paginação por cursor e
+serializers), de modo que a resposta é a mesma da versão síncrona. Só o acesso ao banco muda:
+é feito pelo ORM assíncrono (aget, async for), e nenhum passo do ViewSet usado aqui consulta o
+banco. Sob ASGI, um terminal esperando a resposta não ocupa uma thread do servidor.
+"""
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.shortcuts import aget_object_or_404
+from django.views.decorators.http import require_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Produto
+from .renderers import ORJSONRenderer
+from .versoes import aversoes_atuais, etag_confere
+from .views import ProdutoViewSet, VendaViewSet
+
+
+def _resposta_final(view, request, response):
+    """Renderiza a Response do DRF e a converte em HttpResponse (o handler ASGI renderizaria em outra thread)."""
+    response = view.finalize_response(request, response)
+    response.render()
+    final = HttpResponse(response.content, status=response.status_code)
+    for cabecalho, valor in response.items():
+        final[cabecalho] = valor
+    return final
+
+
+def leitura_async(viewset, action):
+    """
+    Transforma 'funcao(view, request, **kwargs)' (corrotina que devolve uma Response do DRF) em uma
+    view async do Django que executa a 'action' do 'viewset': a view do DRF é montada, autenticada e
+    autorizada como no dispatch síncrono, e as exceções viram as mesmas respostas de erro.
+    """
+    def decorador(funcao):
+        @require_safe
+        @wraps(funcao)
+        async def view_async(request, **kwargs):
+            view = viewset(action_map={'get': action, 'head': action}, args=(), kwargs=kwargs, format_kwarg=None)
+            view.renderer_classes = [ORJSONRenderer] # O BrowsableAPIRenderer consulta o banco ao montar os formulários
+            view.headers = view.default_response_headers
+            drf_request = view.request = view.initialize_request(request, **kwargs)
+            try:
+                view.initial(drf_request, **kwargs) # Token (sem banco, ver authentication.py), permissões, negociação
+                response = await funcao(view, drf_request, **kwargs)
+            except Exception as exc:
+                response = view.handle_exception(exc)
+            return _resposta_final(view, drf_request, response)
+        return view_async
+    return decorador
+
+
+# Sincronização incremental (?changed_since=): pouco frequente, continua na view síncrona
+_listar_produtos_sync = ProdutoViewSet.as_view({'get': 'list'})
+
+
+def _delegar_para_sync(view_sync, request):
+    response = view_sync(request)
+    response.render()
+    return response
+
+
+@require_safe
+async def listar_produtos(request):
+    """GET /api/async/produtos/: mesma resposta (filtros, ?search=, cursor, ETag/304) que /api/produtos/."""
+    if 'changed_since' in request.GET:
+        return await sync_to_async(_delegar_para_sync)(_listar_produtos_sync, request)
+    return await _listar_produtos(request)
+
+
+@leitura_async(ProdutoViewSet, 'list')
+async def _listar_produtos(view, request):
+    etag = None
+    if view.usar_etag(request):
+        # Versões lidas antes das linhas, como no ETagPorVersaoMixin
+        etag = view.etag_das_versoes(request, await aversoes_atuais(view.tabelas_etag))
+        if etag_confere(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+    produtos = view.filter_queryset(view.get_queryset())
+    pagina = await view.paginator.apaginate_queryset(produtos, request, view=view)
+    if pagina is None:
+        response = Response(view.get_serializer([produto async for produto in produtos], many=True).data)
+    else:
+        response = view.get_paginated_response(view.get_serializer(pagina, many=True).data)
+    if etag:
+        response['ETag'] = etag
+    return response
+
+
+@leitura_async(ProdutoViewSet, 'barcode')
+async def produto_por_codigo(view, request, codigo):
+    """GET /api/async/produtos/barcode/<codigo>/ (leitor do PDV)."""
+    try:
+        produto = await view.get_queryset().order_by().aget(codigoBarras=codigo)
+    except Produto.DoesNotExist:
+        return Response({'detail': f"Nenhum produto com o código de barras '{codigo}'."}, status=status.HTTP_404_NOT_FOUND)
+    return Response(view.get_serializer(produto).data)
+
+
+@leitura_async(VendaViewSet, 'retrieve')
+async def detalhe_venda(view, request, pk):
+    """GET /api/async/vendas/<id>/ (ReceiptDialog): venda, itens, produtos e categorias em duas consultas."""
+    venda = await aget_object_or_404(view.filter_queryset(view.get_queryset()), pk=pk)
+    view.check_object_permissions(request, venda)
+    return Response(view.get_serializer(venda).data)
+
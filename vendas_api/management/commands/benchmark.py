@@ -0,0 +1,772 @@
+# vendas_api/management/commands/benchmark.py
+
+import asyncio
+import gzip
+import json
+import random
+import socket
+import statistics
+import threading
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import Group
+from django.core.asgi import get_asgi_application
+from django.core.cache import caches
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.db.models import Count, Prefetch, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+
+from vendas_api.models import (
+    Usuario, CategoriaProduto, Produto, Cliente, Venda, ItemVenda, VendaResumoDiario, ProdutoVendaDiaria, MovimentoEstoque,
+)
+from vendas_api.authentication import adicionar_papeis_ao_token
+from vendas_api.busca import buscar_produtos, indexar_produtos, normalizar
+from vendas_api.cancelamento import cancelar_vendas
+from vendas_api.filters import inicio_do_dia
+from vendas_api.movimentos import anotar_estoque_em, fechar_dia
+from vendas_api.compressao import CompressaoMiddleware, codificadores_disponiveis, zstandard, brotli
+from vendas_api.renderers import ORJSONRenderer
+from vendas_api.resumos import reconstruir_resumos
+from vendas_api.serializers import ProdutoSerializer, VendaSerializer, VendaListaSerializer
+from vendas_api.views import ProdutoViewSet, ClienteViewSet, CategoriaProdutoViewSet, VendaViewSet
+
+
+# --- Funções auxiliares para montar os dados dos cenários ---
+
+def criar_usuario_benchmark():
+    return Usuario.objects.create_user(username='benchmark_user', password='benchmark')
+
+def criar_produtos_benchmark(quantidade, estoque=1_000_000, prefixo='BENCH'):
+    categoria, _ = CategoriaProduto.objects.get_or_create(nomeCategoria='Benchmark')
+    return Produto.objects.bulk_create([
+        Produto(
+            codigoBarras=f"{prefixo}{i:08d}",
+            nomeProduto=f"Produto Benchmark {i}",
+            valorUnitario=Decimal('19.90'),
+            quantidadeEstoque=estoque,
+            categoria=categoria,
+        )
+        for i in range(quantidade)
+    ])
+
+def criar_vendas_benchmark(usuario, produtos, quantidade, itens_por_venda=3):
+    """Cria 'quantidade' vendas concluídas (com itens) em lote, sem passar pelo serializer."""
+    cliente = Cliente.objects.create(nome='Cliente Benchmark')
+    vendas = Venda.objects.bulk_create([
+        Venda(usuario=usuario, cliente=cliente, formaPagamento='PIX', statusPagamento='PAGO',
+              statusVenda='CONCLUIDA', valorTotalVenda=Decimal('19.90') * itens_por_venda)
+        for _ in range(quantidade)
+    ], batch_size=1000)
+    if vendas[0].pk is None: # Bancos sem RETURNING (MySQL) não preenchem a PK no bulk_create
+        vendas = list(Venda.objects.filter(cliente=cliente).order_by('id'))
+    ItemVenda.objects.bulk_create([
+        ItemVenda(venda=venda, produto=produtos[(i + j) % len(produtos)], quantidade=1, precoUnitarioVenda=Decimal('19.90'))
+        for i, venda in enumerate(vendas)
+        for j in range(itens_por_venda)
+    ], batch_size=1000)
+    return vendas
+
+def medir(funcao, repeticoes, preparar=None):
+    """
+    Executa 'funcao' várias vezes e retorna (tempos em ms, nº de queries da última execução).
+    Se 'preparar' for informado, seu retorno é passado para 'funcao' e seu tempo não é medido.
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        argumentos = (preparar(),) if preparar else ()
+        reset_queries() # O log de queries tem limite (9000); sem isso a contagem zera nos cenários grandes
+        with CaptureQueriesContext(connection) as queries:
+            inicio = time.perf_counter()
+            funcao(*argumentos)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos, len(queries)
+
+def resumo_tempos(tempos):
+    tempos = sorted(tempos)
+    p95 = tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))]
+    return f"mediana={statistics.median(tempos):8.2f} ms  p95={p95:8.2f} ms"
+
+
+# --- Cenários ---
+
+def cenario_criar_venda(command, repeticoes):
+    """Latência de VendaSerializer.save() (trecho transacional do perform_create) para 1, 20 e 100 itens."""
+    usuario = criar_usuario_benchmark()
+    produtos = criar_produtos_benchmark(100)
+
+    for linhas in (1, 20, 100):
+        dados = {
+            'formaPagamento': 'DINHEIRO',
+            'statusVenda': 'CONCLUIDA',
+            'itens': [
+                {'produto_id': p.id, 'quantidade': 1, 'precoUnitarioVenda': str(p.valorUnitario)}
+                for p in produtos[:linhas]
+            ],
+        }
+
+        def validar():
+            serializer = VendaSerializer(data=dados)
+            serializer.is_valid(raise_exception=True)
+            return serializer
+
+        def criar(serializer):
+            with transaction.atomic():
+                serializer.save(usuario=usuario)
+
+        tempos, num_queries = medir(criar, repeticoes, preparar=validar)
+        command.stdout.write(f"criar_venda  itens={linhas:4d}  {resumo_tempos(tempos)}  queries={num_queries}")
+
+
+def cenario_listar_vendas(command, repeticoes):
+    """Serialização + renderização JSON de 10 mil vendas: VendaSerializer completo x VendaListaSerializer."""
+    usuario = criar_usuario_benchmark()
+    criar_vendas_benchmark(usuario, criar_produtos_benchmark(50), 10_000)
+    renderer = JSONRenderer()
+
+    def completo():
+        queryset = Venda.objects.select_related('cliente', 'usuario').prefetch_related(
+            Prefetch('itens', queryset=ItemVenda.objects.select_related('produto__categoria'))
+        )
+        return renderer.render(VendaSerializer(queryset, many=True).data)
+
+    def resumido():
+        queryset = Venda.objects.values(*VendaListaSerializer.CAMPOS_VALUES)
+        return renderer.render(VendaListaSerializer(queryset, many=True).data)
+
+    for nome, funcao in (('completo (VendaSerializer)', completo), ('resumido (VendaListaSerializer)', resumido)):
+        tamanho = len(funcao())
+        tempos, num_queries = medir(funcao, max(1, repeticoes // 5))
+        command.stdout.write(
+            f"listar_vendas  {nome:32s} {resumo_tempos(tempos)}  tamanho={tamanho / 1024:9.1f} KiB  queries={num_queries}"
+        )
+
+
+def cenario_resumo_vendas(command, repeticoes):
+    """Resumo do mês por dia e vendedor: agregação sobre Venda x leitura do VendaResumoDiario."""
+    usuario = criar_usuario_benchmark()
+    vendas = criar_vendas_benchmark(usuario, criar_produtos_benchmark(50), 20_000)
+    inicio = timezone.now() - timedelta(days=90)
+    for i in range(0, len(vendas), 1000): # Espalha as vendas pelos últimos 90 dias
+        Venda.objects.filter(pk__in=[v.pk for v in vendas[i:i + 1000]]).update(
+            dataHoraVenda=inicio + timedelta(hours=i // 200)
+        )
+    reconstruir_resumos()
+    mes = timezone.localdate() - timedelta(days=30)
+
+    def sobre_vendas():
+        return list(
+            Venda.objects.filter(dataHoraVenda__date__gte=mes)
+            .annotate(dia=TruncDate('dataHoraVenda')).values('dia', 'usuario__username')
+            .annotate(receita=Sum('valorTotalVenda'), quantidade=Count('id')).order_by('dia')
+        )
+
+    def sobre_resumo():
+        return list(
+            VendaResumoDiario.objects.filter(data__gte=mes).values('data', 'usuario__username')
+            .annotate(receita=Sum('valorTotal'), quantidade=Sum('quantidadeVendas')).order_by('data')
+        )
+
+    for nome, funcao in (('agregando Venda', sobre_vendas), ('lendo VendaResumoDiario', sobre_resumo)):
+        tempos, num_queries = medir(funcao, repeticoes)
+        command.stdout.write(f"resumo_vendas  {nome:24s} {resumo_tempos(tempos)}  queries={num_queries}")
+
+
+def cenario_mais_vendidos(command, repeticoes):
+    """Top 10 produtos dos últimos 30 dias: SUM sobre ItemVenda x leitura do ProdutoVendaDiaria."""
+    usuario = criar_usuario_benchmark()
+    vendas = criar_vendas_benchmark(usuario, criar_produtos_benchmark(500), 20_000)
+    inicio = timezone.now() - timedelta(days=90)
+    for i in range(0, len(vendas), 1000):
+        Venda.objects.filter(pk__in=[v.pk for v in vendas[i:i + 1000]]).update(
+            dataHoraVenda=inicio + timedelta(hours=i // 200)
+        )
+    reconstruir_resumos()
+    mes = timezone.localdate() - timedelta(days=30)
+
+    def sobre_itens():
+        return list(
+            ItemVenda.objects.filter(venda__dataHoraVenda__date__gte=mes).exclude(venda__statusVenda='CANCELADA')
+            .values('produto_id', 'produto__nomeProduto').annotate(total=Sum('quantidade')).order_by('-total')[:10]
+        )
+
+    def sobre_rollup():
+        return list(
+            ProdutoVendaDiaria.objects.filter(data__gte=mes)
+            .values('produto_id', 'produto__nomeProduto').annotate(total=Sum('quantidadeVendida')).order_by('-total')[:10]
+        )
+
+    for nome, funcao in (('somando ItemVenda', sobre_itens), ('lendo ProdutoVendaDiaria', sobre_rollup)):
+        tempos, num_queries = medir(funcao, repeticoes)
+        command.stdout.write(f"mais_vendidos  {nome:24s} {resumo_tempos(tempos)}  queries={num_queries}")
+
+
+def cenario_cancelar_vendas(command, repeticoes):
+    """Cancelamento de 10 e 100 vendas (3 itens cada): uma a uma pelo VendaSerializer x cancelar_vendas em lote."""
+    usuario = criar_usuario_benchmark()
+    produtos = criar_produtos_benchmark(50)
+
+    def uma_a_uma(vendas):
+        for venda in vendas: # Como N requisições PUT, cada uma na sua transação
+            serializer = VendaSerializer(venda, data={'statusVenda': 'CANCELADA'}, partial=True)
+            serializer.is_valid(raise_exception=True)
+            with transaction.atomic():
+                serializer.save()
+
+    def em_lote(vendas):
+        cancelar_vendas([venda.pk for venda in vendas])
+
+    for quantidade in (10, 100):
+        def preparar():
+            return list(Venda.objects.filter(
+                pk__in=[v.pk for v in criar_vendas_benchmark(usuario, produtos, quantidade)]
+            ).prefetch_related('itens__produto'))
+
+        for nome, funcao in (('uma a uma', uma_a_uma), ('em lote', em_lote)):
+            with redirect_stdout(StringIO()): # Silencia o LOG do "sistema financeiro"
+                tempos, num_queries = medir(funcao, repeticoes, preparar=preparar)
+            command.stdout.write(f"cancelar_vendas  vendas={quantidade:4d}  {nome:10s} {resumo_tempos(tempos)}  queries={num_queries}")
+
+
+def cenario_buscar_produto(command, repeticoes):
+    """Leitura de um código no PDV com 200 mil produtos: ?search= (icontains) x /produtos/barcode/<codigo>/."""
+    usuario = criar_usuario_benchmark()
+    produtos = criar_produtos_benchmark(200_000, prefixo='789')
+    codigo = produtos[150_000].codigoBarras
+    fabrica = APIRequestFactory(SERVER_NAME='localhost')
+    listar = ProdutoViewSet.as_view({'get': 'list'})
+    por_codigo = ProdutoViewSet.as_view({'get': 'barcode'})
+
+    def requisitar(view, caminho, **kwargs):
+        request = fabrica.get(caminho)
+        force_authenticate(request, user=usuario)
+        response = view(request, **kwargs)
+        response.render()
+        return response
+
+    def busca_texto():
+        return requisitar(listar, f'/api/produtos/?search={codigo}')
+
+    def busca_codigo():
+        return requisitar(por_codigo, f'/api/produtos/barcode/{codigo}/', codigo=codigo)
+
+    for nome, funcao in (('?search=', busca_texto), ('barcode/<codigo>/', busca_codigo)):
+        tempos, num_queries = medir(funcao, repeticoes)
+        command.stdout.write(f"buscar_produto  {nome:18s} {resumo_tempos(tempos)}  queries={num_queries}")
+
+
+def cenario_busca_texto(command, repeticoes):
+    """Primeira página de ?search= com 100 mil produtos: SearchFilter (icontains) x busca.buscar_produtos."""
+    palavras = ['Controle', 'Acessório', 'Jogo', 'Ação', 'Aventura', 'Corrida', 'Headset', 'Teclado', 'Mouse',
+                'Capa', 'Edição', 'Coleção', 'Gamer', 'Sem Fio', 'Pro', 'Ultra', 'Portátil', 'Clássico']
+    plataformas = ['PlayStation 5', 'Xbox Series', 'Nintendo Switch', 'PC']
+    aleatorio = random.Random(42)
+    categoria, _ = CategoriaProduto.objects.get_or_create(nomeCategoria='Benchmark')
+    produtos = Produto.objects.bulk_create([
+        Produto(
+            codigoBarras=f"BUSCA{i:08d}", nomeProduto=' '.join(aleatorio.sample(palavras, 3)) + f' {i}',
+            plataforma=aleatorio.choice(plataformas), descricao=' '.join(aleatorio.sample(palavras, 6)),
+            valorUnitario=Decimal('19.90'), quantidadeEstoque=10, categoria=categoria,
+        )
+        for i in range(100_000)
+    ], batch_size=1000)
+    if produtos[0].pk is None:
+        produtos = list(Produto.objects.filter(codigoBarras__startswith='BUSCA'))
+    indexar_produtos(produtos)
+
+    base = Produto.objects.select_related('categoria')
+    for termo in ('54321', 'controle', 'acessorio sem fio'): # Seletivo, comum e com acento + vários termos
+        def icontains():
+            filtro = Q()
+            for parte in termo.split():
+                filtro &= (Q(nomeProduto__icontains=parte) | Q(codigoBarras__icontains=parte)
+                           | Q(descricao__icontains=parte) | Q(plataforma__icontains=parte))
+            return list(base.filter(filtro).order_by('nomeProduto', 'id')[:100])
+
+        def indice():
+            return list(buscar_produtos(base, termo).order_by('-relevancia', 'id')[:100])
+
+        for nome, funcao in (('icontains', icontains), ('índice de busca', indice)):
+            tempos, _ = medir(funcao, repeticoes)
+            command.stdout.write(f"busca_texto  '{termo}' {nome:16s} {resumo_tempos(tempos)}  resultados={len(funcao())}")
+
+
+def cenario_buscar_cliente(command, repeticoes):
+    """Busca do SelectClientDialog (1ª página, 50 clientes) com 1 milhão de clientes: icontains x colunas indexadas."""
+    usuario = criar_usuario_benchmark()
+    nomes = ['Ana', 'Bruno', 'Carla', 'Diego', 'Érica', 'Fábio', 'Gabriela', 'Hugo', 'Íris', 'João']
+    sobrenomes = ['Silva', 'Souza', 'Oliveira', 'Santos', 'Lima', 'Pereira', 'Conceição', 'Araújo']
+    for inicio in range(0, 1_000_000, 50_000):
+        clientes = []
+        for i in range(inicio, inicio + 50_000):
+            cpf = f"{i:011d}"
+            cliente = Cliente(
+                nome=f"{nomes[i % 10]} {sobrenomes[(i // 10) % 8]} {i}",
+                cpf=f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}", telefone=f"(11) 9{i:08d}",
+                email=f"cliente{i}@exemplo.com", cidade='São Paulo',
+            )
+            # bulk_create não dispara o pre_save que preenche as colunas de busca
+            cliente.cpfDigitos, cliente.telefoneDigitos, cliente.nomeNormalizado = cpf, f"119{i:08d}", normalizar(cliente.nome)
+            clientes.append(cliente)
+        Cliente.objects.bulk_create(clientes, batch_size=5000)
+
+    fabrica = APIRequestFactory(SERVER_NAME='localhost')
+    listar = ClienteViewSet.as_view({'get': 'list'})
+
+    def icontains(termo):
+        filtro = Q(nome__icontains=termo) | Q(cpf__icontains=termo) | Q(email__icontains=termo) | Q(cidade__icontains=termo)
+        return list(Cliente.objects.filter(filtro).order_by('nome', 'id')[:51])
+
+    def api(termo):
+        request = fabrica.get('/api/clientes/', {'search': termo, 'page_size': 50})
+        force_authenticate(request, user=usuario)
+        return listar(request).render()
+
+    for termo in ('123.456.789', '12345678900', '(11) 900012', 'joao silva 12', 'conceicao'):
+        for nome, funcao in (('icontains', icontains), ('API indexada', api)):
+            tempos, num_queries = medir(lambda: funcao(termo), repeticoes)
+            command.stdout.write(f"buscar_cliente  {termo!r:16s} {nome:13s} {resumo_tempos(tempos)}  queries={num_queries}")
+
+
+def cenario_listar_categorias(command, repeticoes):
+    """Abertura do AddEditProductDialog (500 categorias): sem cache x cache 'referencia' x If-None-Match (304)."""
+    usuario = criar_usuario_benchmark()
+    CategoriaProduto.objects.bulk_create([CategoriaProduto(nomeCategoria=f"Categoria {i:04d}") for i in range(500)])
+    fabrica = APIRequestFactory(SERVER_NAME='localhost')
+    listar = CategoriaProdutoViewSet.as_view({'get': 'list'})
+
+    def api(**headers):
+        request = fabrica.get('/api/categorias/', {'page_size': 1000}, **headers)
+        force_authenticate(request, user=usuario)
+        return listar(request).render()
+
+    etag = api()['ETag']
+    medicoes = (
+        ('sem cache', {}, lambda: caches['referencia'].clear()),
+        ('cache (acerto)', {}, None),
+        ('If-None-Match', {'HTTP_IF_NONE_MATCH': etag}, None),
+    )
+    for nome, headers, preparar in medicoes:
+        tempos, num_queries = medir(lambda *_: api(**headers), repeticoes, preparar=preparar)
+        command.stdout.write(
+            f"listar_categorias  {nome:15s} {resumo_tempos(tempos)}  queries={num_queries}  bytes={len(api(**headers).content)}"
+        )
+
+def cenario_renderizar_json(command, repeticoes):
+    """Só a renderização (dados já serializados) de 10 mil produtos e 10 mil vendas: JSONRenderer x ORJSONRenderer."""
+    usuario = criar_usuario_benchmark()
+    produtos = criar_produtos_benchmark(10_000)
+    criar_vendas_benchmark(usuario, produtos[:50], 10_000)
+    cargas = {
+        '10k produtos': ProdutoSerializer(Produto.objects.select_related('categoria').order_by('id'), many=True).data,
+        '10k vendas': VendaSerializer(
+            Venda.objects.select_related('cliente', 'usuario').prefetch_related(
+                Prefetch('itens', queryset=ItemVenda.objects.select_related('produto__categoria'))
+            ), many=True,
+        ).data,
+    }
+    for carga, dados in cargas.items():
+        for renderer in (JSONRenderer(), ORJSONRenderer()):
+            tamanho = len(renderer.render(dados))
+            tempos, _ = medir(lambda: renderer.render(dados), repeticoes)
+            command.stdout.write(
+                f"renderizar_json  {carga:12s} {type(renderer).__name__:15s} {resumo_tempos(tempos)}  tamanho={tamanho / 1024:9.1f} KiB"
+            )
+
+
+def cenario_importar_produtos(command, repeticoes):
+    """POST /api/produtos/importar/ (CSV) com 10 mil e 100 mil linhas: inserção e, em seguida, o mesmo arquivo de novo (atualização)."""
+    usuario = criar_usuario_benchmark()
+    usuario.groups.add(Group.objects.get_or_create(name='ESTOQUISTA')[0])
+    CategoriaProduto.objects.bulk_create([CategoriaProduto(nomeCategoria=f"Categoria {i}") for i in range(20)])
+    fabrica = APIRequestFactory(SERVER_NAME='localhost')
+    importar = ProdutoViewSet.as_view({'post': 'importar'})
+
+    for quantidade, prefixo in ((10_000, 'IMP10K'), (100_000, 'IMP100K')):
+        linhas = ['codigoBarras,nomeProduto,valorUnitario,quantidadeEstoque,categoria,plataforma,descricao']
+        linhas += [
+            f"{prefixo}{i:08d},Produto Importado {i},{19 + i % 100}.90,{i % 50},Categoria {i % 20},PC,Descrição do item {i}"
+            for i in range(quantidade)
+        ]
+        corpo = ('\n'.join(linhas) + '\n').encode()
+        for rodada in ('inserção', 'atualização'):
+            request = fabrica.generic('POST', '/api/produtos/importar/', corpo, content_type='text/csv')
+            force_authenticate(request, user=usuario)
+            inicio = time.perf_counter()
+            response = importar(request)
+            segundos = time.perf_counter() - inicio
+            command.stdout.write(
+                f"importar_produtos  {quantidade:>7d} linhas  {rodada:11s} {segundos:7.2f} s  {quantidade / segundos:9.0f} linhas/s"
+                f"  criados={response.data['criados']} atualizados={response.data['atualizados']} erros={response.data['total_erros']}"
+            )
+
+
+def cenario_exportar_vendas(command, repeticoes):
+    """GET /api/vendas/exportar/ de 10 mil e 50 mil vendas (3 itens cada): itens/s e pico de memória Python consumindo o stream."""
+    usuario = criar_usuario_benchmark()
+    usuario.groups.add(Group.objects.get_or_create(name='SUPERVISOR')[0])
+    produtos = criar_produtos_benchmark(200)
+    fabrica = APIRequestFactory(SERVER_NAME='localhost')
+    exportar = VendaViewSet.as_view({'get': 'exportar'})
+
+    total = 0
+    for quantidade in (10_000, 40_000): # Acumula: 10 mil e depois 50 mil vendas
+        criar_vendas_benchmark(usuario, produtos, quantidade)
+        total += quantidade
+        request = fabrica.get('/api/vendas/exportar/')
+        force_authenticate(request, user=usuario)
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        response = exportar(request)
+        linhas = tamanho = 0
+        for bloco in response.streaming_content:
+            linhas += bloco.count(b'\n')
+            tamanho += len(bloco)
+        segundos = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        command.stdout.write(
+            f"exportar_vendas  {total:>6d} vendas  {linhas - 1:>7d} itens  {segundos:6.2f} s  {(linhas - 1) / segundos:8.0f} itens/s"
+            f"  csv={tamanho / 2**20:6.1f} MiB  pico de memória={pico / 2**20:5.1f} MiB"
+        )
+
+
+def cenario_ajuste_estoque(command, repeticoes):
+    """Contagem física de 10 mil produtos (metade com diferença): PUT por produto (amostra) x POST /api/produtos/ajuste-estoque/."""
+    usuario = criar_usuario_benchmark()
+    usuario.groups.add(Group.objects.get_or_create(name='ESTOQUISTA')[0])
+    produtos = criar_produtos_benchmark(10_000, estoque=50)
+    fabrica = APIRequestFactory(SERVER_NAME='localhost')
+
+    # Como era: abrir cada produto no AddEditProductDialog e salvar (PUT do produto inteiro)
+    atualizar = ProdutoViewSet.as_view({'put': 'update'})
+    amostra = produtos[:200]
+    dados = ProdutoSerializer(amostra, many=True).data
+    inicio = time.perf_counter()
+    for produto, campos in zip(amostra, dados):
+        campos = dict(campos, categoria_id=produto.categoria_id, quantidadeEstoque=49)
+        request = fabrica.put(f'/api/produtos/{produto.pk}/', campos, format='json')
+        force_authenticate(request, user=usuario)
+        atualizar(request, pk=produto.pk)
+    por_produto = (time.perf_counter() - inicio) / len(amostra)
+    command.stdout.write(f"ajuste_estoque  PUT por produto   {por_produto * 1000:7.2f} ms/produto  ~{por_produto * len(produtos):6.1f} s para {len(produtos)} produtos (só a API)")
+
+    ajustar = ProdutoViewSet.as_view({'post': 'ajuste_estoque'})
+    for rodada in range(2):
+        itens = [
+            {'codigoBarras': produto.codigoBarras, 'quantidade': 50 + rodada + (i % 2)}
+            for i, produto in enumerate(produtos)
+        ]
+        request = fabrica.post('/api/produtos/ajuste-estoque/', {'itens': itens}, format='json')
+        force_authenticate(request, user=usuario)
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            response = ajustar(request)
+            segundos = time.perf_counter() - inicio
+        command.stdout.write(
+            f"ajuste_estoque  POST em lote      {segundos:7.2f} s para {len(itens)} produtos  ajustados={response.data['ajustados']}"
+            f"  queries={len(consultas.captured_queries)}"
+        )
+
+
+def cenario_estoque_em(command, repeticoes):
+    """Estoque em uma data com um ano de livro-razão (500 produtos, 4 movimentos por produto por dia): somar o histórico x foto diária + movimentos seguintes."""
+    produtos = criar_produtos_benchmark(500, estoque=0)
+    hoje = timezone.localdate()
+    primeiro_dia = hoje - timedelta(days=365)
+    for dias in range(365):
+        inicio = inicio_do_dia(primeiro_dia + timedelta(days=dias))
+        MovimentoEstoque.objects.bulk_create([
+            MovimentoEstoque(produto=produto, tipo='VENDA' if n else 'AJUSTE', quantidade=-1 if n else 3,
+                             registradoEm=inicio + timedelta(hours=9 + 2 * n, minutes=i % 60))
+            for i, produto in enumerate(produtos)
+            for n in range(4)
+        ], batch_size=2000)
+    command.stdout.write(f"estoque_em  livro-razão com {MovimentoEstoque.objects.count()} movimentos")
+
+    inicio = time.perf_counter()
+    for dias in range(365):
+        fechar_dia(primeiro_dia + timedelta(days=dias))
+    segundos = time.perf_counter() - inicio
+    command.stdout.write(f"estoque_em  fechamento de 365 dias  {segundos:7.2f} s  (um dia: ~{segundos / 365 * 1000:.0f} ms)")
+
+    momento = inicio_do_dia(hoje) - timedelta(hours=6) # Ontem às 18h: foto de anteontem + os movimentos de ontem
+    um_produto = Produto.objects.filter(pk=produtos[0].pk)
+
+    def somando_historico(produtos_consulta):
+        return list(
+            MovimentoEstoque.objects.filter(produto__in=produtos_consulta, registradoEm__lt=momento)
+            .values('produto').annotate(total=Sum('quantidade')).values_list('produto', 'total')
+        )
+
+    def com_foto(produtos_consulta):
+        return list(anotar_estoque_em(produtos_consulta, momento).values_list('pk', 'estoque_em'))
+
+    assert dict(somando_historico(Produto.objects.all())) == dict(com_foto(Produto.objects.all()))
+    for rotulo, consulta in (('1 produto', um_produto), ('500 produtos', Produto.objects.all())):
+        for nome, funcao in (('somando o histórico', somando_historico), ('foto diária', com_foto)):
+            tempos, queries = medir(lambda *_: funcao(consulta), repeticoes)
+            command.stdout.write(f"estoque_em  {rotulo:13s} {nome:20s} {resumo_tempos(tempos)}  queries={queries}")
+
+
+# Link da loja simulado no cenário compressao_wan
+BANDA_WAN_MBPS = 10
+RTT_WAN_S = 0.040
+
+def transferir_em_link_lento(dados, banda_mbps=BANDA_WAN_MBPS, rtt=RTT_WAN_S):
+    """
+    Envia 'dados' por um socket local limitado a 'banda_mbps' (o remetente dorme entre blocos de 16 KiB)
+    depois de meio RTT de latência em cada sentido, e devolve o que chegou do outro lado.
+    """
+    envio, recebimento = socket.socketpair()
+    bloco, bytes_por_segundo = 16 * 1024, banda_mbps * 1_000_000 / 8
+
+    def enviar():
+        time.sleep(rtt) # Ida da requisição + primeira volta da resposta
+        inicio = time.perf_counter()
+        for posicao in range(0, len(dados), bloco):
+            envio.sendall(dados[posicao:posicao + bloco])
+            atraso = (posicao + bloco) / bytes_por_segundo - (time.perf_counter() - inicio)
+            if atraso > 0:
+                time.sleep(atraso)
+        envio.close()
+
+    remetente = threading.Thread(target=enviar)
+    remetente.start()
+    recebidos = []
+    while parte := recebimento.recv(65536):
+        recebidos.append(parte)
+    remetente.join()
+    recebimento.close()
+    return b''.join(recebidos)
+
+
+def cenario_compressao_wan(command, repeticoes):
+    """
+    1000 produtos e 1000 vendas por página: bytes no fio e tempo de ponta a ponta (servidor + link de
+    10 Mbit/s e 40 ms de RTT + descompressão e json no terminal), sem compressão x cada codificação.
+    """
+    usuario = criar_usuario_benchmark()
+    produtos = criar_produtos_benchmark(1000)
+    criar_vendas_benchmark(usuario, produtos[:50], 1000)
+    fabrica = APIRequestFactory(SERVER_NAME='localhost')
+    descomprimir = {'identity': lambda dados: dados, 'gzip': gzip.decompress}
+    if zstandard is not None:
+        descomprimir['zstd'] = lambda dados: zstandard.ZstdDecompressor().decompressobj().decompress(dados)
+    if brotli is not None:
+        descomprimir['br'] = brotli.decompress
+
+    for nome, viewset in (('produtos', ProdutoViewSet), ('vendas', VendaViewSet)):
+        listar = viewset.as_view({'get': 'list'})
+        view = CompressaoMiddleware(lambda request: listar(request).render()) # O handler do Django renderiza antes dos middlewares
+        for codificacao in ['identity'] + [c.nome for c in codificadores_disponiveis()]:
+            totais, servidor, no_fio = [], [], 0
+            for _ in range(repeticoes):
+                request = fabrica.get(f'/api/{nome}/', {'page_size': 1000}, HTTP_ACCEPT_ENCODING=codificacao)
+                force_authenticate(request, user=usuario)
+                inicio = time.perf_counter()
+                response = view(request)
+                servidor.append((time.perf_counter() - inicio) * 1000)
+                recebido = transferir_em_link_lento(response.content)
+                json.loads(descomprimir[response.get('Content-Encoding', 'identity')](recebido))
+                totais.append((time.perf_counter() - inicio) * 1000)
+                no_fio = len(recebido)
+            command.stdout.write(
+                f"compressao_wan  {nome:8s} {codificacao:8s} {resumo_tempos(totais)}"
+                f"  servidor={statistics.median(servidor):7.2f} ms  no fio={no_fio / 1024:8.1f} KiB"
+            )
+
+
+# Cenário carga_leituras: workers de um servidor WSGI com threads (ex: gunicorn --threads 32)
+THREADS_WSGI = 32
+
+def requisitar_wsgi(aplicacao, caminho, consulta, cabecalhos, entrega):
+    """Executa uma requisição no WSGIHandler; o worker fica preso enquanto o terminal recebe a resposta."""
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': caminho, 'QUERY_STRING': consulta, 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.url_scheme': 'http', 'wsgi.input': BytesIO(), 'wsgi.errors': StringIO(),
+        'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+        **{'HTTP_' + nome.upper().replace('-', '_'): valor for nome, valor in cabecalhos.items()},
+    }
+    situacao = []
+    resposta = aplicacao(environ, lambda status, headers: situacao.append(status))
+    corpo = b''.join(resposta)
+    resposta.close() # Dispara request_finished, como o servidor faria
+    time.sleep(entrega)
+    return int(situacao[0].split()[0]), corpo
+
+
+async def requisitar_asgi(aplicacao, caminho, consulta, cabecalhos, entrega):
+    """Executa uma requisição no ASGIHandler; a entrega ao terminal é um await, sem prender thread."""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': caminho, 'raw_path': caminho.encode(), 'query_string': consulta.encode(), 'root_path': '',
+        'headers': [(b'host', b'localhost')] + [(nome.lower().encode(), valor.encode()) for nome, valor in cabecalhos.items()],
+        'server': ('localhost', 80), 'client': ('127.0.0.1', 50000),
+    }
+    pedido_lido = False
+
+    async def receive():
+        nonlocal pedido_lido
+        if not pedido_lido:
+            pedido_lido = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.Event().wait() # O terminal não desconecta; o Django cancela esta espera ao terminar
+
+    situacao, partes = [], []
+
+    async def send(mensagem):
+        if mensagem['type'] == 'http.response.start':
+            situacao.append(mensagem['status'])
+        else:
+            partes.append(mensagem.get('body', b''))
+            if not mensagem.get('more_body'):
+                await asyncio.sleep(entrega)
+
+    await aplicacao(scope, receive, send)
+    return situacao[0], b''.join(partes)
+
+
+def cenario_carga_leituras(command, repeticoes):
+    """
+    Terminais concorrentes (50 e 500), cada um fazendo 'repeticoes' leituras em sequência (página do
+    catálogo, ?search=, código de barras, detalhe da venda): API síncrona no WSGIHandler com 32 threads
+    x /api/async/ no ASGIHandler (um event loop). Latência p50/p99 por requisição (incluindo a fila) e
+    requisições/s, com a resposta entregue na hora e com 1 s de entrega (terminal em link lento ou
+    ocioso segurando a conexão, o que prende o worker WSGI até receber tudo). Servidores em processo,
+    sem rede; no ASGI o ORM e os middlewares síncronos do Django passam por uma única thread. Os dados precisam estar gravados (COMMIT) para as outras
+    conexões: o cenário roda fora da transação do benchmark e apaga o que criou ao final. Por gravar
+    no banco configurado, só roda no SQLite de desenvolvimento ou com --permitir-gravacao.
+    """
+    categoria_existia = CategoriaProduto.objects.filter(nomeCategoria='Benchmark').exists()
+    usuario = criar_usuario_benchmark()
+    grupo, grupo_criado = Group.objects.get_or_create(name='ATENDENTE')
+    usuario.groups.add(grupo)
+    produtos = criar_produtos_benchmark(2000, prefixo='789')
+    ids_produtos = [produto.pk for produto in produtos]
+    try:
+        indexar_produtos(produtos)
+        vendas = criar_vendas_benchmark(usuario, produtos[:100], 200)
+        token = adicionar_papeis_ao_token(AccessToken.for_user(usuario), usuario)
+        cabecalhos = {'Authorization': f'Bearer {token}'}
+        leituras = [
+            ('produtos/', 'page_size=50'),
+            ('produtos/', 'search=produto%20benchmark%2015'),
+            (f'produtos/barcode/{produtos[1500].codigoBarras}/', ''),
+            (f'vendas/{vendas[100].pk}/', ''),
+        ]
+        wsgi, asgi = WSGIHandler(), get_asgi_application()
+
+        async def carga(terminais, requisitar):
+            latencias, erros = [], 0
+
+            async def terminal(numero):
+                nonlocal erros
+                for i in range(repeticoes):
+                    caminho, consulta = leituras[(numero + i) % len(leituras)]
+                    inicio = time.perf_counter()
+                    situacao, _ = await requisitar(caminho, consulta)
+                    latencias.append((time.perf_counter() - inicio) * 1000)
+                    erros += situacao != 200
+
+            inicio = time.perf_counter()
+            await asyncio.gather(*(terminal(numero) for numero in range(terminais)))
+            return latencias, erros, time.perf_counter() - inicio
+
+        for entrega in (0, 1.0):
+            for terminais in (50, 500):
+                with ThreadPoolExecutor(THREADS_WSGI) as threads:
+                    async def via_wsgi(caminho, consulta):
+                        return await asyncio.get_running_loop().run_in_executor(
+                            threads, requisitar_wsgi, wsgi, f'/api/{caminho}', consulta, cabecalhos, entrega
+                        )
+                    resultados_wsgi = asyncio.run(carga(terminais, via_wsgi))
+
+                async def via_asgi(caminho, consulta):
+                    return await requisitar_asgi(asgi, f'/api/async/{caminho}', consulta, cabecalhos, entrega)
+                resultados_asgi = asyncio.run(carga(terminais, via_asgi))
+
+                for nome, (latencias, erros, duracao) in (('WSGI', resultados_wsgi), ('ASGI', resultados_asgi)):
+                    latencias.sort()
+                    command.stdout.write(
+                        f"carga_leituras  entrega={entrega * 1000:4.0f} ms  {terminais:3d} terminais  {nome}"
+                        f"  p50={statistics.median(latencias):8.1f} ms  p99={latencias[int(len(latencias) * 0.99)]:8.1f} ms"
+                        f"  {len(latencias) / duracao:7.1f} req/s  erros={erros}"
+                    )
+    finally:
+        ids_clientes = list(Venda.objects.filter(usuario=usuario).values_list('cliente_id', flat=True).distinct())
+        Venda.objects.filter(usuario=usuario).delete()
+        Cliente.objects.filter(pk__in=ids_clientes).delete()
+        # As marcas de remoção (RegistroRemocao) ficam: um terminal que sincronizou durante a carga
+        # precisa delas para tirar esses produtos e o cliente do espelho local
+        Produto.objects.filter(pk__in=ids_produtos).delete()
+        usuario.delete()
+        if grupo_criado:
+            grupo.delete()
+        if not categoria_existia:
+            CategoriaProduto.objects.filter(nomeCategoria='Benchmark').delete()
+
+cenario_carga_leituras.fora_da_transacao = True
+
+CENARIOS = {
+    'criar_venda': cenario_criar_venda,
+    'listar_vendas': cenario_listar_vendas,
+    'resumo_vendas': cenario_resumo_vendas,
+    'mais_vendidos': cenario_mais_vendidos,
+    'cancelar_vendas': cenario_cancelar_vendas,
+    'buscar_produto': cenario_buscar_produto,
+    'busca_texto': cenario_busca_texto,
+    'buscar_cliente': cenario_buscar_cliente,
+    'listar_categorias': cenario_listar_categorias,
+    'renderizar_json': cenario_renderizar_json,
+    'compressao_wan': cenario_compressao_wan,
+    'importar_produtos': cenario_importar_produtos,
+    'exportar_vendas': cenario_exportar_vendas,
+    'ajuste_estoque': cenario_ajuste_estoque,
+    'estoque_em': cenario_estoque_em,
+    'carga_leituras': cenario_carga_leituras,
+}
+
+
+class Command(BaseCommand):
+    help = "Executa cenários de benchmark da API de vendas. Os dados criados são descartados (rollback) ao final."
+
+    def add_arguments(self, parser):
+        parser.add_argument('cenarios', nargs='*', help=f"Cenários a executar (padrão: todos). Opções: {', '.join(sorted(CENARIOS))}.")
+        parser.add_argument('--repeticoes', type=int, default=20, help="Número de repetições por medição.")
+        parser.add_argument(
+            '--permitir-gravacao', action='store_true',
+            help="Permite os cenários que gravam (COMMIT) no banco configurado fora do SQLite (ex: carga_leituras).",
+        )
+
+    def handle(self, *args, **options):
+        desconhecidos = set(options['cenarios']) - set(CENARIOS)
+        if desconhecidos:
+            raise CommandError(f"Cenário(s) desconhecido(s): {', '.join(sorted(desconhecidos))}.")
+        for nome in options['cenarios'] or sorted(CENARIOS):
+            self.stdout.write(self.style.MIGRATE_HEADING(f"== {nome} =="))
+            if getattr(CENARIOS[nome], 'fora_da_transacao', False): # Lido por outras conexões; apaga os próprios dados
+                if connection.vendor != 'sqlite' and not options['permitir_gravacao']:
+                    self.stdout.write(self.style.WARNING(
+                        f"{nome}: ignorado. Grava no banco {connection.vendor} configurado; use --permitir-gravacao "
+                        "só em um banco de testes."
+                    ))
+                    continue
+                CENARIOS[nome](self, options['repeticoes'])
+                continue
+            with transaction.atomic():
+                CENARIOS[nome](self, options['repeticoes'])
+                transaction.set_rollback(True)
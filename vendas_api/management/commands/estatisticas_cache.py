@@ -0,0 +1,21 @@
+# vendas_api/management/commands/estatisticas_cache.py
+
+from django.core.management.base import BaseCommand
+
+from vendas_api.cache_referencia import estatisticas, zerar_estatisticas
+
+
+class Command(BaseCommand):
+    help = "Mostra os acertos e falhas do cache de listagens de referência (categorias, grupos)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zerar', action='store_true', help="Zera os contadores depois de mostrar.")
+
+    def handle(self, *args, **options):
+        dados = estatisticas()
+        self.stdout.write(
+            f"Acertos: {dados['acertos']}  Falhas: {dados['falhas']}  Taxa de acerto: {dados['taxa_acerto']:.1%}"
+        )
+        if options['zerar']:
+            zerar_estatisticas()
+            self.stdout.write(self.style.SUCCESS("Contadores zerados."))
@@ -0,0 +1,28 @@
+# vendas_api/management/commands/fechar_estoque_diario.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from vendas_api.movimentos import dias_a_fechar, fechar_dia
+
+
+class Command(BaseCommand):
+    help = (
+        "Grava as fotos diárias do estoque (EstoqueDiario) usadas por /api/produtos/estoque-em/. "
+        "Sem --data, fecha todos os dias pendentes até ontem; agende para rodar logo depois da meia-noite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--data', help="Fecha (ou refaz) apenas este dia, no formato YYYY-MM-DD.")
+
+    def handle(self, *args, **options):
+        if options['data']:
+            data = parse_date(options['data'])
+            if data is None:
+                raise CommandError("--data inválida, use o formato YYYY-MM-DD.")
+            dias = [data]
+        else:
+            dias = dias_a_fechar()
+        for dia in dias:
+            self.stdout.write(f"{dia}: {fechar_dia(dia)} produtos")
+        self.stdout.write(self.style.SUCCESS(f"Estoque diário fechado: {len(dias)} dia(s)."))
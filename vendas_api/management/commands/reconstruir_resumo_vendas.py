@@ -0,0 +1,13 @@
+# vendas_api/management/commands/reconstruir_resumo_vendas.py
+
+from django.core.management.base import BaseCommand
+
+from vendas_api.resumos import reconstruir_resumos
+
+
+class Command(BaseCommand):
+    help = "Reconstrói a tabela VendaResumoDiario (usada em /api/vendas/resumo/) a partir de todo o histórico de vendas."
+
+    def handle(self, *args, **options):
+        total_linhas = reconstruir_resumos()
+        self.stdout.write(self.style.SUCCESS(f"Resumo de vendas reconstruído: {total_linhas} linhas."))
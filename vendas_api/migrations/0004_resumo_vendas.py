@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendas_api', '0003_indices_paginacao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendaResumoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(verbose_name='Data')),
+                ('hora', models.PositiveSmallIntegerField(verbose_name='Hora (0-23)')),
+                ('formaPagamento', models.CharField(blank=True, default='', max_length=50, verbose_name='Forma de Pagamento')),
+                ('statusVenda', models.CharField(choices=[('CONCLUIDA', 'Concluída'), ('CANCELADA', 'Cancelada'), ('EM_ABERTO', 'Em Aberto')], max_length=50, verbose_name='Status da Venda')),
+                ('quantidadeVendas', models.IntegerField(default=0, verbose_name='Quantidade de Vendas')),
+                ('valorTotal', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Receita (R$)')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='resumos_vendas', to=settings.AUTH_USER_MODEL, verbose_name='Vendedor')),
+            ],
+            options={
+                'verbose_name': 'Resumo de Vendas',
+                'verbose_name_plural': 'Resumos de Vendas',
+                'constraints': [models.UniqueConstraint(fields=('data', 'hora', 'usuario', 'formaPagamento', 'statusVenda'), name='resumo_venda_chave_unica')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendas_api', '0004_resumo_vendas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProdutoVendaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(verbose_name='Data')),
+                ('quantidadeVendida', models.IntegerField(default=0, verbose_name='Quantidade Vendida')),
+                ('receita', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Receita (R$)')),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vendas_diarias', to='vendas_api.produto', verbose_name='Produto')),
+            ],
+            options={
+                'verbose_name': 'Venda Diária de Produto',
+                'verbose_name_plural': 'Vendas Diárias de Produtos',
+                'indexes': [models.Index(fields=['data'], name='produto_venda_diaria_data_idx')],
+                'constraints': [models.UniqueConstraint(fields=('produto', 'data'), name='produto_venda_diaria_unica')],
+            },
+        ),
+    ]
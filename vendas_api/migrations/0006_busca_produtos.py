@@ -0,0 +1,94 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:30
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Cópia das regras de busca.py no momento desta migração: mudanças futuras em busca.py
+# (pesos, campos, normalização) não alteram o que ela grava
+PESOS_CAMPOS = (('nomeProduto', 3), ('codigoBarras', 3), ('plataforma', 2), ('descricao', 1))
+TAMANHO_MAXIMO_TERMO = 100
+TAMANHO_LOTE = 1000
+
+
+def normalizar(texto):
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    return re.sub(r'[^a-z0-9]+', ' ', texto).strip()
+
+
+def documento_busca(produto):
+    return ' '.join(filter(None, (normalizar(getattr(produto, campo)) for campo, _ in PESOS_CAMPOS)))
+
+
+def termos_do_produto(produto):
+    termos = {}
+    for campo, peso in PESOS_CAMPOS:
+        for termo in set(normalizar(getattr(produto, campo)).split()):
+            termo = termo[:TAMANHO_MAXIMO_TERMO]
+            termos[termo] = termos.get(termo, 0) + peso
+    return termos
+
+
+def indexar_produtos_existentes(apps, schema_editor):
+    Produto = apps.get_model('vendas_api', 'Produto')
+    TermoBuscaProduto = apps.get_model('vendas_api', 'TermoBuscaProduto')
+    mysql = schema_editor.connection.vendor == 'mysql'
+    # Lotes por faixa de PK: o catálogo nunca fica inteiro em memória, e nenhum cursor fica aberto
+    # na tabela enquanto ela é atualizada (o SQLite não isola as consultas de uma mesma conexão)
+    ultimo = 0
+    while produtos := list(Produto.objects.filter(pk__gt=ultimo).order_by('pk')[:TAMANHO_LOTE]):
+        for produto in produtos:
+            produto.documentoBusca = documento_busca(produto)
+        Produto.objects.bulk_update(produtos, ['documentoBusca'], batch_size=TAMANHO_LOTE)
+        if not mysql:
+            TermoBuscaProduto.objects.bulk_create([
+                TermoBuscaProduto(produto_id=produto.pk, termo=termo, peso=peso)
+                for produto in produtos
+                for termo, peso in termos_do_produto(produto).items()
+            ], batch_size=TAMANHO_LOTE)
+        ultimo = produtos[-1].pk
+
+
+def criar_indice_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('CREATE FULLTEXT INDEX produto_busca_ft ON vendas_api_produto (documentoBusca)')
+
+
+def remover_indice_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('DROP INDEX produto_busca_ft ON vendas_api_produto')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendas_api', '0005_vendas_diarias_produto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produto',
+            name='documentoBusca',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Documento de Busca'),
+        ),
+        migrations.CreateModel(
+            name='TermoBuscaProduto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termo', models.CharField(max_length=100, verbose_name='Termo')),
+                ('peso', models.PositiveSmallIntegerField(default=1, verbose_name='Peso')),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='termos_busca', to='vendas_api.produto', verbose_name='Produto')),
+            ],
+            options={
+                'verbose_name': 'Termo de Busca de Produto',
+                'verbose_name_plural': 'Termos de Busca de Produtos',
+                'indexes': [models.Index(fields=['termo', 'produto'], name='termo_busca_termo_idx')],
+                'constraints': [models.UniqueConstraint(fields=('produto', 'termo'), name='termo_busca_produto_unico')],
+            },
+        ),
+        migrations.RunPython(criar_indice_fulltext, remover_indice_fulltext),
+        migrations.RunPython(indexar_produtos_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:39
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+# Cópia das regras de busca.py no momento desta migração: mudanças futuras em busca.py
+# não alteram o que ela grava
+TAMANHO_LOTE = 1000
+
+
+def normalizar(texto):
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    return re.sub(r'[^a-z0-9]+', ' ', texto).strip()
+
+
+def digitos(texto):
+    return re.sub(r'\D', '', texto or '') or None
+
+
+def preencher_colunas_busca(apps, schema_editor):
+    Cliente = apps.get_model('vendas_api', 'Cliente')
+    # Lotes por faixa de PK, como na 0006: a tabela de clientes nunca fica inteira em memória
+    ultimo = 0
+    while clientes := list(Cliente.objects.only('id', 'nome', 'cpf', 'telefone').filter(pk__gt=ultimo).order_by('pk')[:TAMANHO_LOTE]):
+        for cliente in clientes:
+            cliente.cpfDigitos = digitos(cliente.cpf)
+            cliente.telefoneDigitos = digitos(cliente.telefone)
+            cliente.nomeNormalizado = normalizar(cliente.nome)
+        Cliente.objects.bulk_update(clientes, ['cpfDigitos', 'telefoneDigitos', 'nomeNormalizado'], batch_size=TAMANHO_LOTE)
+        ultimo = clientes[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendas_api', '0006_busca_produtos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='cpfDigitos',
+            field=models.CharField(blank=True, editable=False, max_length=14, null=True, verbose_name='CPF (só dígitos)'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='nomeNormalizado',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255, verbose_name='Nome Normalizado'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='telefoneDigitos',
+            field=models.CharField(blank=True, editable=False, max_length=20, null=True, verbose_name='Telefone (só dígitos)'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['cpfDigitos'], name='cliente_cpf_digitos_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['telefoneDigitos'], name='cliente_telefone_digitos_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['nomeNormalizado', 'id'], name='cliente_nome_normalizado_idx'),
+        ),
+        migrations.RunPython(preencher_colunas_busca, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendas_api', '0008_versoes_tabelas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produto',
+            name='atualizadoEm',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Atualizado em'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='atualizadoEm',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Atualizado em'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['atualizadoEm', 'id'], name='produto_atualizado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['atualizadoEm', 'id'], name='cliente_atualizado_idx'),
+        ),
+        migrations.CreateModel(
+            name='RegistroRemocao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tabela', models.CharField(max_length=50, verbose_name='Tabela')),
+                ('objetoId', models.BigIntegerField(verbose_name='ID Removido')),
+                ('removidoEm', models.DateTimeField(verbose_name='Removido em')),
+            ],
+            options={
+                'verbose_name': 'Registro de Remoção',
+                'verbose_name_plural': 'Registros de Remoção',
+                'indexes': [models.Index(fields=['tabela', 'removidoEm'], name='remocao_tabela_data_idx')],
+            },
+        ),
+    ]
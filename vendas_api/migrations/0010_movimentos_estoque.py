@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def registrar_saldos_iniciais(apps, schema_editor):
+    # O estoque atual de cada produto vira o primeiro movimento: o livro-razão começa aqui
+    Produto = apps.get_model('vendas_api', 'Produto')
+    MovimentoEstoque = apps.get_model('vendas_api', 'MovimentoEstoque')
+    agora = timezone.now()
+    MovimentoEstoque.objects.bulk_create((
+        MovimentoEstoque(produto_id=produto_id, tipo='SALDO_INICIAL', quantidade=quantidade, registradoEm=agora)
+        for produto_id, quantidade in Produto.objects.filter(quantidadeEstoque__gt=0).values_list('pk', 'quantidadeEstoque').iterator()
+    ), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendas_api', '0009_sincronizacao_incremental'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstoqueDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(verbose_name='Data')),
+                ('quantidade', models.IntegerField(verbose_name='Estoque no Fim do Dia')),
+                ('ate', models.DateTimeField(verbose_name='Válido até')),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estoques_diarios', to='vendas_api.produto', verbose_name='Produto')),
+            ],
+            options={
+                'verbose_name': 'Estoque Diário',
+                'verbose_name_plural': 'Estoques Diários',
+                'constraints': [models.UniqueConstraint(fields=('produto', 'data'), name='estoque_diario_unico')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MovimentoEstoque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('SALDO_INICIAL', 'Saldo Inicial'), ('CADASTRO', 'Cadastro do Produto'), ('EDICAO', 'Edição Manual'), ('IMPORTACAO', 'Importação de Catálogo'), ('AJUSTE', 'Ajuste por Contagem'), ('VENDA', 'Venda'), ('CANCELAMENTO', 'Cancelamento de Venda'), ('REMOCAO_ITEM', 'Remoção de Item da Venda')], max_length=20, verbose_name='Tipo')),
+                ('quantidade', models.IntegerField(verbose_name='Quantidade (+ entrada, - saída)')),
+                ('registradoEm', models.DateTimeField(verbose_name='Registrado em')),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimentos_estoque', to='vendas_api.produto', verbose_name='Produto')),
+                ('venda', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimentos_estoque', to='vendas_api.venda', verbose_name='Venda')),
+            ],
+            options={
+                'verbose_name': 'Movimento de Estoque',
+                'verbose_name_plural': 'Movimentos de Estoque',
+                'indexes': [models.Index(fields=['produto', 'registradoEm'], name='movimento_produto_data_idx'), models.Index(fields=['registradoEm'], name='movimento_data_idx')],
+            },
+        ),
+        migrations.RunPython(registrar_saldos_iniciais, migrations.RunPython.noop),
+    ]
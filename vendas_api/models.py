@@ -56,6 +56,11 @@ class Produto(models.Model):
     # models.PROTECT impede que uma categoria seja deletada se houver produtos nela.
     categoria = models.ForeignKey(CategoriaProduto, on_delete=models.PROTECT, verbose_name="Categoria")
     # imagem = models.ImageField(upload_to='produtos_imagens/', null=True, blank=True) # Futuramente, se quisermos imagens
+    # Nome, código, plataforma e descrição normalizados (minúsculas, sem acento), mantido pelos sinais
+    # de busca.py. No MySQL tem índice FULLTEXT; nos outros bancos a busca usa TermoBuscaProduto.
+    documentoBusca = models.TextField(blank=True, default='', editable=False, verbose_name="Documento de Busca")
+    # Última gravação (inclusive baixas/reposições de estoque em massa, ver estoque.py); base do ?changed_since=
+    atualizadoEm = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
 
     def __str__(self):
         return self.nomeProduto
@@ -63,6 +68,12 @@ class Produto(models.Model):
     class Meta:
         verbose_name = "Produto"
         verbose_name_plural = "Produtos"
+        indexes = [
+            # Ordenação padrão da listagem/paginação: (nomeProduto, id)
+            models.Index(fields=['nomeProduto'], name='produto_nome_idx'),
+            # Sincronização incremental: percorre (atualizadoEm, id) a partir do cursor (ver sincronizacao.py)
+            models.Index(fields=['atualizadoEm', 'id'], name='produto_atualizado_idx'),
+        ]
 
 class Cliente(models.Model):
     # idCliente é criado automaticamente pelo Django como 'id'
@@ -83,12 +94,27 @@ class Cliente(models.Model):
     uf = models.CharField(max_length=2, null=True, blank=True, verbose_name="UF") # Sigla do Estado, ex: SP
     cep = models.CharField(max_length=9, null=True, blank=True, verbose_name="CEP") # Ex: 00000-000
 
+    # Colunas de busca, mantidas pelos sinais de busca.py (o PDV digita só números ou o começo do nome)
+    cpfDigitos = models.CharField(max_length=14, null=True, blank=True, editable=False, verbose_name="CPF (só dígitos)")
+    telefoneDigitos = models.CharField(max_length=20, null=True, blank=True, editable=False, verbose_name="Telefone (só dígitos)")
+    nomeNormalizado = models.CharField(max_length=255, blank=True, default='', editable=False, verbose_name="Nome Normalizado")
+    atualizadoEm = models.DateTimeField(auto_now=True, verbose_name="Atualizado em") # Base do ?changed_since=
+
     def __str__(self):
         return self.nome
 
     class Meta:
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
+        indexes = [
+            # Ordenação padrão da listagem/paginação: (nome, id)
+            models.Index(fields=['nome'], name='cliente_nome_idx'),
+            # Busca por prefixo: cada uma é uma varredura de intervalo no seu índice
+            models.Index(fields=['cpfDigitos'], name='cliente_cpf_digitos_idx'),
+            models.Index(fields=['telefoneDigitos'], name='cliente_telefone_digitos_idx'),
+            models.Index(fields=['nomeNormalizado', 'id'], name='cliente_nome_normalizado_idx'),
+            models.Index(fields=['atualizadoEm', 'id'], name='cliente_atualizado_idx'),
+        ]
 
 class Venda(models.Model):
     # idVenda é criado automaticamente pelo Django como 'id'
@@ -97,6 +123,12 @@ class Venda(models.Model):
         ('CANCELADA', 'Cancelada'),
         ('EM_ABERTO', 'Em Aberto'), # Para vendas que estão sendo montadas
     ]
+    # Mudanças de statusVenda permitidas (status atual -> novos status). Cancelada é estado final.
+    TRANSICOES_STATUS_VENDA = {
+        'EM_ABERTO': ('CONCLUIDA', 'CANCELADA'),
+        'CONCLUIDA': ('CANCELADA',),
+        'CANCELADA': (),
+    }
     FORMA_PAGAMENTO_CHOICES = [
         ('DINHEIRO', 'Dinheiro'),
         ('CARTAO_CREDITO', 'Cartão de Crédito'),
@@ -130,6 +162,14 @@ class Venda(models.Model):
     class Meta:
         verbose_name = "Venda"
         verbose_name_plural = "Vendas"
+        # Índices para o relatório de vendas (VendaFilter): o período é sempre informado,
+        # então dataHoraVenda vem primeiro, ou logo após um filtro de igualdade (vendedor).
+        indexes = [
+            models.Index(fields=['dataHoraVenda', 'statusVenda'], name='venda_data_status_idx'),
+            models.Index(fields=['usuario', 'dataHoraVenda'], name='venda_usuario_data_idx'),
+            # Ordenação padrão da listagem/paginação: (-dataHoraVenda, -id)
+            models.Index(fields=['dataHoraVenda'], name='venda_data_idx'),
+        ]
 
 class ItemVenda(models.Model):
     # idItemVenda é criado automaticamente pelo Django como 'id'
@@ -157,4 +197,176 @@ class ItemVenda(models.Model):
         # Para garantir que não haja o mesmo produto duas vezes como item separado na mesma venda.
         # Se for permitido (ex: duas linhas do mesmo produto com descontos diferentes), remova isso
         # e use o 'id' autoincrementado como chave primária simples.
-        # unique_together = ('venda', 'produto') # Descomente se quiser essa restrição
\ No newline at end of file
+        # unique_together = ('venda', 'produto') # Descomente se quiser essa restrição
+
+
+class VendaResumoDiario(models.Model):
+    """
+    Totais de vendas pré-agregados por dia, hora, vendedor, forma de pagamento e status.
+    Mantido na mesma transação da criação/alteração das vendas (ver resumos.py) e
+    reconstruível a partir do histórico com 'python manage.py reconstruir_resumo_vendas'.
+    """
+    data = models.DateField(verbose_name="Data")
+    hora = models.PositiveSmallIntegerField(verbose_name="Hora (0-23)")
+    usuario = models.ForeignKey(Usuario, on_delete=models.PROTECT, related_name='resumos_vendas', verbose_name="Vendedor")
+    formaPagamento = models.CharField(max_length=50, blank=True, default='', verbose_name="Forma de Pagamento") # '' = não informada
+    statusVenda = models.CharField(max_length=50, choices=Venda.STATUS_VENDA_CHOICES, verbose_name="Status da Venda")
+    quantidadeVendas = models.IntegerField(default=0, verbose_name="Quantidade de Vendas")
+    valorTotal = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Receita (R$)")
+
+    def __str__(self):
+        return f"{self.data} {self.hora:02d}h - {self.usuario_id} - {self.statusVenda}"
+
+    class Meta:
+        verbose_name = "Resumo de Vendas"
+        verbose_name_plural = "Resumos de Vendas"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['data', 'hora', 'usuario', 'formaPagamento', 'statusVenda'],
+                name='resumo_venda_chave_unica',
+            ),
+        ]
+
+
+class ProdutoVendaDiaria(models.Model):
+    """
+    Unidades vendidas e receita por produto e por dia (vendas não canceladas), alimentado pelos
+    itens gravados em cada venda (ver resumos.py). Base do ranking de produtos/categorias e do
+    campo 'vendidos_30d' da listagem de produtos.
+    """
+    produto = models.ForeignKey(Produto, on_delete=models.CASCADE, related_name='vendas_diarias', verbose_name="Produto")
+    data = models.DateField(verbose_name="Data")
+    quantidadeVendida = models.IntegerField(default=0, verbose_name="Quantidade Vendida")
+    receita = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Receita (R$)")
+
+    def __str__(self):
+        return f"{self.data} - Produto #{self.produto_id}: {self.quantidadeVendida}"
+
+    class Meta:
+        verbose_name = "Venda Diária de Produto"
+        verbose_name_plural = "Vendas Diárias de Produtos"
+        constraints = [
+            # (produto, data) atende o 'vendidos_30d' de cada produto
+            models.UniqueConstraint(fields=['produto', 'data'], name='produto_venda_diaria_unica'),
+        ]
+        # (data) atende o ranking por período
+        indexes = [models.Index(fields=['data'], name='produto_venda_diaria_data_idx')]
+
+
+class TermoBuscaProduto(models.Model):
+    """
+    Índice invertido da busca de produtos para bancos sem FULLTEXT (SQLite nos testes):
+    uma linha por (produto, termo normalizado), com o peso do campo em que o termo aparece.
+    """
+    produto = models.ForeignKey(Produto, on_delete=models.CASCADE, related_name='termos_busca', verbose_name="Produto")
+    termo = models.CharField(max_length=100, verbose_name="Termo")
+    peso = models.PositiveSmallIntegerField(default=1, verbose_name="Peso")
+
+    def __str__(self):
+        return f"{self.termo} -> Produto #{self.produto_id}"
+
+    class Meta:
+        verbose_name = "Termo de Busca de Produto"
+        verbose_name_plural = "Termos de Busca de Produtos"
+        constraints = [
+            models.UniqueConstraint(fields=['produto', 'termo'], name='termo_busca_produto_unico'),
+        ]
+        # (termo, produto): busca por prefixo de termo sem tocar na tabela
+        indexes = [models.Index(fields=['termo', 'produto'], name='termo_busca_termo_idx')]
+
+
+class VersaoTabela(models.Model):
+    """
+    Versão monotônica de cada tabela de catálogo (produto, categoria, cliente, grupo), incrementada
+    a cada gravação (ver versoes.py). É a base do ETag das listagens: um GET condicional compara
+    só estes números, sem ler as linhas.
+    """
+    nome = models.CharField(max_length=50, unique=True, verbose_name="Tabela")
+    versao = models.PositiveBigIntegerField(default=0, verbose_name="Versão")
+
+    def __str__(self):
+        return f"{self.nome}: v{self.versao}"
+
+    class Meta:
+        verbose_name = "Versão de Tabela"
+        verbose_name_plural = "Versões de Tabelas"
+
+
+class RegistroRemocao(models.Model):
+    """
+    Marca (tombstone) de um produto ou cliente excluído, gravada pelo post_delete de
+    sincronizacao.py. Permite que o ?changed_since= informe as exclusões aos terminais,
+    que não teriam como saber de uma linha que deixou de existir.
+    """
+    tabela = models.CharField(max_length=50, verbose_name="Tabela") # 'produto' ou 'cliente'
+    objetoId = models.BigIntegerField(verbose_name="ID Removido")
+    removidoEm = models.DateTimeField(verbose_name="Removido em")
+
+    def __str__(self):
+        return f"{self.tabela} {self.objetoId} removido em {self.removidoEm}"
+
+    class Meta:
+        verbose_name = "Registro de Remoção"
+        verbose_name_plural = "Registros de Remoção"
+        indexes = [models.Index(fields=['tabela', 'removidoEm'], name='remocao_tabela_data_idx')]
+
+
+class MovimentoEstoque(models.Model):
+    """
+    Livro-razão do estoque (só inserções): cada alteração de Produto.quantidadeEstoque grava aqui
+    o delta (negativo nas saídas), na mesma transação, em lote (ver movimentos.py). Somado a partir
+    de um EstoqueDiario, responde qual era o estoque de um produto em qualquer momento.
+    """
+    TIPO_CHOICES = [
+        ('SALDO_INICIAL', 'Saldo Inicial'), # Estoque existente quando o livro-razão foi criado
+        ('CADASTRO', 'Cadastro do Produto'),
+        ('EDICAO', 'Edição Manual'),
+        ('IMPORTACAO', 'Importação de Catálogo'),
+        ('AJUSTE', 'Ajuste por Contagem'),
+        ('VENDA', 'Venda'),
+        ('CANCELAMENTO', 'Cancelamento de Venda'),
+        ('REMOCAO_ITEM', 'Remoção de Item da Venda'),
+    ]
+    produto = models.ForeignKey(Produto, on_delete=models.CASCADE, related_name='movimentos_estoque', verbose_name="Produto")
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, verbose_name="Tipo")
+    quantidade = models.IntegerField(verbose_name="Quantidade (+ entrada, - saída)")
+    # Venda que originou o movimento (vendas, cancelamentos e remoções de itens)
+    venda = models.ForeignKey(Venda, on_delete=models.SET_NULL, null=True, blank=True, related_name='movimentos_estoque', verbose_name="Venda")
+    registradoEm = models.DateTimeField(verbose_name="Registrado em")
+
+    def __str__(self):
+        return f"{self.registradoEm} - Produto #{self.produto_id}: {self.quantidade:+d} ({self.tipo})"
+
+    class Meta:
+        verbose_name = "Movimento de Estoque"
+        verbose_name_plural = "Movimentos de Estoque"
+        indexes = [
+            # Consulta "estoque em": só os movimentos de um produto depois da última foto diária
+            models.Index(fields=['produto', 'registradoEm'], name='movimento_produto_data_idx'),
+            # Fechamento do dia: todos os movimentos de um intervalo
+            models.Index(fields=['registradoEm'], name='movimento_data_idx'),
+        ]
+
+
+class EstoqueDiario(models.Model):
+    """
+    Foto do estoque de um produto no fim de um dia em que ele teve movimentos, gravada pelo comando
+    'python manage.py fechar_estoque_diario' (ver movimentos.py). Dias sem movimento não têm linha:
+    o estoque continua o da foto anterior.
+    """
+    produto = models.ForeignKey(Produto, on_delete=models.CASCADE, related_name='estoques_diarios', verbose_name="Produto")
+    data = models.DateField(verbose_name="Data")
+    quantidade = models.IntegerField(verbose_name="Estoque no Fim do Dia")
+    # Primeiro instante do dia seguinte: os movimentos a partir dele não estão na foto
+    ate = models.DateTimeField(verbose_name="Válido até")
+
+    def __str__(self):
+        return f"{self.data} - Produto #{self.produto_id}: {self.quantidade}"
+
+    class Meta:
+        verbose_name = "Estoque Diário"
+        verbose_name_plural = "Estoques Diários"
+        constraints = [
+            # (produto, data) atende a busca da última foto antes de uma data
+            models.UniqueConstraint(fields=['produto', 'data'], name='estoque_diario_unico'),
+        ]
@@ -0,0 +1,114 @@
+# vendas_api/movimentos.py
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import models, transaction
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import pre_save, post_save
+from django.utils import timezone
+
+from .filters import inicio_do_dia
+from .models import Produto, MovimentoEstoque, EstoqueDiario
+
+# Produtos sem nenhuma foto diária somam os movimentos desde o começo do livro-razão
+INICIO_DO_LIVRO = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def registrar_movimentos(tipo, movimentos, momento=None):
+    """
+    Grava no livro-razão, em um único INSERT, os movimentos [(produto_id, quantidade, venda_id)]
+    (quantidade negativa nas saídas; as nulas são ignoradas). Deve ser chamada na mesma transação
+    que alterou quantidadeEstoque, para que os dois nunca divirjam.
+    """
+    momento = momento or timezone.now()
+    MovimentoEstoque.objects.bulk_create([
+        MovimentoEstoque(produto_id=produto_id, tipo=tipo, quantidade=quantidade, venda_id=venda_id, registradoEm=momento)
+        for produto_id, quantidade, venda_id in movimentos
+        if quantidade
+    ], batch_size=1000)
+
+
+# --- Edições manuais (ProdutoSerializer, admin): um save() por produto, acompanhado pelos sinais ---
+
+def _ler_estoque_anterior(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._estoque_anterior = None
+    if raw or instance.pk is None or (update_fields is not None and 'quantidadeEstoque' not in update_fields):
+        return
+    instance._estoque_anterior = Produto.objects.filter(pk=instance.pk).values_list('quantidadeEstoque', flat=True).first()
+
+
+def _registrar_edicao(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return # loaddata
+    if created:
+        registrar_movimentos('CADASTRO', [(instance.pk, instance.quantidadeEstoque, None)])
+    elif instance._estoque_anterior is not None:
+        registrar_movimentos('EDICAO', [(instance.pk, instance.quantidadeEstoque - instance._estoque_anterior, None)])
+
+
+pre_save.connect(_ler_estoque_anterior, sender=Produto, dispatch_uid='movimento_produto_pre_save')
+post_save.connect(_registrar_edicao, sender=Produto, dispatch_uid='movimento_produto_post_save')
+
+
+# --- Estoque em um momento passado ---
+
+def anotar_estoque_em(produtos, momento):
+    """
+    Anota 'estoque_em' em cada produto: o estoque imediatamente antes de 'momento'. Em vez de somar
+    todo o histórico, parte da última foto de EstoqueDiario válida até 'momento' (índice
+    (produto, data)) e soma só os movimentos registrados depois dela (índice (produto, registradoEm)),
+    em subconsultas correlacionadas: uma única consulta para qualquer número de produtos.
+    """
+    fotos = EstoqueDiario.objects.filter(produto=OuterRef('pk'), ate__lte=momento).order_by('-data')
+    produtos = produtos.annotate(
+        foto_quantidade=Coalesce(Subquery(fotos.values('quantidade')[:1]), 0),
+        foto_ate=Coalesce(Subquery(fotos.values('ate')[:1]), Value(INICIO_DO_LIVRO, output_field=models.DateTimeField())),
+    )
+    movimentos = (
+        MovimentoEstoque.objects
+        .filter(produto=OuterRef('pk'), registradoEm__gte=OuterRef('foto_ate'), registradoEm__lt=momento)
+        .values('produto').annotate(total=Sum('quantidade')).values('total')
+    )
+    return produtos.annotate(
+        estoque_em=F('foto_quantidade') + Coalesce(Subquery(movimentos), 0, output_field=models.IntegerField())
+    )
+
+
+@transaction.atomic
+def fechar_dia(data):
+    """
+    Grava a foto do fim do dia 'data' (EstoqueDiario) dos produtos que tiveram movimento nesse dia;
+    os demais continuam valendo pela foto anterior. Refazer o fechamento de um dia o recalcula.
+    Retorna o número de fotos gravadas.
+    """
+    fim = inicio_do_dia(data + timedelta(days=1))
+    EstoqueDiario.objects.filter(data=data).delete()
+    movimentados = (
+        MovimentoEstoque.objects.filter(registradoEm__gte=inicio_do_dia(data), registradoEm__lt=fim)
+        .values('produto').distinct()
+    )
+    estoques = anotar_estoque_em(Produto.objects.filter(pk__in=movimentados).order_by('pk'), fim)
+    fotos = EstoqueDiario.objects.bulk_create([
+        EstoqueDiario(produto_id=produto_id, data=data, quantidade=quantidade, ate=fim)
+        for produto_id, quantidade in estoques.values_list('pk', 'estoque_em')
+    ], batch_size=1000)
+    return len(fotos)
+
+
+def dias_a_fechar(ate_dia=None):
+    """Dias desde o último fechamento (ou o primeiro movimento) até 'ate_dia' (padrão: ontem)."""
+    ate_dia = ate_dia or timezone.localdate() - timedelta(days=1)
+    ultima_foto = EstoqueDiario.objects.order_by('-data').values_list('data', flat=True).first()
+    if ultima_foto is not None:
+        dia = ultima_foto + timedelta(days=1)
+    else:
+        primeiro = MovimentoEstoque.objects.order_by('registradoEm').values_list('registradoEm', flat=True).first()
+        if primeiro is None:
+            return []
+        dia = timezone.localdate(primeiro)
+    dias = []
+    while dia <= ate_dia:
+        dias.append(dia)
+        dia += timedelta(days=1)
+    return dias
@@ -0,0 +1,228 @@
+# vendas_api/pagination.py
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connection
+from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+def _campo_anulavel(model, caminho):
+    """
+    Indica se algum campo do caminho de ordenação (ex: 'cliente__nome') pode ser NULL.
+    Anotações (ex: 'relevancia' da busca de produtos) não são campos do modelo e nunca são NULL.
+    """
+    opts = model._meta
+    for parte in caminho.split(LOOKUP_SEP):
+        try:
+            campo = opts.pk if parte == 'pk' else opts.get_field(parte)
+        except FieldDoesNotExist:
+            return False
+        if campo.null:
+            return True
+        if campo.is_relation:
+            opts = campo.related_model._meta
+    return False
+
+
+def _campo_do_caminho(model, caminho):
+    """Campo do modelo no fim do caminho ('cliente__nome' -> Cliente.nome), ou None para anotações."""
+    opts, campo = model._meta, None
+    for parte in caminho.split(LOOKUP_SEP):
+        try:
+            campo = opts.pk if parte == 'pk' else opts.get_field(parte)
+        except FieldDoesNotExist:
+            return None
+        if campo.is_relation:
+            campo = campo.target_field
+            opts = campo.model._meta
+    return campo
+
+
+def _valor_do_caminho(instancia, caminho):
+    """Lê o valor de 'cliente__nome' em um objeto (seguindo atributos) ou em um dict de .values()."""
+    if isinstance(instancia, dict):
+        return instancia[caminho]
+    valor = instancia
+    for parte in caminho.split(LOOKUP_SEP):
+        if valor is None:
+            return None
+        valor = getattr(valor, parte)
+    return valor
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Paginação por chave (keyset) para todas as listagens da API.
+
+    Diferente do CursorPagination padrão do DRF, que posiciona o cursor apenas pelo primeiro campo
+    da ordenação e usa OFFSET para os empates, o cursor aqui guarda os valores de TODOS os campos
+    da ordenação do ViewSet (atributo 'ordering' ou ?ordering=), sempre terminados pela PK.
+    A próxima página é buscada com
+
+        WHERE (a > x) OR (a = x AND id > y) ORDER BY a, id LIMIT n
+
+    que percorre o índice a partir da posição do cursor: o custo de uma página é o mesmo
+    na primeira ou na milésima página.
+    """
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = ('-id',)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        ordering_filters = [
+            filter_cls for filter_cls in getattr(view, 'filter_backends', [])
+            if hasattr(filter_cls, 'get_ordering')
+        ]
+        if ordering_filters:
+            # O OrderingFilter devolve o ?ordering= validado ou, na falta dele, o 'ordering' do ViewSet
+            ordering = ordering_filters[0]().get_ordering(request, queryset, view)
+        ordering = ordering or getattr(view, 'ordering', None) or self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        ordering = list(ordering)
+
+        # Desempate pela PK, para que a posição do cursor seja única
+        pk = queryset.model._meta.pk.name
+        if not any(campo.lstrip('-') in ('pk', pk) for campo in ordering):
+            ordering.append(('-' if ordering[-1].startswith('-') else '') + pk)
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        consulta = self.preparar_pagina(queryset, request, view)
+        if consulta is None:
+            return None
+        return self.concluir_pagina(list(consulta))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Versão para views async (leitura_assincrona.py): a página é lida pelo ORM assíncrono."""
+        consulta = self.preparar_pagina(queryset, request, view)
+        if consulta is None:
+            return None
+        return self.concluir_pagina([instancia async for instancia in consulta])
+
+    def preparar_pagina(self, queryset, request, view=None):
+        """Monta (sem executar) a consulta da página: page_size + 1 linhas a partir do cursor."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.modelo = queryset.model
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor['r'])
+
+        # (caminho, descendente, anulável) para cada campo, já no sentido da leitura
+        campos = []
+        for campo in self.ordering:
+            descendente = campo.startswith('-')
+            caminho = campo.lstrip('-')
+            campos.append((caminho, descendente != reverse, _campo_anulavel(queryset.model, caminho)))
+
+        queryset = queryset.order_by(*[('-' if desc else '') + caminho for caminho, desc, _ in campos])
+        if self.cursor:
+            queryset = queryset.filter(self._condicao_apos(campos, self.cursor['p']))
+
+        return queryset[:self.page_size + 1]
+
+    def concluir_pagina(self, resultados):
+        self.page = resultados[:self.page_size]
+        tem_mais = len(resultados) > self.page_size
+        if self.cursor and self.cursor['r']:
+            self.page.reverse()
+            self.has_next, self.has_previous = self.cursor is not None, tem_mais
+        else:
+            self.has_next, self.has_previous = tem_mais, self.cursor is not None
+        return self.page
+
+    def _condicao_apos(self, campos, posicao):
+        """
+        Monta o filtro "linhas estritamente depois da posição" para a ordenação composta.
+        Os NULLs seguem a ordem nativa do banco (menores no MySQL/SQLite, maiores no PostgreSQL).
+        """
+        nulls_maiores = connection.features.nulls_order_largest
+        condicao = None
+        for (caminho, descendente, anulavel), valor in reversed(list(zip(campos, posicao))):
+            nulls_depois = nulls_maiores != descendente
+            if valor is None:
+                depois = Q(pk__in=[]) if nulls_depois else Q(**{f'{caminho}__isnull': False})
+                igual = Q(**{f'{caminho}__isnull': True})
+            else:
+                depois = Q(**{f'{caminho}__{"lt" if descendente else "gt"}': valor})
+                if anulavel and nulls_depois:
+                    depois |= Q(**{f'{caminho}__isnull': True})
+                igual = Q(**{caminho: valor})
+            condicao = depois if condicao is None else depois | (igual & condicao)
+
+        # Limite redundante no primeiro campo: deixa explícito para o otimizador que é uma
+        # varredura de intervalo no índice a partir da posição do cursor.
+        caminho, descendente, anulavel = campos[0]
+        if posicao[0] is not None and not anulavel:
+            condicao &= Q(**{f'{caminho}__{"lte" if descendente else "gte"}': posicao[0]})
+        return condicao
+
+    def _posicao(self, instancia):
+        posicao = []
+        for campo in self.ordering:
+            valor = _valor_do_caminho(instancia, campo.lstrip('-'))
+            posicao.append(valor if valor is None or isinstance(valor, (int, str)) else str(valor))
+        return posicao
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor({'p': self._posicao(self.page[-1]), 'r': 0})
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor({'p': self._posicao(self.page[0]), 'r': 1})
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            if not isinstance(cursor, dict) or not isinstance(cursor.get('p'), list):
+                raise ValueError
+            cursor['r'] = bool(cursor.get('r'))
+            cursor['p'] = self._converter_posicao(cursor['p'])
+        except (TypeError, ValueError, UnicodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def _converter_posicao(self, posicao):
+        """
+        Converte cada valor da posição para o tipo do seu campo de ordenação (data, decimal, inteiro...):
+        um cursor adulterado vira 404 aqui, e não um erro 500 ao montar o filtro.
+        """
+        if len(posicao) != len(self.ordering):
+            raise ValueError
+        convertida = []
+        for campo, valor in zip(self.ordering, posicao):
+            modelo_campo = _campo_do_caminho(self.modelo, campo.lstrip('-'))
+            if valor is None:
+                convertida.append(None)
+            elif modelo_campo is not None:
+                if not isinstance(valor, (int, str)) or isinstance(valor, bool):
+                    raise ValueError
+                convertida.append(modelo_campo.to_python(valor))
+            elif isinstance(valor, (int, float)) and not isinstance(valor, bool): # Anotação numérica (relevância)
+                convertida.append(valor)
+            else:
+                raise ValueError
+        return convertida
+
+    def encode_cursor(self, cursor):
+        encoded = urlsafe_b64encode(json.dumps(cursor, separators=(',', ':')).encode()).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
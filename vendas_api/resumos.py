@@ -0,0 +1,175 @@
+# vendas_api/resumos.py
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Count, F, Sum, Value, When
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils import timezone
+
+from .models import Venda, ItemVenda, VendaResumoDiario, ProdutoVendaDiaria
+
+
+def chave_resumo(venda):
+    """Linha de VendaResumoDiario em que a venda é contabilizada: (data, hora, usuario_id, forma, status)."""
+    local = timezone.localtime(venda.dataHoraVenda)
+    return (local.date(), local.hour, venda.usuario_id, venda.formaPagamento or '', venda.statusVenda)
+
+
+def estado_resumo(venda):
+    """Foto da venda para o resumo (chave + valor), a ser tirada ANTES de alterá-la."""
+    return chave_resumo(venda), venda.valorTotalVenda
+
+
+def _ordem_chave_resumo(chave):
+    data, hora, usuario_id, forma, status = chave
+    return (data, hora, usuario_id is not None, usuario_id or 0, forma, status) # usuario_id pode ser None
+
+
+def aplicar_deltas_resumo(deltas):
+    """
+    Soma os deltas {chave: (quantidade, valor)} nas linhas do resumo, criando as que faltarem.
+    Cada chave custa um UPDATE com F() (e um INSERT só na primeira venda daquela hora/vendedor/...),
+    então deve ser chamada dentro da transação que alterou as vendas. As linhas são travadas sempre
+    na mesma ordem (a das chaves): dois lotes concorrentes não se bloqueiam mutuamente (deadlock).
+    """
+    for chave in sorted(deltas, key=_ordem_chave_resumo):
+        (data, hora, usuario_id, forma, status), (quantidade, valor) = chave, deltas[chave]
+        if not quantidade and not valor:
+            continue
+        linha = VendaResumoDiario.objects.filter(
+            data=data, hora=hora, usuario_id=usuario_id, formaPagamento=forma, statusVenda=status
+        )
+        incremento = {'quantidadeVendas': F('quantidadeVendas') + quantidade, 'valorTotal': F('valorTotal') + valor}
+        if linha.update(**incremento):
+            if quantidade < 0:
+                # A última venda saiu desta linha (cancelamento/exclusão): remove para ficar igual à reconstrução
+                linha.filter(quantidadeVendas=0).delete()
+            continue
+        try:
+            with transaction.atomic():
+                VendaResumoDiario.objects.create(
+                    data=data, hora=hora, usuario_id=usuario_id, formaPagamento=forma, statusVenda=status,
+                    quantidadeVendas=quantidade, valorTotal=valor,
+                )
+        except IntegrityError:
+            # Outra transação criou a linha entre o UPDATE e o INSERT
+            linha.update(**incremento)
+
+
+def registrar_venda_criada(venda):
+    aplicar_deltas_resumo({chave_resumo(venda): (1, venda.valorTotalVenda)})
+
+
+def registrar_venda_alterada(estado_anterior, venda):
+    """Move a venda no resumo quando status, forma de pagamento ou valor mudaram."""
+    registrar_vendas_alteradas([(estado_anterior, venda)])
+
+
+def registrar_vendas_alteradas(alteracoes):
+    """Versão em lote de registrar_venda_alterada: [(estado_anterior, venda_atualizada), ...]."""
+    deltas = defaultdict(lambda: [0, Decimal('0.00')])
+    for (chave_antes, valor_antes), venda in alteracoes:
+        chave_depois = chave_resumo(venda)
+        deltas[chave_antes][0] -= 1
+        deltas[chave_antes][1] -= valor_antes
+        deltas[chave_depois][0] += 1
+        deltas[chave_depois][1] += venda.valorTotalVenda
+    aplicar_deltas_resumo({chave: tuple(delta) for chave, delta in deltas.items()})
+
+
+def registrar_venda_removida(estado_anterior):
+    chave, valor = estado_anterior
+    aplicar_deltas_resumo({chave: (-1, -valor)})
+
+
+# --- Vendas diárias por produto (ProdutoVendaDiaria) ---
+
+def data_da_venda(venda):
+    return timezone.localtime(venda.dataHoraVenda).date()
+
+
+def totais_dos_itens(itens):
+    """Agrupa itens (ItemVenda ou dicts com produto/quantidade/precoUnitarioVenda) em {produto_id: (qtd, receita)}."""
+    totais = defaultdict(lambda: [0, Decimal('0.00')])
+    for item in itens:
+        if isinstance(item, dict):
+            produto_id, quantidade, preco = item['produto'].pk, item['quantidade'], item['precoUnitarioVenda']
+        else:
+            produto_id, quantidade, preco = item.produto_id, item.quantidade, item.precoUnitarioVenda
+        totais[produto_id][0] += quantidade
+        totais[produto_id][1] += quantidade * preco
+    return {produto_id: tuple(total) for produto_id, total in totais.items()}
+
+
+def registrar_itens_vendidos(data, totais, sinal=1):
+    """
+    Soma (sinal=1) ou subtrai (sinal=-1) os totais {produto_id: (qtd, receita)} no dia 'data'
+    com um número fixo de comandos, independente da quantidade de produtos: um INSERT que ignora
+    as linhas já existentes e um UPDATE com CASE por produto (travando as linhas em ordem de produto).
+    """
+    if not totais:
+        return
+    if sinal > 0:
+        ProdutoVendaDiaria.objects.bulk_create(
+            [ProdutoVendaDiaria(produto_id=produto_id, data=data) for produto_id in sorted(totais)],
+            ignore_conflicts=True,
+        )
+    linhas = ProdutoVendaDiaria.objects.filter(data=data, produto_id__in=totais)
+    linhas.order_by('produto_id').update(
+        quantidadeVendida=F('quantidadeVendida') + Case(
+            *[When(produto_id=produto_id, then=Value(sinal * qtd)) for produto_id, (qtd, _) in sorted(totais.items())],
+            output_field=models.IntegerField()
+        ),
+        receita=F('receita') + Case(
+            *[When(produto_id=produto_id, then=Value(sinal * receita)) for produto_id, (_, receita) in sorted(totais.items())],
+            output_field=models.DecimalField(max_digits=14, decimal_places=2)
+        ),
+    )
+    if sinal < 0:
+        linhas.filter(quantidadeVendida=0).delete()
+
+
+@transaction.atomic
+def reconstruir_resumos():
+    """Recalcula VendaResumoDiario e ProdutoVendaDiaria a partir das vendas (agregação feita no banco)."""
+    VendaResumoDiario.objects.all().delete()
+    linhas = (
+        Venda.objects
+        .annotate(data=TruncDate('dataHoraVenda'), hora=ExtractHour('dataHoraVenda'))
+        .values('data', 'hora', 'usuario_id', 'formaPagamento', 'statusVenda')
+        .annotate(quantidade=Count('id'), valor=Sum('valorTotalVenda'))
+        .order_by()
+    )
+    # Vendas sem forma de pagamento (NULL) e com '' caem na mesma linha do resumo
+    agregados = defaultdict(lambda: [0, Decimal('0.00')])
+    for linha in linhas.iterator(chunk_size=2000):
+        chave = (linha['data'], linha['hora'], linha['usuario_id'], linha['formaPagamento'] or '', linha['statusVenda'])
+        agregados[chave][0] += linha['quantidade']
+        agregados[chave][1] += linha['valor']
+    VendaResumoDiario.objects.bulk_create([
+        VendaResumoDiario(
+            data=data, hora=hora, usuario_id=usuario_id, formaPagamento=forma, statusVenda=status,
+            quantidadeVendas=quantidade, valorTotal=valor,
+        )
+        for (data, hora, usuario_id, forma, status), (quantidade, valor) in agregados.items()
+    ], batch_size=1000)
+
+    ProdutoVendaDiaria.objects.all().delete()
+    vendidos = (
+        ItemVenda.objects.exclude(venda__statusVenda='CANCELADA')
+        .annotate(data=TruncDate('venda__dataHoraVenda'))
+        .values('produto_id', 'data')
+        .annotate(
+            quantidade_total=Sum('quantidade'),
+            receita_total=Sum(F('quantidade') * F('precoUnitarioVenda'), output_field=models.DecimalField(max_digits=14, decimal_places=2)),
+        )
+        .order_by()
+    )
+    ProdutoVendaDiaria.objects.bulk_create((
+        ProdutoVendaDiaria(produto_id=linha['produto_id'], data=linha['data'],
+                           quantidadeVendida=linha['quantidade_total'], receita=linha['receita_total'])
+        for linha in vendidos.iterator(chunk_size=2000)
+    ), batch_size=1000)
+    return len(agregados)
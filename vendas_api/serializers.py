@@ -1,6 +1,19 @@
+from decimal import Decimal
+
 from rest_framework import serializers
+from django.db import transaction
 from django.contrib.auth.models import Group # Para serializar os grupos de usuários
 from .models import Usuario, CategoriaProduto, Produto, Cliente, Venda, ItemVenda
+from .estoque import baixar_estoque, repor_estoque, EstoqueInsuficiente
+from .movimentos import registrar_movimentos
+from .authentication import adicionar_papeis_ao_token
+from .cancelamento import transicao_permitida, atualizar_venda_se_inalterada, VendaAlteradaConcorrentemente
+from .resumos import (
+    estado_resumo, registrar_venda_criada, registrar_venda_alterada,
+    data_da_venda, totais_dos_itens, registrar_itens_vendidos
+)
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 
 # Serializer para o modelo Group (para mostrar os grupos do usuário)
 class GroupSerializer(serializers.ModelSerializer):
@@ -109,6 +122,24 @@ class UsuarioSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
+# --- Tokens JWT com os papéis do usuário ---
+# Regra de propagação: uma mudança de grupos (ou desativação do usuário) passa a valer no próximo
+# refresh do token de acesso, ou seja, em no máximo SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'] (5 minutos).
+
+class TokenComPapeisSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return adicionar_papeis_ao_token(super().get_token(user), user)
+
+class TokenRefreshComPapeisSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        data = super().validate(attrs) # Valida o refresh e se a conta continua ativa
+        refresh = self.token_class(attrs['refresh'])
+        usuario = Usuario.objects.get(pk=refresh[jwt_settings.USER_ID_CLAIM])
+        access = adicionar_papeis_ao_token(refresh.access_token, usuario) # Grupos atuais, não os do login
+        data['access'] = str(access)
+        return data
+
 class CategoriaProdutoSerializer(serializers.ModelSerializer):
     class Meta:
         model = CategoriaProduto
@@ -122,13 +153,16 @@ class ProdutoSerializer(serializers.ModelSerializer):
     categoria_id = serializers.PrimaryKeyRelatedField(
         queryset=CategoriaProduto.objects.all(), source='categoria', write_only=True
     ) # No POST/PUT, espera um ID para categoria
+    # Só aparece na listagem com ?vendidos_30d=1 (anotado pelo ProdutoViewSet)
+    vendidos_30d = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Produto
         fields = (
             'id', 'codigoBarras', 'nomeProduto', 'descricao', 'valorUnitario',
             'quantidadeEstoque', 'plataforma', 'prazoGarantia',
-            'categoria', 'categoria_id' # Inclui ambos para leitura e escrita
+            'categoria', 'categoria_id', # Inclui ambos para leitura e escrita
+            'vendidos_30d', 'atualizadoEm'
         )
         # Se quisermos um campo específico para POST/PUT e outro para GET,
         # podemos nomeá-los diferentemente ou usar customizações.
@@ -137,7 +171,7 @@ class ProdutoSerializer(serializers.ModelSerializer):
 class ClienteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Cliente
-        fields = '__all__'
+        exclude = ('cpfDigitos', 'telefoneDigitos', 'nomeNormalizado') # Colunas internas da busca
 
 # Serializer para ItemVenda, será usado dentro do VendaSerializer (nested)
 class ItemVendaSerializer(serializers.ModelSerializer):
@@ -176,70 +210,152 @@ class VendaSerializer(serializers.ModelSerializer):
         # dataHoraVenda é auto_now_add, valorTotalVenda será calculado, usuario será o logado
         read_only_fields = ('id', 'dataHoraVenda', 'usuario_username', 'valorTotalVenda')
 
+    @transaction.atomic(savepoint=False)
     def create(self, validated_data):
+        """
+        Cria a venda com um número fixo de comandos SQL, independente da quantidade de itens:
+        um UPDATE condicional (CASE por produto) que baixa o estoque, um INSERT da venda
+        (já com o total calculado), um INSERT em lote dos itens e um dos movimentos de estoque.
+        """
         itens_data = validated_data.pop('itens')
         # 'cliente' já foi tratado pelo source='cliente' no cliente_id e será passado em validated_data
         # 'usuario' será atribuído na view com base no request.user
 
-        # Cria a instância da venda
-        venda = Venda.objects.create(**validated_data)
-
-        valor_total_calculado = 0
+        # Agrupa as quantidades por produto (o mesmo produto pode aparecer em mais de uma linha)
+        quantidades = {}
+        valor_total_calculado = Decimal('0.00')
         for item_data in itens_data:
             produto_obj = item_data['produto'] # 'produto' aqui é o objeto Produto, pois source='produto' no produto_id
-            quantidade_vendida = item_data['quantidade']
             preco_unitario = item_data.get('precoUnitarioVenda', produto_obj.valorUnitario) # Pega preço do request ou do produto
-
-            # Verificar estoque (RF008 - parte da lógica)
-            if produto_obj.quantidadeEstoque < quantidade_vendida:
-                raise serializers.ValidationError(
-                    f"Estoque insuficiente para o produto '{produto_obj.nomeProduto}'. "
-                    f"Disponível: {produto_obj.quantidadeEstoque}, Solicitado: {quantidade_vendida}."
-                )
-
-            # Criar o ItemVenda
-            item = ItemVenda.objects.create(
+            item_data['precoUnitarioVenda'] = preco_unitario
+            quantidades[produto_obj.pk] = quantidades.get(produto_obj.pk, 0) + item_data['quantidade']
+            valor_total_calculado += item_data['quantidade'] * preco_unitario
+
+        # Verificar e baixar estoque (RF008) antes de gravar a venda. A verificação é feita
+        # pelo próprio banco, sobre a linha travada, e não sobre o objeto lido na validação.
+        try:
+            baixar_estoque(quantidades)
+        except EstoqueInsuficiente as exc:
+            raise serializers.ValidationError(str(exc))
+
+        # Cria a instância da venda já com o total, evitando um segundo save()
+        venda = Venda.objects.create(valorTotalVenda=valor_total_calculado, **validated_data)
+
+        # Criar os ItemVenda em um único INSERT
+        ItemVenda.objects.bulk_create([
+            ItemVenda(
                 venda=venda,
-                produto=produto_obj,
-                quantidade=quantidade_vendida,
-                precoUnitarioVenda=preco_unitario
+                produto=item_data['produto'],
+                quantidade=item_data['quantidade'],
+                precoUnitarioVenda=item_data['precoUnitarioVenda']
             )
-            valor_total_calculado += item.subtotal
-
-            # Atualizar estoque do produto (RF008)
-            produto_obj.quantidadeEstoque -= quantidade_vendida
-            produto_obj.save()
-
-        venda.valorTotalVenda = valor_total_calculado
-        venda.save()
+            for item_data in itens_data
+        ])
+        registrar_movimentos('VENDA', [(produto_id, -qtd, venda.pk) for produto_id, qtd in quantidades.items()])
+
+        # Resumos (VendaResumoDiario e ProdutoVendaDiaria), na mesma transação
+        registrar_venda_criada(venda)
+        if venda.statusVenda != 'CANCELADA':
+            registrar_itens_vendidos(data_da_venda(venda), totais_dos_itens(itens_data))
         return venda
 
+    @transaction.atomic(savepoint=False)
     def update(self, instance, validated_data):
         # Lógica para atualizar venda, especialmente para cancelamento (RF016)
         # O statusVenda virá em validated_data se estiver sendo alterado
+        estado_anterior = estado_resumo(instance) # Para mover a venda no resumo se status/pagamento mudarem
 
-        # Salva outras alterações primeiro
         # Itens não são atualizados desta forma simples, geralmente se remove/adiciona
         # ou se tem um endpoint específico para itens.
         # Para cancelamento, focamos no statusVenda.
         itens_data = validated_data.pop('itens', None) # Não vamos processar atualização de itens aqui
 
-        # Se o status da venda está mudando para 'CANCELADA' e não era 'CANCELADA' antes
-        novo_status_venda = validated_data.get('statusVenda', instance.statusVenda)
-        if novo_status_venda == 'CANCELADA' and instance.statusVenda != 'CANCELADA':
-            # Estornar itens ao estoque
-            for item_venda in instance.itens.all():
-                produto = item_venda.produto
-                produto.quantidadeEstoque += item_venda.quantidade
-                produto.save()
+        status_atual = instance.statusVenda
+        novo_status_venda = validated_data.get('statusVenda', status_atual)
+        if not transicao_permitida(status_atual, novo_status_venda):
+            raise serializers.ValidationError(
+                {'statusVenda': f"Transição de status inválida: {status_atual} -> {novo_status_venda}."}
+            )
+        cancelando = novo_status_venda == 'CANCELADA' and status_atual != 'CANCELADA'
+        campos = {
+            'statusVenda': novo_status_venda,
+            'formaPagamento': validated_data.get('formaPagamento', instance.formaPagamento),
+            # Ao cancelar, o pagamento é estornado (a menos que o cliente informe outro status)
+            'statusPagamento': validated_data.get('statusPagamento', 'CANCELADO_ESTORNADO' if cancelando else instance.statusPagamento),
+        }
+
+        # Um único UPDATE condicional (WHERE statusVenda = <status lido>): se dois supervisores cancelarem
+        # ao mesmo tempo, ou o desktop repetir o pedido, só um deles estorna o estoque.
+        if not atualizar_venda_se_inalterada(instance, **campos):
+            instance.refresh_from_db()
+            if all(getattr(instance, campo) == valor for campo, valor in campos.items()):
+                return instance # Outro pedido já deixou a venda exatamente assim: repetição idempotente
+            raise VendaAlteradaConcorrentemente()
+
+        if cancelando:
+            # Estornar itens ao estoque. Os itens são relidos com trava (e não do prefetch): uma remoção
+            # de item concluída depois da leitura da venda não pode ser estornada duas vezes.
+            itens_venda = list(ItemVenda.objects.select_for_update().filter(venda=instance).order_by('pk'))
+            quantidades = {}
+            for item_venda in itens_venda:
+                quantidades[item_venda.produto_id] = quantidades.get(item_venda.produto_id, 0) + item_venda.quantidade
+            repor_estoque(quantidades) # Um único UPDATE para todos os produtos da venda
+            registrar_movimentos('CANCELAMENTO', [(produto_id, qtd, instance.pk) for produto_id, qtd in quantidades.items()])
+            # Itens cancelados deixam de contar no ranking de produtos
+            registrar_itens_vendidos(data_da_venda(instance), totais_dos_itens(itens_venda), sinal=-1)
             # RF017 - Simular comunicação com sistema financeiro
             print(f"LOG: Venda {instance.id} cancelada. Código enviado ao sistema financeiro.")
-            instance.statusPagamento = 'CANCELADO_ESTORNADO' # Ou um status apropriado
 
-        instance.formaPagamento = validated_data.get('formaPagamento', instance.formaPagamento)
-        instance.statusPagamento = validated_data.get('statusPagamento', instance.statusPagamento)
-        instance.statusVenda = novo_status_venda
-        # Outros campos da venda podem ser atualizados aqui se necessário
+        registrar_venda_alterada(estado_anterior, instance)
+        return instance
 
-        instance.save()
-        return instance
\ No newline at end of file
+
+class VendaListaSerializer(serializers.Serializer):
+    """
+    Representação resumida da venda para a listagem (relatório do SaleListWidget).
+    Lê dicts de Venda.objects.values(*VendaListaSerializer.CAMPOS_VALUES), sem instanciar
+    modelos nem carregar itens; os detalhes completos continuam no VendaSerializer (retrieve).
+    """
+    # Nomes das colunas pedidas ao .values() (inclui os caminhos usados na ordenação/paginação)
+    CAMPOS_VALUES = (
+        'id', 'dataHoraVenda', 'cliente__nome', 'usuario__username',
+        'formaPagamento', 'statusPagamento', 'statusVenda', 'valorTotalVenda',
+    )
+
+    id = serializers.IntegerField(read_only=True)
+    dataHoraVenda = serializers.DateTimeField(read_only=True)
+    cliente_nome = serializers.CharField(source='cliente__nome', read_only=True, allow_null=True)
+    usuario_username = serializers.CharField(source='usuario__username', read_only=True)
+    formaPagamento = serializers.CharField(read_only=True, allow_null=True)
+    statusPagamento = serializers.CharField(read_only=True)
+    statusVenda = serializers.CharField(read_only=True)
+    valorTotalVenda = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+
+
+class VendaResumoSerializer(serializers.Serializer):
+    """Linha de /api/vendas/resumo/. Só as dimensões pedidas em ?agrupar_por= aparecem na resposta."""
+    dia = serializers.DateField(read_only=True)
+    hora = serializers.IntegerField(read_only=True)
+    vendedor = serializers.CharField(read_only=True)
+    formaPagamento = serializers.CharField(read_only=True)
+    statusVenda = serializers.CharField(read_only=True)
+    receita = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    quantidade_vendas = serializers.IntegerField(read_only=True)
+    ticket_medio = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+
+
+class ProdutoRankingSerializer(serializers.Serializer):
+    """Linha de /api/produtos/mais-vendidos/."""
+    produto_id = serializers.IntegerField(read_only=True)
+    nomeProduto = serializers.CharField(read_only=True)
+    codigoBarras = serializers.CharField(read_only=True, allow_null=True)
+    quantidade_vendida = serializers.IntegerField(read_only=True)
+    receita = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+
+
+class CategoriaReceitaSerializer(serializers.Serializer):
+    """Linha de /api/categorias/receita/."""
+    categoria_id = serializers.IntegerField(read_only=True)
+    nomeCategoria = serializers.CharField(read_only=True)
+    quantidade_vendida = serializers.IntegerField(read_only=True)
+    receita = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
@@ -0,0 +1,142 @@
+# vendas_api/sincronizacao.py
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import timedelta
+
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .models import CategoriaProduto, Produto, Cliente, RegistroRemocao
+
+# Nome da tabela gravado em RegistroRemocao
+TABELAS_SINCRONIZADAS = {Produto: 'produto', Cliente: 'cliente'}
+
+# Transações que começaram antes e fizeram COMMIT depois de uma leitura gravam atualizadoEm "no passado".
+# O cursor final nunca passa de (agora - margem): a próxima consulta relê esse intervalo e pega essas linhas.
+# Repetir uma linha já enviada não faz mal (o terminal só sobrescreve o espelho).
+MARGEM_SINCRONIZACAO = timedelta(seconds=30)
+TAMANHO_PADRAO = 500
+TAMANHO_MAXIMO = 1000
+
+
+def _registrar_remocao(sender, instance, **kwargs):
+    RegistroRemocao.objects.create(tabela=TABELAS_SINCRONIZADAS[sender], objetoId=instance.pk, removidoEm=timezone.now())
+
+
+for _modelo in TABELAS_SINCRONIZADAS:
+    post_delete.connect(_registrar_remocao, sender=_modelo, dispatch_uid=f'remocao_{_modelo._meta.label_lower}')
+
+
+def _categoria_alterada(sender, instance, created, raw=False, **kwargs):
+    # A categoria vem aninhada em cada produto: renomeá-la altera os produtos dela para quem sincroniza
+    if not created and not raw:
+        Produto.objects.filter(categoria=instance).update(atualizadoEm=timezone.now())
+
+
+post_save.connect(_categoria_alterada, sender=CategoriaProduto, dispatch_uid='sincronizacao_categoria')
+
+
+def codificar_cursor(momento, pk, remocoes_desde):
+    dados = {
+        't': momento.isoformat() if momento else None,
+        'id': pk,
+        'r': remocoes_desde.isoformat() if remocoes_desde else None,
+    }
+    return urlsafe_b64encode(json.dumps(dados, separators=(',', ':')).encode()).decode()
+
+
+def _instante_do_cursor(valor):
+    """None fica None; qualquer outra coisa precisa ser um instante ISO com fuso (como gravado por codificar_cursor)."""
+    if valor is None:
+        return None
+    momento = parse_datetime(valor)
+    if momento is None or timezone.is_naive(momento):
+        raise ValueError(valor)
+    return momento
+
+
+def decodificar_cursor(texto):
+    """
+    Devolve (momento, pk, remocoes_desde). O cursor '0' é o início: todas as linhas, nenhuma remoção.
+      - (momento, pk): posição em (atualizadoEm, id) a partir da qual vêm as linhas alteradas;
+      - remocoes_desde: as remoções posteriores a este instante saem na última página da rodada.
+    """
+    if texto == '0':
+        return None, 0, None
+    try:
+        dados = json.loads(urlsafe_b64decode(texto.encode()))
+        momento = _instante_do_cursor(dados['t'])
+        remocoes_desde = _instante_do_cursor(dados['r'])
+        pk = int(dados['id'])
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise ValidationError({'changed_since': "Cursor de sincronização inválido. Use '0' para sincronizar do início."})
+    return momento, pk, remocoes_desde
+
+
+class SincronizacaoMixin:
+    """
+    Modo ?changed_since=<cursor> na listagem (produtos e clientes) para manter um espelho local:
+
+        GET /api/produtos/?changed_since=0            -> tudo, em páginas de ?page_size= (padrão 500)
+        GET /api/produtos/?changed_since=<cursor>     -> só o que mudou desde o cursor
+
+    Resposta: {'alterados': [...], 'removidos': [ids], 'cursor': '...', 'tem_mais': bool}.
+    Enquanto 'tem_mais' for true, chame de novo com o 'cursor' devolvido; quando for false, guarde o
+    cursor para a próxima sincronização. As linhas vêm em ordem de (atualizadoEm, id), lidas pelo
+    índice a partir do cursor; as remoções (RegistroRemocao) saem na última página de cada rodada.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if 'changed_since' in request.query_params:
+            return self.alteracoes(request)
+        return super().list(request, *args, **kwargs)
+
+    def alteracoes(self, request):
+        momento, pk, remocoes_desde = decodificar_cursor(request.query_params['changed_since'])
+        try:
+            tamanho = min(int(request.query_params.get('page_size', TAMANHO_PADRAO)), TAMANHO_MAXIMO)
+        except ValueError:
+            raise ValidationError({'page_size': 'Informe um número inteiro.'})
+        if tamanho < 1:
+            raise ValidationError({'page_size': 'Deve ser maior que zero.'})
+        agora = timezone.now()
+        limite_seguro = agora - MARGEM_SINCRONIZACAO
+        if remocoes_desde is None and momento is None:
+            # Primeira rodada: exclusões feitas enquanto o terminal baixa as páginas também precisam chegar
+            remocoes_desde = limite_seguro
+
+        queryset = self.get_queryset().order_by('atualizadoEm', 'pk')
+        if momento is not None:
+            queryset = queryset.filter(Q(atualizadoEm__gt=momento) | Q(atualizadoEm=momento, pk__gt=pk))
+        linhas = list(queryset[:tamanho + 1])
+        tem_mais = len(linhas) > tamanho
+        linhas = linhas[:tamanho]
+
+        removidos = []
+        if tem_mais:
+            # Meio da rodada: o cursor é a posição exata da última linha enviada
+            cursor = codificar_cursor(linhas[-1].atualizadoEm, linhas[-1].pk, remocoes_desde)
+        else:
+            if linhas:
+                momento, pk = linhas[-1].atualizadoEm, linhas[-1].pk
+            if momento is None or momento > limite_seguro:
+                momento, pk = limite_seguro, 0
+            removidos = list(
+                RegistroRemocao.objects
+                .filter(tabela=TABELAS_SINCRONIZADAS[self.queryset.model], removidoEm__gt=remocoes_desde)
+                .order_by('removidoEm', 'pk').values_list('objetoId', flat=True)
+            )
+            cursor = codificar_cursor(momento, pk, max(remocoes_desde, limite_seguro))
+
+        return Response({
+            'alterados': self.get_serializer(linhas, many=True).data,
+            'removidos': removidos,
+            'cursor': cursor,
+            'tem_mais': tem_mais,
+        }, status=status.HTTP_200_OK)
@@ -1,3 +1,1526 @@
-from django.test import TestCase
+import base64
+import csv
+import gzip
+import json
+import random
+import subprocess
+import sys
+import threading
+import zlib
+from io import StringIO
+from unittest import mock
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import (
+    Usuario, CategoriaProduto, Produto, Cliente, Venda, ItemVenda, VendaResumoDiario, ProdutoVendaDiaria, RegistroRemocao,
+    MovimentoEstoque, EstoqueDiario,
+)
+from .authentication import adicionar_papeis_ao_token
+from .busca import consulta_fulltext, separar_termos
+from .movimentos import dias_a_fechar
+from .resumos import aplicar_deltas_resumo
+from .serializers import VendaSerializer
+from .views import ClienteViewSet
+from .cancelamento import VendaAlteradaConcorrentemente
+from .cache_referencia import estatisticas
+from . import renderers
+from .compressao import CompressaoMiddleware, escolher_codificador
+
+
+def criar_produtos(quantidade, estoque=10, valor='10.00'):
+    categoria, _ = CategoriaProduto.objects.get_or_create(nomeCategoria='Jogos')
+    return [
+        Produto.objects.create(
+            codigoBarras=f"789{i:010d}", nomeProduto=f"Produto {i}",
+            valorUnitario=Decimal(valor), quantidadeEstoque=estoque, categoria=categoria,
+        )
+        for i in range(quantidade)
+    ]
+
+
+class CriacaoVendaTests(APITestCase):
+    def setUp(self):
+        self.atendente = Usuario.objects.create_user(username='atendente', password='senha')
+        self.atendente.groups.add(Group.objects.create(name='ATENDENTE'))
+        self.client.force_authenticate(self.atendente)
+
+    def _dados_venda(self, produtos, quantidade=1):
+        return {
+            'formaPagamento': 'PIX',
+            'statusVenda': 'CONCLUIDA',
+            'itens': [
+                {'produto_id': p.id, 'quantidade': quantidade, 'precoUnitarioVenda': str(p.valorUnitario)}
+                for p in produtos
+            ],
+        }
+
+    def test_cria_itens_baixa_estoque_e_calcula_total(self):
+        produtos = criar_produtos(3, estoque=10)
+        dados = self._dados_venda(produtos, quantidade=2)
+        # Mesmo produto em duas linhas: o estoque deve ser baixado pela soma
+        dados['itens'].append({'produto_id': produtos[0].id, 'quantidade': 1, 'precoUnitarioVenda': '10.00'})
+
+        response = self.client.post('/api/vendas/', dados, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        venda = Venda.objects.get(pk=response.data['id'])
+        self.assertEqual(venda.valorTotalVenda, Decimal('70.00'))
+        self.assertEqual(venda.itens.count(), 4)
+        estoques = dict(Produto.objects.values_list('id', 'quantidadeEstoque'))
+        self.assertEqual(estoques, {produtos[0].id: 7, produtos[1].id: 8, produtos[2].id: 8})
+
+    def test_estoque_insuficiente_nao_grava_nada(self):
+        produtos = criar_produtos(2, estoque=1)
+
+        response = self.client.post('/api/vendas/', self._dados_venda(produtos, quantidade=2), format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Venda.objects.exists())
+        self.assertFalse(ItemVenda.objects.exists())
+        self.assertTrue(all(p.quantidadeEstoque == 1 for p in Produto.objects.all()))
+
+
+class CriacaoVendaQueriesTests(TestCase):
+    def test_numero_de_queries_nao_depende_da_quantidade_de_itens(self):
+        usuario = Usuario.objects.create_user(username='vendedor', password='senha')
+        produtos = criar_produtos(20)
+        contagens = []
+        # A primeira venda da hora também cria a linha do resumo (VendaResumoDiario); as seguintes só a atualizam.
+        # ProdutoVendaDiaria custa sempre um INSERT ... IGNORE e um UPDATE, com 1 ou 20 produtos.
+        for linhas in (1, 1, 20):
+            serializer = VendaSerializer(data={
+                'formaPagamento': 'DINHEIRO',
+                'itens': [{'produto_id': p.id, 'quantidade': 1, 'precoUnitarioVenda': '10.00'} for p in produtos[:linhas]],
+            })
+            serializer.is_valid(raise_exception=True)
+            with CaptureQueriesContext(connection) as queries:
+                serializer.save(usuario=usuario)
+            contagens.append(len(queries))
+        self.assertEqual(contagens[1], contagens[2])
+        self.assertLessEqual(contagens[1], 7) # estoque, venda, itens, movimentos de estoque, resumo e vendas por produto (insert + update)
+
+
+class ListagemVendasQueriesTests(APITestCase):
+    """O número de queries de /api/vendas/ não pode crescer com o número de vendas ou de itens."""
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(username='supervisor', password='senha')
+        self.client.force_authenticate(self.usuario)
+        self.produtos = criar_produtos(5, estoque=1000)
+        self.cliente = Cliente.objects.create(nome='Cliente Teste')
+
+    def _criar_vendas(self, quantidade, itens_por_venda=3):
+        for _ in range(quantidade):
+            serializer = VendaSerializer(data={
+                'cliente_id': self.cliente.id,
+                'formaPagamento': 'PIX',
+                'itens': [
+                    {'produto_id': p.id, 'quantidade': 1, 'precoUnitarioVenda': '10.00'}
+                    for p in self.produtos[:itens_por_venda]
+                ],
+            })
+            serializer.is_valid(raise_exception=True)
+            serializer.save(usuario=self.usuario)
+
+    def test_listagem_com_numero_constante_de_queries(self):
+        self._criar_vendas(2)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/vendas/')
+        self.assertEqual(len(response.data['results']), 2)
+
+        self._criar_vendas(10, itens_por_venda=5)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/vendas/')
+        vendas = response.data['results']
+        self.assertEqual(len(vendas), 12)
+        # Listagem resumida: só os campos do relatório, sem itens aninhados
+        self.assertEqual(set(vendas[0]), {
+            'id', 'dataHoraVenda', 'cliente_nome', 'usuario_username',
+            'formaPagamento', 'statusPagamento', 'statusVenda', 'valorTotalVenda',
+        })
+        self.assertEqual(vendas[0]['cliente_nome'], 'Cliente Teste')
+        self.assertEqual(vendas[0]['usuario_username'], 'supervisor')
+        self.assertEqual(vendas[0]['valorTotalVenda'], '50.00')
+
+    def test_detalhe_com_numero_constante_de_queries(self):
+        self._criar_vendas(1, itens_por_venda=5)
+        venda = Venda.objects.get()
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/vendas/{venda.id}/')
+        self.assertEqual(len(response.data['itens']), 5)
+        self.assertEqual(response.data['itens'][0]['produto']['categoria']['nomeCategoria'], 'Jogos')
+
+
+
+class FiltrosRelatorioVendasTests(APITestCase):
+    def setUp(self):
+        self.supervisor = Usuario.objects.create_user(username='supervisor', password='senha')
+        self.atendente = Usuario.objects.create_user(username='Atendente1', password='senha')
+        self.client.force_authenticate(self.supervisor)
+        self.cliente = Cliente.objects.create(nome='Maria da Silva')
+
+    def _venda(self, data_hora, usuario, cliente=None, status_venda='CONCLUIDA', forma='PIX'):
+        venda = Venda.objects.create(usuario=usuario, cliente=cliente, statusVenda=status_venda, formaPagamento=forma)
+        Venda.objects.filter(pk=venda.pk).update(dataHoraVenda=data_hora) # dataHoraVenda é auto_now_add
+        return venda.pk
+
+    def _ids(self, **params):
+        response = self.client.get('/api/vendas/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {venda['id'] for venda in response.data['results']}
+
+    def test_filtro_por_periodo_inclui_o_dia_final_inteiro(self):
+        antes = self._venda(datetime(2025, 4, 30, 23, 59, tzinfo=dt_timezone.utc), self.atendente)
+        inicio = self._venda(datetime(2025, 5, 1, 0, 0, tzinfo=dt_timezone.utc), self.atendente)
+        fim = self._venda(datetime(2025, 5, 31, 23, 59, tzinfo=dt_timezone.utc), self.atendente)
+        depois = self._venda(datetime(2025, 6, 1, 0, 0, tzinfo=dt_timezone.utc), self.atendente)
+
+        self.assertEqual(self._ids(data_inicio='2025-05-01', data_fim='2025-05-31'), {inicio, fim})
+        self.assertEqual(self._ids(data_fim='2025-04-30'), {antes})
+        self.assertEqual(self._ids(data_inicio='2025-06-01'), {depois})
+
+    def test_filtros_por_cliente_vendedor_status_e_pagamento(self):
+        quando = datetime(2025, 5, 10, 12, 0, tzinfo=dt_timezone.utc)
+        do_cliente = self._venda(quando, self.atendente, cliente=self.cliente)
+        do_supervisor = self._venda(quando, self.supervisor, forma='DINHEIRO')
+        cancelada = self._venda(quando, self.supervisor, status_venda='CANCELADA')
+
+        self.assertEqual(self._ids(cliente_nome='silva'), {do_cliente})
+        self.assertEqual(self._ids(vendedor_username='atendente1'), {do_cliente})
+        self.assertEqual(self._ids(statusVenda='CANCELADA'), {cancelada})
+        self.assertEqual(self._ids(vendedor_username='supervisor', formaPagamento='DINHEIRO'), {do_supervisor})
+
+
+
+class PaginacaoKeysetTests(APITestCase):
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(username='supervisor', password='senha')
+        self.client.force_authenticate(self.usuario)
+
+    def _percorrer(self, url, params=None):
+        """Segue os links 'next' e devolve os ids na ordem recebida e a última resposta."""
+        ids = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in response.data['results'])
+            if not response.data['next']:
+                return ids, response
+            response = self.client.get(response.data['next'])
+
+    def test_paginas_de_vendas_com_empates_na_data(self):
+        # Três vendas por instante: o desempate pelo id não pode perder nem repetir linhas
+        clientes = [None, Cliente.objects.create(nome='Ana'), Cliente.objects.create(nome='Bruno')]
+        for i in range(30):
+            venda = Venda.objects.create(usuario=self.usuario, cliente=clientes[i % 3])
+            Venda.objects.filter(pk=venda.pk).update(dataHoraVenda=datetime(2025, 5, 1 + i // 3, tzinfo=dt_timezone.utc))
+        esperado = list(Venda.objects.order_by('-dataHoraVenda', '-id').values_list('id', flat=True))
+
+        ids, ultima = self._percorrer('/api/vendas/', {'page_size': 4})
+        self.assertEqual(ids, esperado)
+
+        # Voltando pelos links 'previous' a partir da última página
+        anteriores = []
+        response = ultima
+        while response.data['previous']:
+            response = self.client.get(response.data['previous'])
+            anteriores[:0] = [item['id'] for item in response.data['results']]
+        self.assertEqual(anteriores + [item['id'] for item in ultima.data['results']], esperado)
+
+        # Ordenação por campo anulável (vendas sem cliente)
+        ids, _ = self._percorrer('/api/vendas/', {'page_size': 7, 'ordering': '-cliente__nome'})
+        self.assertEqual(ids, list(Venda.objects.order_by('-cliente__nome', '-id').values_list('id', flat=True)))
+
+    def test_paginas_profundas_custam_o_mesmo_numero_de_queries(self):
+        criar_produtos(50)
+        primeira = self.client.get('/api/produtos/', {'page_size': 5})
+        self.assertEqual([p['nomeProduto'] for p in primeira.data['results']],
+                         list(Produto.objects.order_by('nomeProduto', 'id').values_list('nomeProduto', flat=True)[:5]))
+        url = primeira.data['next']
+        for _ in range(8):
+            url = self.client.get(url).data['next']
+        with self.assertNumQueries(2): # Versões do catálogo (ETag) + a página
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_cursor_invalido(self):
+        response = self.client.get('/api/produtos/', {'cursor': 'invalido'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_adulterado(self):
+        def cursor(posicao):
+            return base64.urlsafe_b64encode(json.dumps({'p': posicao, 'r': 0}).encode()).decode()
+        for url, params, posicao in (
+            ('/api/vendas/', {}, ['ontem', 5]), # dataHoraVenda
+            ('/api/produtos/', {'ordering': 'valorUnitario'}, ['caro', 1]), # Decimal
+            ('/api/produtos/', {}, ['Produto', 'abc']), # id
+            ('/api/produtos/', {}, ['Produto', 1.5]),
+            ('/api/produtos/', {}, [['Produto'], 1]),
+            ('/api/produtos/', {'search': 'produto'}, ['alta', 1]), # Relevância (anotação)
+            ('/api/produtos/', {}, ['Produto']), # Tamanho errado
+        ):
+            response = self.client.get(url, {**params, 'cursor': cursor(posicao)})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, posicao)
+        response = self.client.get('/api/vendas/', {'cursor': cursor(['2025-05-01 00:00:00+00:00', 5])})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+
+class PapeisNoTokenTests(APITestCase):
+    def setUp(self):
+        self.estoquista = Usuario.objects.create_user(username='estoquista', password='senha')
+        self.estoquista.groups.add(Group.objects.create(name='ESTOQUISTA'))
+        Group.objects.create(name='ATENDENTE')
+
+    def _login(self):
+        response = self.client.post('/api/token/', {'username': 'estoquista', 'password': 'senha'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_claims_de_papeis_e_autorizacao_sem_queries(self):
+        tokens = self._login()
+        access = AccessToken(tokens['access'])
+        self.assertEqual(access['groups'], ['ESTOQUISTA'])
+        self.assertFalse(access['is_superuser'])
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        # Autenticação + IsSupervisorUser | IsEstoquistaUser sem consultas:
+        # só a validação de unicidade do nome e o INSERT da categoria
+        with self.assertNumQueries(2):
+            response = self.client.post('/api/categorias/', {'nomeCategoria': 'Consoles'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get('/api/usuarios/me/')
+        self.assertEqual(response.data['username'], 'estoquista')
+        response = self.client.post('/api/clientes/', {'nome': 'Cliente'}) # Exige SUPERVISOR ou ATENDENTE
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_refresh_propaga_mudanca_de_grupos(self):
+        tokens = self._login()
+        self.estoquista.groups.set([Group.objects.get(name='ATENDENTE')])
+
+        # O token antigo continua com os papéis do login até expirar...
+        self.assertEqual(AccessToken(tokens['access'])['groups'], ['ESTOQUISTA'])
+        # ...e o refresh emite um token de acesso com os grupos atuais
+        response = self.client.post('/api/token/refresh/', {'refresh': tokens['refresh']})
+        self.assertEqual(AccessToken(response.data['access'])['groups'], ['ATENDENTE'])
+
+    def test_venda_criada_com_usuario_do_token(self):
+        self.estoquista.groups.add(Group.objects.get(name='ATENDENTE'))
+        produto = criar_produtos(1)[0]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self._login()['access']}")
+        response = self.client.post('/api/vendas/', {
+            'formaPagamento': 'PIX',
+            'itens': [{'produto_id': produto.id, 'quantidade': 1, 'precoUnitarioVenda': '10.00'}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['usuario_username'], 'estoquista')
+        self.assertEqual(Venda.objects.get().usuario, self.estoquista)
+
+
+
+class ResumoVendasTests(APITestCase):
+    def setUp(self):
+        self.supervisor = Usuario.objects.create_user(username='supervisor', password='senha')
+        self.supervisor.groups.add(Group.objects.create(name='SUPERVISOR'))
+        self.atendente = Usuario.objects.create_user(username='atendente', password='senha')
+        self.produtos = criar_produtos(2, estoque=100)
+        self.client.force_authenticate(self.supervisor)
+
+    def _venda(self, usuario, forma, quantidade, quando):
+        serializer = VendaSerializer(data={
+            'formaPagamento': forma,
+            'statusVenda': 'CONCLUIDA',
+            'itens': [{'produto_id': self.produtos[0].id, 'quantidade': quantidade, 'precoUnitarioVenda': '10.00'}],
+        })
+        serializer.is_valid(raise_exception=True)
+        with mock.patch('django.utils.timezone.now', return_value=quando):
+            return serializer.save(usuario=usuario)
+
+    def test_deltas_aplicados_em_ordem_fixa(self):
+        dia = datetime(2025, 5, 1).date()
+        chaves = [
+            (dia, 11, self.supervisor.id, 'PIX', 'CONCLUIDA'), (dia, 10, self.atendente.id, 'PIX', 'CONCLUIDA'),
+            (dia, 10, self.supervisor.id, 'DINHEIRO', 'CONCLUIDA'),
+        ]
+        aplicar_deltas_resumo({chave: (1, Decimal('10.00')) for chave in chaves})
+        # As linhas são criadas (e travadas) na ordem das chaves, não na ordem do dict
+        criadas = list(VendaResumoDiario.objects.order_by('id').values_list('hora', 'usuario_id', 'formaPagamento'))
+        self.assertEqual(criadas, sorted((h, u, f) for _, h, u, f, _ in chaves))
+
+    def test_resumo_acompanha_criacao_e_cancelamento(self):
+        dia1 = datetime(2025, 5, 1, 10, 30, tzinfo=dt_timezone.utc)
+        dia2 = datetime(2025, 5, 2, 15, 0, tzinfo=dt_timezone.utc)
+        self._venda(self.atendente, 'PIX', 1, dia1)
+        self._venda(self.atendente, 'DINHEIRO', 3, dia1)
+        cancelada = self._venda(self.supervisor, 'PIX', 2, dia2)
+
+        response = self.client.put(f'/api/vendas/{cancelada.id}/', {'statusVenda': 'CANCELADA', 'itens': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get('/api/vendas/resumo/', {'agrupar_por': 'dia,statusVenda'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [
+            {'dia': '2025-05-01', 'statusVenda': 'CONCLUIDA', 'receita': '40.00', 'quantidade_vendas': 2, 'ticket_medio': '20.00'},
+            {'dia': '2025-05-02', 'statusVenda': 'CANCELADA', 'receita': '20.00', 'quantidade_vendas': 1, 'ticket_medio': '20.00'},
+        ])
+
+        response = self.client.get('/api/vendas/resumo/', {
+            'agrupar_por': 'hora,vendedor,formaPagamento', 'statusVenda': 'CONCLUIDA',
+            'data_inicio': '2025-05-01', 'data_fim': '2025-05-01',
+        })
+        self.assertEqual([(l['hora'], l['vendedor'], l['formaPagamento'], l['receita']) for l in response.data],
+                         [(10, 'atendente', 'DINHEIRO', '30.00'), (10, 'atendente', 'PIX', '10.00')])
+
+    def test_reconstrucao_igual_a_manutencao_incremental(self):
+        for i in range(6):
+            self._venda(self.atendente if i % 2 else self.supervisor, 'PIX' if i % 3 else None, i + 1,
+                        datetime(2025, 5, 1 + i // 2, 9 + i, tzinfo=dt_timezone.utc))
+        campos = ('data', 'hora', 'usuario_id', 'formaPagamento', 'statusVenda', 'quantidadeVendas', 'valorTotal')
+        incremental = sorted(VendaResumoDiario.objects.values_list(*campos))
+
+        campos_produtos = ('produto_id', 'data', 'quantidadeVendida', 'receita')
+        incremental_produtos = sorted(ProdutoVendaDiaria.objects.values_list(*campos_produtos))
+
+        call_command('reconstruir_resumo_vendas', stdout=StringIO())
+        self.assertEqual(sorted(VendaResumoDiario.objects.values_list(*campos)), incremental)
+        self.assertEqual(sorted(ProdutoVendaDiaria.objects.values_list(*campos_produtos)), incremental_produtos)
+
+    def test_agrupamento_invalido(self):
+        response = self.client.get('/api/vendas/resumo/', {'agrupar_por': 'produto'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ProdutosMaisVendidosTests(APITestCase):
+    def setUp(self):
+        self.supervisor = Usuario.objects.create_user(username='supervisor', password='senha')
+        self.supervisor.groups.add(Group.objects.create(name='SUPERVISOR'))
+        self.produtos = criar_produtos(3, estoque=100)
+        acessorios = CategoriaProduto.objects.create(nomeCategoria='Acessórios')
+        Produto.objects.filter(pk=self.produtos[2].pk).update(categoria=acessorios)
+        self.client.force_authenticate(self.supervisor)
+
+    def _venda(self, quantidades, quando, preco='10.00'):
+        serializer = VendaSerializer(data={
+            'formaPagamento': 'PIX',
+            'itens': [
+                {'produto_id': self.produtos[i].id, 'quantidade': qtd, 'precoUnitarioVenda': preco}
+                for i, qtd in quantidades.items()
+            ],
+        })
+        serializer.is_valid(raise_exception=True)
+        with mock.patch('django.utils.timezone.now', return_value=quando):
+            return serializer.save(usuario=self.supervisor)
+
+    def test_ranking_por_quantidade_e_receita(self):
+        dia = datetime(2025, 5, 1, 10, tzinfo=dt_timezone.utc)
+        self._venda({0: 1, 1: 4}, dia)
+        self._venda({0: 2, 2: 1}, dia, preco='100.00')
+        cancelada = self._venda({2: 10}, dia)
+        response = self.client.put(f'/api/vendas/{cancelada.id}/', {'statusVenda': 'CANCELADA', 'itens': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get('/api/produtos/mais-vendidos/', {'data_inicio': '2025-05-01', 'data_fim': '2025-05-01'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(l['produto_id'], l['quantidade_vendida'], l['receita']) for l in response.data], [
+            (self.produtos[1].id, 4, '40.00'), (self.produtos[0].id, 3, '210.00'), (self.produtos[2].id, 1, '100.00'),
+        ])
+
+        response = self.client.get('/api/produtos/mais-vendidos/', {'ordenar_por': 'receita', 'limite': 1})
+        self.assertEqual([l['produto_id'] for l in response.data], [self.produtos[0].id])
+
+        response = self.client.get('/api/produtos/mais-vendidos/', {'data_inicio': '2025-05-02'})
+        self.assertEqual(response.data, [])
+
+    def test_receita_por_categoria(self):
+        dia = datetime(2025, 5, 1, 10, tzinfo=dt_timezone.utc)
+        self._venda({0: 1, 1: 1, 2: 5}, dia)
+        response = self.client.get('/api/categorias/receita/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(l['nomeCategoria'], l['quantidade_vendida'], l['receita']) for l in response.data],
+                         [('Acessórios', 5, '50.00'), ('Jogos', 2, '20.00')])
+
+    def test_remover_item_subtrai_do_ranking(self):
+        venda = self._venda({0: 2, 1: 3}, timezone.now())
+        item = venda.itens.get(produto=self.produtos[1])
+        response = self.client.post(f'/api/vendas/{venda.id}/autorizar-excluir-item/', {'item_venda_id': item.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(ProdutoVendaDiaria.objects.values_list('produto_id', 'quantidadeVendida')),
+                         [(self.produtos[0].id, 2)])
+
+    def test_vendidos_30d_na_listagem_de_produtos(self):
+        self._venda({0: 2}, timezone.now())
+        self._venda({0: 5}, timezone.now() - timedelta(days=45))
+        response = self.client.get('/api/produtos/', {'vendidos_30d': '1'})
+        vendidos = {p['id']: p['vendidos_30d'] for p in response.data['results']}
+        self.assertEqual(vendidos, {self.produtos[0].id: 2, self.produtos[1].id: 0, self.produtos[2].id: 0})
+
+        response = self.client.get('/api/produtos/')
+        self.assertNotIn('vendidos_30d', response.data['results'][0])
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.client.get('/api/produtos/mais-vendidos/', {'ordenar_por': 'nome'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/api/produtos/mais-vendidos/', {'data_inicio': '01/05/2025'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+
+class CancelamentoEmLoteTests(APITestCase):
+    def setUp(self):
+        self.supervisor = Usuario.objects.create_user(username='supervisor', password='senha')
+        self.supervisor.groups.add(Group.objects.create(name='SUPERVISOR'))
+        self.produtos = criar_produtos(3, estoque=50)
+        self.client.force_authenticate(self.supervisor)
+
+    def _venda(self, quantidades):
+        serializer = VendaSerializer(data={
+            'formaPagamento': 'PIX',
+            'itens': [
+                {'produto_id': self.produtos[i].id, 'quantidade': qtd, 'precoUnitarioVenda': '10.00'}
+                for i, qtd in quantidades.items()
+            ],
+        })
+        serializer.is_valid(raise_exception=True)
+        return serializer.save(usuario=self.supervisor)
+
+    def test_cancela_vendas_e_repoe_estoque(self):
+        vendas = [self._venda({0: 2, 1: 1}), self._venda({0: 3}), self._venda({2: 4})]
+        ja_cancelada = self._venda({1: 5})
+        self.client.post('/api/vendas/cancelar-lote/', {'vendas_ids': [ja_cancelada.id]}, format='json')
+
+        response = self.client.post('/api/vendas/cancelar-lote/', {
+            'vendas_ids': [vendas[0].id, vendas[1].id, ja_cancelada.id, 999999, vendas[0].id],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['canceladas'], 2)
+        self.assertEqual([(r['venda_id'], r['resultado']) for r in response.data['resultados']], [
+            (vendas[0].id, 'CANCELADA'), (vendas[1].id, 'CANCELADA'),
+            (ja_cancelada.id, 'JA_CANCELADA'), (999999, 'NAO_ENCONTRADA'),
+        ])
+
+        estoque = dict(Produto.objects.values_list('id', 'quantidadeEstoque'))
+        self.assertEqual(estoque, {self.produtos[0].id: 50, self.produtos[1].id: 50, self.produtos[2].id: 46})
+        self.assertEqual(
+            set(Venda.objects.filter(statusVenda='CANCELADA').values_list('id', 'statusPagamento')),
+            {(v.id, 'CANCELADO_ESTORNADO') for v in (vendas[0], vendas[1], ja_cancelada)}
+        )
+        # Resumos iguais aos que a reconstrução produziria
+        self.assertEqual(list(ProdutoVendaDiaria.objects.values_list('produto_id', 'quantidadeVendida')),
+                         [(self.produtos[2].id, 4)])
+        self.assertEqual(sorted(VendaResumoDiario.objects.values_list('statusVenda', 'quantidadeVendas', 'valorTotal')),
+                         [('CANCELADA', 3, Decimal('110.00')), ('EM_ABERTO', 1, Decimal('40.00'))])
+
+    def test_numero_de_queries_nao_depende_do_tamanho_do_lote(self):
+        contagens = []
+        # O primeiro lote também cria a linha CANCELADA do resumo; os seguintes só a atualizam
+        for tamanho in (2, 2, 20):
+            ids = [self._venda({0: 1, 1: 1, 2: 1}).id for _ in range(tamanho)]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post('/api/vendas/cancelar-lote/', {'vendas_ids': ids}, format='json')
+            self.assertEqual(response.data['canceladas'], tamanho)
+            contagens.append(len(queries))
+        self.assertEqual(contagens[1], contagens[2])
+
+    def test_requisicao_invalida(self):
+        for corpo in ({}, {'vendas_ids': []}, {'vendas_ids': ['abc']}, {'vendas_ids': 5}):
+            response = self.client.post('/api/vendas/cancelar-lote/', corpo, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_apenas_supervisor(self):
+        atendente = Usuario.objects.create_user(username='atendente', password='senha')
+        atendente.groups.add(Group.objects.create(name='ATENDENTE'))
+        self.client.force_authenticate(atendente)
+        venda = self._venda({0: 1})
+        response = self.client.post('/api/vendas/cancelar-lote/', {'vendas_ids': [venda.id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TransicoesStatusVendaTests(APITestCase):
+    def setUp(self):
+        self.supervisor = Usuario.objects.create_user(username='supervisor', password='senha')
+        self.supervisor.groups.add(Group.objects.create(name='SUPERVISOR'))
+        self.produto = criar_produtos(1, estoque=10)[0]
+        self.client.force_authenticate(self.supervisor)
+        serializer = VendaSerializer(data={
+            'formaPagamento': 'PIX', 'statusVenda': 'CONCLUIDA',
+            'itens': [{'produto_id': self.produto.id, 'quantidade': 4, 'precoUnitarioVenda': '10.00'}],
+        })
+        serializer.is_valid(raise_exception=True)
+        self.venda = serializer.save(usuario=self.supervisor)
+
+    def _cancelar(self, venda):
+        serializer = VendaSerializer(venda, data={'statusVenda': 'CANCELADA'}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def test_cancelamento_repetido_estorna_uma_vez(self):
+        for _ in range(3): # O desktop repetindo o PUT após um timeout
+            response = self.client.put(f'/api/vendas/{self.venda.id}/', {'statusVenda': 'CANCELADA', 'itens': []}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['statusVenda'], 'CANCELADA')
+        self.produto.refresh_from_db()
+        self.assertEqual(self.produto.quantidadeEstoque, 10)
+
+    def test_cancelamento_com_leitura_desatualizada_nao_estorna_de_novo(self):
+        # Dois supervisores abriram a mesma venda; o segundo grava depois que o primeiro já cancelou
+        lida_pelo_segundo = Venda.objects.get(pk=self.venda.pk)
+        self._cancelar(Venda.objects.get(pk=self.venda.pk))
+        venda = self._cancelar(lida_pelo_segundo)
+
+        self.assertEqual((venda.statusVenda, venda.statusPagamento), ('CANCELADA', 'CANCELADO_ESTORNADO'))
+        self.produto.refresh_from_db()
+        self.assertEqual(self.produto.quantidadeEstoque, 10)
+        self.assertEqual(list(VendaResumoDiario.objects.values_list('statusVenda', 'quantidadeVendas')), [('CANCELADA', 1)])
+
+    def test_conflito_quando_a_venda_mudou_para_outro_estado(self):
+        lida_antes = Venda.objects.get(pk=self.venda.pk)
+        Venda.objects.filter(pk=self.venda.pk).update(formaPagamento='DINHEIRO')
+        serializer = VendaSerializer(lida_antes, data={'formaPagamento': 'CARTAO_DEBITO'}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        with self.assertRaises(VendaAlteradaConcorrentemente):
+            serializer.save()
+
+    def test_transicao_invalida_rejeitada(self):
+        self._cancelar(self.venda)
+        response = self.client.put(f'/api/vendas/{self.venda.id}/', {'statusVenda': 'CONCLUIDA', 'itens': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('statusVenda', response.data)
+        self.venda.refresh_from_db()
+        self.assertEqual(self.venda.statusVenda, 'CANCELADA')
+
+
+class RemocaoItensVendaTests(APITestCase):
+    def setUp(self):
+        self.supervisor = Usuario.objects.create_user(username='supervisor', password='senha')
+        self.supervisor.groups.add(Group.objects.create(name='SUPERVISOR'))
+        self.produtos = criar_produtos(30, estoque=10)
+        self.client.force_authenticate(self.supervisor)
+
+    def _venda(self, linhas):
+        serializer = VendaSerializer(data={
+            'formaPagamento': 'PIX',
+            'itens': [
+                {'produto_id': p.id, 'quantidade': 2, 'precoUnitarioVenda': f'{i + 1}.50'}
+                for i, p in enumerate(self.produtos[:linhas])
+            ],
+        })
+        serializer.is_valid(raise_exception=True)
+        return serializer.save(usuario=self.supervisor)
+
+    def test_remove_item_estorna_e_recalcula_total(self):
+        venda = self._venda(3) # 2 x (1.50 + 2.50 + 3.50) = 15.00
+        item = venda.itens.get(produto=self.produtos[1])
+        response = self.client.post(f'/api/vendas/{venda.id}/autorizar-excluir-item/', {'item_venda_id': item.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['valorTotalVenda'], '10.00')
+        self.assertEqual(len(response.data['itens']), 2)
+        self.assertEqual(Produto.objects.get(pk=self.produtos[1].pk).quantidadeEstoque, 10)
+        self.assertEqual(Produto.objects.get(pk=self.produtos[0].pk).quantidadeEstoque, 8)
+        self.assertEqual(VendaResumoDiario.objects.get().valorTotal, Decimal('10.00'))
+
+    def test_remove_varios_itens_de_uma_vez(self):
+        venda = self._venda(3)
+        ids = list(venda.itens.order_by('id').values_list('id', flat=True))
+        response = self.client.post(f'/api/vendas/{venda.id}/autorizar-excluir-itens/', {'itens_venda_ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['valorTotalVenda'], '0.00')
+        self.assertEqual(response.data['itens'], [])
+        self.assertTrue(all(p.quantidadeEstoque == 10 for p in Produto.objects.all()))
+        self.assertFalse(ProdutoVendaDiaria.objects.exists())
+
+    def test_item_de_outra_venda_nao_remove_nada(self):
+        venda, outra = self._venda(2), self._venda(1)
+        ids = [venda.itens.first().id, outra.itens.first().id]
+        response = self.client.post(f'/api/vendas/{venda.id}/autorizar-excluir-itens/', {'itens_venda_ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data['itens_venda_ids'], [outra.itens.first().id])
+        self.assertEqual(venda.itens.count(), 2)
+
+    def test_venda_cancelada_nao_estorna_de_novo(self):
+        venda = self._venda(1)
+        self.client.put(f'/api/vendas/{venda.id}/', {'statusVenda': 'CANCELADA', 'itens': []}, format='json')
+        item = venda.itens.get()
+        response = self.client.post(f'/api/vendas/{venda.id}/autorizar-excluir-item/', {'item_venda_id': item.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Produto.objects.get(pk=self.produtos[0].pk).quantidadeEstoque, 10)
+
+    def test_numero_de_queries_nao_depende_do_numero_de_itens(self):
+        contagens = []
+        for linhas in (2, 2, 30):
+            venda = self._venda(linhas)
+            ids = list(venda.itens.values_list('id', flat=True))[:linhas // 2]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(f'/api/vendas/{venda.id}/autorizar-excluir-itens/', {'itens_venda_ids': ids}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            contagens.append(len(queries))
+        self.assertEqual(contagens[1], contagens[2])
+
+
+class BuscaPorCodigoDeBarrasTests(APITestCase):
+    def setUp(self):
+        self.atendente = Usuario.objects.create_user(username='atendente', password='senha')
+        self.atendente.groups.add(Group.objects.create(name='ATENDENTE'))
+        self.produtos = criar_produtos(3)
+        self.client.force_authenticate(self.atendente)
+
+    def test_busca_exata_em_uma_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/produtos/barcode/{self.produtos[1].codigoBarras}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], self.produtos[1].id)
+        self.assertEqual(response.data['categoria']['nomeCategoria'], 'Jogos')
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('LIKE', queries[0]['sql'].upper()) # Igualdade no índice, não o icontains do ?search=
+
+    def test_codigo_inexistente_ou_parcial(self):
+        for codigo in ('0000000000000', self.produtos[1].codigoBarras[:6]):
+            response = self.client.get(f'/api/produtos/barcode/{codigo}/')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BuscaProdutosTests(APITestCase):
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(username='atendente', password='senha')
+        self.client.force_authenticate(self.usuario)
+        categoria = CategoriaProduto.objects.create(nomeCategoria='Acessórios')
+        def produto(nome, **campos):
+            return Produto.objects.create(nomeProduto=nome, valorUnitario=Decimal('10.00'), categoria=categoria, **campos)
+        self.controle = produto('Controle sem fio', plataforma='PlayStation 5', descricao='Acessório oficial', codigoBarras='7890000000011')
+        self.headset = produto('Headset Acessório Gamer', plataforma='PC')
+        self.capa = produto('Capa para controle', descricao='Acessório de proteção')
+        self.jogo = produto('Jogo de Ação', plataforma='PlayStation 5')
+
+    def _buscar(self, termo, **params):
+        response = self.client.get('/api/produtos/', {'search': termo, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [p['id'] for p in response.data['results']]
+
+    def test_ignora_acentos_e_maiusculas(self):
+        esperados = {self.controle.id, self.headset.id, self.capa.id}
+        self.assertEqual(set(self._buscar('acessorio')), esperados)
+        self.assertEqual(set(self._buscar('ACESSÓRIO')), esperados)
+        self.assertEqual(self._buscar('acao'), [self.jogo.id])
+
+    def test_todos_os_termos_por_prefixo(self):
+        self.assertEqual(set(self._buscar('play')), {self.controle.id, self.jogo.id})
+        self.assertEqual(self._buscar('contr play'), [self.controle.id])
+        self.assertEqual(self._buscar('7890000000011'), [self.controle.id])
+        self.assertEqual(self._buscar('xbox'), [])
+
+    def test_ordena_por_relevancia(self):
+        # 'acessorio' no nome (peso 3) vem antes de 'acessorio' só na descrição (peso 1)
+        resultado = self._buscar('acessorio')
+        self.assertEqual(resultado[0], self.headset.id)
+        # ?ordering= explícito continua valendo
+        self.assertEqual(self._buscar('acessorio', ordering='nomeProduto'), [self.capa.id, self.controle.id, self.headset.id])
+
+    def test_paginacao_dos_resultados_por_relevancia(self):
+        vistos, url, params = [], '/api/produtos/', {'search': 'acessorio', 'page_size': 1}
+        while url:
+            response = self.client.get(url, params)
+            vistos += [p['id'] for p in response.data['results']]
+            url, params = response.data['next'], None
+        self.assertEqual(vistos, self._buscar('acessorio'))
+
+    def test_termos_que_o_fulltext_nao_indexa(self):
+        self.assertEqual(separar_termos(['fifa', '2']), (['fifa'], ['2']))
+        self.assertEqual(consulta_fulltext(*separar_termos(['the', 'last', 'of', 'us'])), '+last* the* of* us*')
+        self.assertEqual(separar_termos(['de', 'x']), (['de', 'x'], []))
+        # Termo curto com outros termos: opcional, como no FULLTEXT do MySQL
+        self.assertEqual(set(self._buscar('controle x')), {self.controle.id, self.capa.id})
+        # Só termos curtos: todos obrigatórios, pelo começo das palavras, nos dois caminhos
+        self.assertEqual(self._buscar('de'), [self.jogo.id, self.capa.id]) # No nome pesa mais que na descrição
+        with mock.patch('vendas_api.busca.usa_fulltext', return_value=True):
+            self.assertEqual(set(self._buscar('de')), {self.capa.id, self.jogo.id}) # "de proteção", "Jogo de Ação"
+            self.assertEqual(self._buscar('ao'), []) # "acao" contém "ao", mas nenhuma palavra começa com "ao"
+
+    def test_indice_acompanha_alteracoes_do_produto(self):
+        self.jogo.nomeProduto = 'Jogo de Corrida'
+        self.jogo.save()
+        self.assertEqual(self._buscar('acao'), [])
+        self.assertEqual(self._buscar('corrida'), [self.jogo.id])
+
+
+class BuscaClientesTests(APITestCase):
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(username='atendente', password='senha')
+        self.client.force_authenticate(self.usuario)
+        self.joao = Cliente.objects.create(nome='João da Silva', cpf='123.456.789-00', telefone='(11) 98765-4321', email='joao@exemplo.com')
+        self.joana = Cliente.objects.create(nome='Joana Souza', cpf='98765432100', telefone='11 3333-4444')
+        self.ana = Cliente.objects.create(nome='Ana Joana Lima')
+
+    def _buscar(self, termo):
+        response = self.client.get('/api/clientes/', {'search': termo})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [c['id'] for c in response.data['results']]
+
+    def test_cpf_e_telefone_por_digitos(self):
+        self.assertEqual(self._buscar('12345678900'), [self.joao.id])
+        self.assertEqual(self._buscar('123.456'), [self.joao.id])
+        self.assertEqual(self._buscar('987.654.321-00'), [self.joana.id])
+        self.assertEqual(self._buscar('(11) 9876'), [self.joao.id])
+        self.assertEqual(self._buscar('11'), [self.joana.id, self.joao.id]) # Prefixo de telefone dos dois
+
+    def test_nome_por_prefixo_sem_acento(self):
+        self.assertEqual(self._buscar('joao'), [self.joao.id])
+        self.assertEqual(self._buscar('JOÃO DA'), [self.joao.id])
+        self.assertEqual(self._buscar('jo'), [self.joana.id, self.joao.id]) # Ordem de nomeNormalizado
+        self.assertEqual(self._buscar('lima'), []) # Só o começo do nome
+
+    def test_email(self):
+        self.assertEqual(self._buscar('JOAO@exemplo'), [self.joao.id])
+
+    def test_ordem_do_indice_so_na_busca_por_nome(self):
+        view = ClienteViewSet()
+        for termo, ordem in (('jo', ('nomeNormalizado', 'id')), ('123.456', ClienteViewSet.ORDENACAO_PADRAO),
+                             ('joao@', ClienteViewSet.ORDENACAO_PADRAO), ('', ClienteViewSet.ORDENACAO_PADRAO)):
+            view.request = Request(RequestFactory().get('/api/clientes/', {'search': termo}))
+            self.assertEqual(view.ordering, ordem, termo)
+
+    def test_colunas_acompanham_alteracoes_e_nao_aparecem_na_api(self):
+        self.joana.cpf = '111.222.333-44'
+        self.joana.save()
+        self.assertEqual(self._buscar('11122233344'), [self.joana.id])
+        response = self.client.get(f'/api/clientes/{self.joana.id}/')
+        self.assertNotIn('cpfDigitos', response.data)
+        self.assertEqual(response.data['cpf'], '111.222.333-44')
+
+
+class ETagCatalogoTests(APITestCase):
+    def setUp(self):
+        caches['referencia'].clear()
+        self.atendente = Usuario.objects.create_user(username='atendente', password='senha')
+        self.atendente.groups.add(Group.objects.create(name='ATENDENTE'))
+        self.client.force_authenticate(self.atendente)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.produtos = criar_produtos(3)
+
+    def _etag(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['ETag'].startswith('"'))
+        return response['ETag']
+
+    def test_304_sem_ler_as_linhas(self):
+        for url in ('/api/produtos/', '/api/categorias/', '/api/clientes/', '/api/grupos/'):
+            etag = self._etag(url)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response['ETag'], etag)
+            self.assertEqual(len(queries), 1) # Só a leitura das versões
+            self.assertIn('vendas_api_versaotabela', queries[0]['sql'])
+
+    def test_etag_depende_da_url(self):
+        self.assertNotEqual(self._etag('/api/produtos/'), self._etag('/api/produtos/', {'page_size': 1}))
+
+    def test_gravacoes_mudam_o_etag(self):
+        url_produto = f'/api/produtos/{self.produtos[0].id}/'
+        etags = {self._etag('/api/produtos/'), self._etag(url_produto)}
+        categoria = self.produtos[0].categoria
+        with self.captureOnCommitCallbacks(execute=True):
+            categoria.nomeCategoria = 'Consoles' # Vem aninhada em cada produto
+            categoria.save()
+        etags |= {self._etag('/api/produtos/'), self._etag(url_produto)}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.produtos[2].delete()
+        etags.add(self._etag('/api/produtos/'))
+        self.assertEqual(len(etags), 5)
+
+        etag_clientes = self._etag('/api/clientes/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Cliente.objects.create(nome='Maria')
+        self.assertNotEqual(self._etag('/api/clientes/'), etag_clientes)
+
+    def test_venda_muda_o_etag_dos_produtos(self):
+        # A baixa de estoque é um UPDATE em massa, sem post_save: incrementa a versão explicitamente
+        etag = self._etag('/api/produtos/')
+        dados = {
+            'formaPagamento': 'PIX', 'statusVenda': 'CONCLUIDA',
+            'itens': [{'produto_id': self.produtos[0].id, 'quantidade': 1, 'precoUnitarioVenda': '10.00'}],
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/vendas/', dados, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.get('/api/produtos/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['quantidadeEstoque'], 9)
+
+    def test_vendidos_30d_sem_etag(self):
+        response = self.client.get('/api/produtos/', {'vendidos_30d': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class SincronizacaoIncrementalTests(APITestCase):
+    def setUp(self):
+        self.atendente = Usuario.objects.create_user(username='atendente', password='senha')
+        self.atendente.groups.add(Group.objects.create(name='ATENDENTE'))
+        self.client.force_authenticate(self.atendente)
+        self.produtos = criar_produtos(5)
+        self._envelhecer()
+
+    def _envelhecer(self):
+        # Fora da margem de segurança, para que o cursor final avance até as próprias linhas
+        Produto.objects.update(atualizadoEm=timezone.now() - timedelta(hours=1))
+        Cliente.objects.update(atualizadoEm=timezone.now() - timedelta(hours=1))
+
+    def _sincronizar(self, cursor='0', url='/api/produtos/', page_size=2):
+        alterados, removidos, paginas = [], [], 0
+        while True:
+            response = self.client.get(url, {'changed_since': cursor, 'page_size': page_size})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            alterados += [linha['id'] for linha in response.data['alterados']]
+            removidos += response.data['removidos']
+            cursor = response.data['cursor']
+            paginas += 1
+            if not response.data['tem_mais']:
+                return alterados, removidos, cursor, paginas
+
+    def test_rodada_inicial_paginada_e_depois_vazia(self):
+        alterados, removidos, cursor, paginas = self._sincronizar()
+        self.assertEqual(sorted(alterados), sorted(p.id for p in self.produtos))
+        self.assertEqual((removidos, paginas), ([], 3))
+        self.assertEqual(self._sincronizar(cursor)[:2], ([], []))
+
+    def test_alteracoes_remocoes_e_baixa_de_estoque(self):
+        cursor = self._sincronizar()[2]
+        self.produtos[0].nomeProduto = 'Renomeado'
+        self.produtos[0].save()
+        removido_id = self.produtos[1].id
+        self.produtos[1].delete()
+        venda = {
+            'formaPagamento': 'PIX', 'statusVenda': 'CONCLUIDA',
+            'itens': [{'produto_id': self.produtos[2].id, 'quantidade': 1, 'precoUnitarioVenda': '10.00'}],
+        }
+        self.assertEqual(self.client.post('/api/vendas/', venda, format='json').status_code, status.HTTP_201_CREATED)
+
+        alterados, removidos, _, _ = self._sincronizar(cursor)
+        self.assertEqual(sorted(alterados), [self.produtos[0].id, self.produtos[2].id])
+        self.assertEqual(removidos, [removido_id])
+
+    def test_renomear_categoria_reenvia_os_produtos(self):
+        cursor = self._sincronizar()[2]
+        categoria = self.produtos[0].categoria
+        categoria.nomeCategoria = 'Consoles'
+        categoria.save()
+        self.assertEqual(sorted(self._sincronizar(cursor)[0]), sorted(p.id for p in self.produtos))
+
+    def test_clientes_e_margem_de_seguranca(self):
+        joao = Cliente.objects.create(nome='João')
+        maria = Cliente.objects.create(nome='Maria')
+        # Gravadas agora, dentro da margem: o cursor final fica antes delas e elas voltam na próxima consulta
+        alterados, _, cursor, _ = self._sincronizar(url='/api/clientes/')
+        self.assertEqual(alterados, [joao.id, maria.id])
+        self.assertEqual(self._sincronizar(cursor, url='/api/clientes/')[0], [joao.id, maria.id])
+
+        self._envelhecer()
+        cursor = self._sincronizar(url='/api/clientes/')[2]
+        joao_id = joao.id
+        joao.delete()
+        self.assertEqual(self._sincronizar(cursor, url='/api/clientes/')[:2], ([], [joao_id]))
+        self.assertEqual(RegistroRemocao.objects.get().tabela, 'cliente')
+
+    def test_cursor_invalido(self):
+        response = self.client.get('/api/produtos/', {'changed_since': 'invalido'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('changed_since', response.data)
+
+    def test_cursor_com_instante_adulterado(self):
+        for momento in ('ontem', '2024-01-01T10:00:00', 20240101, ''):
+            cursor = base64.urlsafe_b64encode(
+                json.dumps({'t': momento, 'id': 1, 'r': None}).encode()
+            ).decode()
+            with self.subTest(momento=momento):
+                response = self.client.get('/api/produtos/', {'changed_since': cursor})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn('changed_since', response.data)
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'referencia': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'testes-referencia'},
+})
+class CacheReferenciaTests(APITestCase):
+    def setUp(self):
+        caches['referencia'].clear() # As versões recomeçam a cada teste (rollback); as chaves se repetiriam
+        self.supervisor = Usuario.objects.create_user(username='supervisor', password='senha')
+        self.supervisor.groups.add(Group.objects.create(name='SUPERVISOR'))
+        self.client.force_authenticate(self.supervisor)
+        with self.captureOnCommitCallbacks(execute=True):
+            CategoriaProduto.objects.create(nomeCategoria='Jogos')
+
+    def test_acerto_sem_consultar_linhas_e_contadores(self):
+        primeira = self.client.get('/api/categorias/')
+        self.assertEqual(primeira['X-Cache'], 'MISS')
+        with CaptureQueriesContext(connection) as queries:
+            segunda = self.client.get('/api/categorias/')
+        self.assertEqual(segunda['X-Cache'], 'HIT')
+        self.assertEqual(segunda.data, primeira.data)
+        self.assertEqual(segunda['ETag'], primeira['ETag'])
+        self.assertEqual(len(queries), 1) # Só as versões, lidas uma vez para o ETag e a chave
+        self.assertEqual(self.client.get('/api/grupos/')['X-Cache'], 'MISS')
+        self.assertEqual(estatisticas(), {'acertos': 1, 'falhas': 2, 'taxa_acerto': 1 / 3})
+
+    def test_gravacao_invalida(self):
+        self.client.get('/api/categorias/')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/categorias/', {'nomeCategoria': 'Consoles'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.get('/api/categorias/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual([c['nomeCategoria'] for c in response.data['results']], ['Consoles', 'Jogos'])
+
+        self.client.get('/api/grupos/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Group.objects.get(name='SUPERVISOR').delete()
+        response = self.client.get('/api/grupos/')
+        self.assertEqual((response['X-Cache'], response.data['results']), ('MISS', []))
+
+
+    @override_settings(CACHES=settings.CACHES) # O cache configurado no projeto, visto também pelo outro processo
+    def test_comando_le_os_contadores_de_outro_processo(self):
+        caches['referencia'].clear()
+        self.client.get('/api/categorias/')
+        self.client.get('/api/categorias/')
+        # O comando roda em outro processo, como em produção: só vê os contadores de um cache compartilhado
+        saida = subprocess.run(
+            [sys.executable, 'manage.py', 'estatisticas_cache', '--zerar'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout
+        self.assertIn('Acertos: 1  Falhas: 1  Taxa de acerto: 50.0%', saida)
+        self.assertEqual(estatisticas()['acertos'], 0)
+
+    @override_settings(ALLOWED_HOSTS=['testserver', '192.168.0.10'])
+    def test_links_da_paginacao_por_host(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            CategoriaProduto.objects.create(nomeCategoria='Consoles')
+        local = self.client.get('/api/categorias/', {'page_size': 1})
+        pela_rede = self.client.get('/api/categorias/', {'page_size': 1}, HTTP_HOST='192.168.0.10')
+        self.assertEqual((local['X-Cache'], pela_rede['X-Cache']), ('MISS', 'MISS'))
+        self.assertTrue(pela_rede.data['next'].startswith('http://192.168.0.10/api/categorias/'))
+
+class RendererJSONTests(APITestCase):
+    def test_mesma_saida_do_json_padrao(self):
+        usuario = Usuario.objects.create_user(username='atendente', password='senha')
+        produtos = criar_produtos(2, valor='1234.56')
+        venda = Venda.objects.create(usuario=usuario, formaPagamento='PIX', valorTotalVenda=Decimal('2469.12'))
+        ItemVenda.objects.bulk_create(ItemVenda(venda=venda, produto=p, quantidade=1, precoUnitarioVenda=p.valorUnitario) for p in produtos)
+        dados = {
+            'venda': VendaSerializer(venda).data,
+            'decimal': Decimal('10.50'), 'data': timezone.localdate(), 'lazy': Usuario._meta.verbose_name,
+            'utc': datetime(2026, 1, 2, 3, 4, 5, 678000, tzinfo=dt_timezone.utc), 'texto': 'Ação \u2028 fim',
+        }
+        esperado = JSONRenderer().render(dados)
+        self.assertEqual(renderers.ORJSONRenderer().render(dados), esperado)
+        with mock.patch.object(renderers, 'orjson', None): # Sem o pacote opcional
+            self.assertEqual(renderers.ORJSONRenderer().render(dados), esperado)
+
+    def test_parser_na_api(self):
+        usuario = Usuario.objects.create_user(username='supervisor', password='senha')
+        usuario.groups.add(Group.objects.create(name='SUPERVISOR'))
+        self.client.force_authenticate(usuario)
+        response = self.client.post('/api/categorias/', '{"nomeCategoria": "Ação"}', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['nomeCategoria'], 'Ação')
+        response = self.client.post('/api/categorias/', '{"nomeCategoria": ', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CompressaoTests(APITestCase):
+    def setUp(self):
+        caches['referencia'].clear()
+        self.usuario = Usuario.objects.create_user(username='atendente', password='senha')
+        self.client.force_authenticate(self.usuario)
+
+    def test_negociacao(self):
+        self.assertEqual(escolher_codificador('gzip, deflate').nome, 'gzip')
+        self.assertEqual(escolher_codificador('*;q=0.5').nome, 'gzip')
+        self.assertIsNone(escolher_codificador('gzip;q=0, identity'))
+        self.assertIsNone(escolher_codificador(''))
+        with mock.patch('vendas_api.compressao.zstandard', mock.Mock()):
+            self.assertEqual(escolher_codificador('gzip, zstd').nome, 'zstd') # Preferência do servidor
+            self.assertEqual(escolher_codificador('gzip, zstd;q=0.5').nome, 'gzip') # Peso do cliente
+
+    def test_listagem_grande_comprimida_e_etag_fraco(self):
+        criar_produtos(30)
+        response = self.client.get('/api/produtos/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        corpo = gzip.decompress(response.content)
+        self.assertEqual(len(json.loads(corpo)['results']), 30)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertLess(len(response.content), len(corpo) / 4)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        # O terminal devolve o ETag fraco; a comparação do If-None-Match é fraca
+        response = self.client.get('/api/produtos/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_sem_accept_encoding_ou_pequena_nao_comprime(self):
+        criar_produtos(30)
+        self.assertFalse(self.client.get('/api/produtos/').has_header('Content-Encoding'))
+        response = self.client.get('/api/produtos/', {'page_size': 1}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertTrue(response['ETag'].startswith('"'))
+
+    def test_streaming_comprimido_parte_a_parte(self):
+        partes = [f'linha {i};'.encode() * 50 for i in range(5)]
+        middleware = CompressaoMiddleware(lambda request: StreamingHttpResponse(iter(partes), content_type='text/csv'))
+        response = middleware(RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        descompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        # Cada parte já sai descomprimível sozinha (flush), sem esperar o fim do fluxo
+        recebidas = [descompressor.decompress(parte) for parte in response.streaming_content]
+        self.assertEqual(recebidas[:5], partes)
+        self.assertEqual(b''.join(recebidas) + descompressor.flush(), b''.join(partes))
+
+        middleware = CompressaoMiddleware(lambda request: HttpResponse(b'x' * 5000, content_type='image/png'))
+        self.assertFalse(middleware(RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')).has_header('Content-Encoding'))
+
+
+class ImportacaoProdutosTests(APITestCase):
+    def setUp(self):
+        self.estoquista = Usuario.objects.create_user(username='estoquista', password='senha')
+        self.estoquista.groups.add(Group.objects.create(name='ESTOQUISTA'))
+        self.client.force_authenticate(self.estoquista)
+        self.existente = criar_produtos(1, estoque=7)[0] # Categoria 'Jogos', código 7890000000000
+        CategoriaProduto.objects.create(nomeCategoria='Acessórios')
+
+    def _importar(self, corpo, content_type='text/csv', **params):
+        url = '/api/produtos/importar/' + (f"?formato={params['formato']}" if params else '')
+        return self.client.generic('POST', url, corpo.encode('utf-8'), content_type=content_type)
+
+    def test_csv_upsert_e_relatorio_de_erros(self):
+        corpo = (
+            '\ufeffcodigoBarras;nomeProduto;valorUnitario;categoria;plataforma\n'
+            '7890000000000;Jogo Renomeado;59,90;jogos;PS5\n'
+            '111;Controle Sem Fio;199.90;ACESSÓRIOS;\n'
+            '222;Sem Categoria;10;Inexistente;PC\n'
+            '333;;abc;Jogos;PC\n'
+        )
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self._importar(corpo)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {k: response.data[k] for k in ('linhas', 'criados', 'atualizados', 'total_erros')},
+            {'linhas': 4, 'criados': 1, 'atualizados': 1, 'total_erros': 2},
+        )
+        self.assertEqual(response.data['erros'][0], {'linha': 4, 'codigoBarras': '222', 'erros': {'categoria': "Categoria 'Inexistente' não existe."}})
+        self.assertEqual(set(response.data['erros'][1]['erros']), {'nomeProduto'})
+        self.assertTrue(callbacks) # Versão dos produtos incrementada (ETag)
+
+        self.existente.refresh_from_db()
+        # quantidadeEstoque não veio no arquivo: não é alterada
+        self.assertEqual((self.existente.nomeProduto, self.existente.valorUnitario, self.existente.quantidadeEstoque), ('Jogo Renomeado', Decimal('59.90'), 7))
+        novo = Produto.objects.get(codigoBarras='111')
+        self.assertEqual((novo.categoria.nomeCategoria, novo.plataforma, novo.quantidadeEstoque), ('Acessórios', None, 0))
+        # Índice de busca e atualizadoEm também são gravados pelo bulk_create
+        resultado = self.client.get('/api/produtos/', {'search': 'controle sem fio'})
+        self.assertEqual([p['id'] for p in resultado.data['results']], [novo.id])
+        self.assertEqual([p['id'] for p in self.client.get('/api/produtos/', {'search': 'renomeado'}).data['results']], [self.existente.id])
+
+    def test_arquivo_sem_todas_as_colunas_preserva_a_busca(self):
+        self.existente.nomeProduto, self.existente.plataforma, self.existente.descricao = 'Controle', 'PS5', 'Sem fio'
+        self.existente.save()
+        corpo = 'codigoBarras,nomeProduto,valorUnitario,categoria\n7890000000000,Controle,89.90,Jogos\n'
+        self.assertEqual(self._importar(corpo).data['atualizados'], 1)
+        self.existente.refresh_from_db()
+        self.assertEqual(self.existente.documentoBusca, 'controle 7890000000000 ps5 sem fio')
+        resultado = self.client.get('/api/produtos/', {'search': 'ps5'})
+        self.assertEqual([p['id'] for p in resultado.data['results']], [self.existente.id])
+
+    def test_jsonl_em_varios_lotes(self):
+        linhas = [json.dumps({'codigoBarras': f'C{i}', 'nomeProduto': f'Item {i}', 'valorUnitario': '5.00', 'categoria': 'Jogos', 'quantidadeEstoque': i}) for i in range(25)]
+        linhas.insert(3, '{"codigoBarras": ')
+        with mock.patch('vendas_api.importacao.TAMANHO_LOTE_IMPORTACAO', 10):
+            response = self._importar('\n'.join(linhas) + '\n', content_type='application/x-ndjson')
+        self.assertEqual((response.data['criados'], response.data['total_erros']), (25, 1))
+        self.assertEqual(response.data['erros'][0]['linha'], 4)
+        self.assertEqual(Produto.objects.get(codigoBarras='C24').quantidadeEstoque, 24)
+
+    def test_formato_e_permissao(self):
+        self.assertEqual(self._importar('a,b\n1,2\n').status_code, status.HTTP_400_BAD_REQUEST) # Sem as colunas obrigatórias
+        self.assertEqual(self._importar('{}', content_type='application/json').status_code, status.HTTP_400_BAD_REQUEST)
+        corpo = 'codigoBarras,nomeProduto,valorUnitario,categoria\n444,X,1,Jogos\n'
+        self.assertEqual(self._importar(corpo, content_type='application/octet-stream', formato='csv').data['criados'], 1)
+        atendente = Usuario.objects.create_user(username='atendente', password='senha')
+        atendente.groups.add(Group.objects.create(name='ATENDENTE'))
+        self.client.force_authenticate(atendente)
+        self.assertEqual(self._importar(corpo).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ExportacaoVendasTests(APITestCase):
+    def setUp(self):
+        self.supervisor = Usuario.objects.create_user(username='supervisor', password='senha')
+        self.supervisor.groups.add(Group.objects.create(name='SUPERVISOR'))
+        self.client.force_authenticate(self.supervisor)
+        self.produtos = criar_produtos(3)
+        cliente = Cliente.objects.create(nome='Maria, "a cliente"', cpf='123.456.789-00')
+        self.vendas = []
+        for dia, quantidade_itens in ((4, 2), (5, 3), (6, 1), (7, 2)):
+            venda = Venda.objects.create(usuario=self.supervisor, cliente=cliente, statusVenda='CONCLUIDA', formaPagamento='PIX')
+            Venda.objects.filter(pk=venda.pk).update(dataHoraVenda=datetime(2025, 5, dia, 15, 30, tzinfo=dt_timezone.utc))
+            ItemVenda.objects.bulk_create(
+                ItemVenda(venda=venda, produto=self.produtos[i], quantidade=i + 1, precoUnitarioVenda=Decimal('10.00'))
+                for i in range(quantidade_itens)
+            )
+            self.vendas.append(venda)
+
+    def _exportar(self, **params):
+        response = self.client.get('/api/vendas/exportar/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        corpo = b''.join(response.streaming_content).decode()
+        return response, list(csv.reader(corpo.splitlines(), delimiter=params.get('separador', ',')))
+
+    def test_itens_do_periodo_em_janelas(self):
+        with mock.patch('vendas_api.exportacao.TAMANHO_JANELA_EXPORTACAO', 2):
+            response, linhas = self._exportar(data_inicio='2025-05-05', data_fim='2025-05-06')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('itens_vendidos_2025-05-05_2025-05-06.csv', response['Content-Disposition'])
+        cabecalho, linhas = linhas[0], linhas[1:]
+        self.assertEqual(cabecalho[:3], ['venda_id', 'dataHoraVenda', 'statusVenda'])
+        self.assertEqual([int(linha[0]) for linha in linhas], [self.vendas[1].id] * 3 + [self.vendas[2].id])
+        primeira = dict(zip(cabecalho, linhas[1]))
+        self.assertEqual(primeira['dataHoraVenda'], '2025-05-05 15:30:00')
+        self.assertEqual(primeira['cliente'], 'Maria, "a cliente"')
+        self.assertEqual((primeira['nomeProduto'], primeira['categoria']), ('Produto 1', 'Jogos'))
+        self.assertEqual((primeira['quantidade'], primeira['precoUnitarioVenda'], Decimal(primeira['subtotal'])), ('2', '10.00', Decimal('20.00')))
+
+    def test_separador_periodo_vazio_e_permissao(self):
+        _, linhas = self._exportar(separador=';', statusVenda='CONCLUIDA')
+        self.assertEqual(len(linhas), 1 + 8)
+        self.assertEqual(self._exportar(data_inicio='2030-01-01')[1], [linhas[0]]) # Só o cabeçalho
+        self.assertEqual(self.client.get('/api/vendas/exportar/', {'data_inicio': 'ontem'}).status_code, status.HTTP_400_BAD_REQUEST)
+        atendente = Usuario.objects.create_user(username='atendente', password='senha')
+        atendente.groups.add(Group.objects.create(name='ATENDENTE'))
+        self.client.force_authenticate(atendente)
+        self.assertEqual(self.client.get('/api/vendas/exportar/').status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AjusteEstoqueTests(APITestCase):
+    def setUp(self):
+        self.estoquista = Usuario.objects.create_user(username='estoquista', password='senha')
+        self.estoquista.groups.add(Group.objects.create(name='ESTOQUISTA'))
+        self.client.force_authenticate(self.estoquista)
+        self.produtos = criar_produtos(3, estoque=10)
+
+    def test_aplica_contagem_e_devolve_deltas(self):
+        p0, p1, p2 = self.produtos
+        itens = [
+            {'id': p0.id, 'quantidade': 7},
+            {'codigoBarras': p1.codigoBarras, 'quantidade': 10}, # Sem diferença: não é alterado
+            {'codigoBarras': p2.codigoBarras, 'quantidade': 15},
+        ]
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with CaptureQueriesContext(connection) as consultas:
+                response = self.client.post('/api/produtos/ajuste-estoque/', {'itens': itens}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['itens'], response.data['ajustados'], response.data['inalterados']), (3, 2, 1))
+        self.assertEqual(response.data['ajustes'], [
+            {'id': p0.id, 'quantidadeAnterior': 10, 'quantidadeContada': 7, 'delta': -3},
+            {'id': p2.id, 'quantidadeAnterior': 10, 'quantidadeContada': 15, 'delta': 5},
+        ])
+        self.assertEqual(len([c for c in consultas.captured_queries if c['sql'].startswith('UPDATE')]), 1)
+        self.assertTrue(callbacks) # Versão dos produtos incrementada (ETag)
+        estoques = dict(Produto.objects.values_list('pk', 'quantidadeEstoque'))
+        self.assertEqual((estoques[p0.id], estoques[p1.id], estoques[p2.id]), (7, 10, 15))
+        # atualizadoEm muda só nos ajustados: a sincronização incremental os traz
+        p1_antes = p1.atualizadoEm
+        p1.refresh_from_db()
+        p2_antes = p2.atualizadoEm
+        p2.refresh_from_db()
+        self.assertEqual(p1.atualizadoEm, p1_antes)
+        self.assertGreater(p2.atualizadoEm, p2_antes)
+
+    def test_item_invalido_nao_altera_nada(self):
+        p0, p1, _ = self.produtos
+        itens = [
+            {'id': p0.id, 'quantidade': 1},
+            {'codigoBarras': 'inexistente', 'quantidade': 2},
+            {'id': p1.id, 'quantidade': -1},
+            {'id': p0.id, 'quantidade': 3},
+        ]
+        response = self.client.post('/api/produtos/ajuste-estoque/', {'itens': itens}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([(erro['item'], set(erro['erros'])) for erro in response.data['erros']],
+                         [(1, {'codigoBarras'}), (2, {'quantidade'}), (3, {'produto'})])
+        self.assertEqual(set(Produto.objects.values_list('quantidadeEstoque', flat=True)), {10})
+
+    def test_lotes_grandes_e_permissao(self):
+        itens = [{'id': produto.id, 'quantidade': i} for i, produto in enumerate(self.produtos)]
+        with mock.patch('vendas_api.estoque.TAMANHO_LOTE_AJUSTE', 2), CaptureQueriesContext(connection) as consultas:
+            response = self.client.post('/api/produtos/ajuste-estoque/', itens, format='json') # Lista direto também vale
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([ajuste['delta'] for ajuste in response.data['ajustes']], [-10, -9, -8])
+        self.assertEqual(len([c for c in consultas.captured_queries if c['sql'].startswith('UPDATE')]), 2) # Um por lote
+        self.assertEqual(list(Produto.objects.order_by('pk').values_list('quantidadeEstoque', flat=True)), [0, 1, 2])
+
+        atendente = Usuario.objects.create_user(username='atendente', password='senha')
+        atendente.groups.add(Group.objects.create(name='ATENDENTE'))
+        self.client.force_authenticate(atendente)
+        response = self.client.post('/api/produtos/ajuste-estoque/', {'itens': itens}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class MovimentosEstoqueTests(APITestCase):
+    def setUp(self):
+        self.supervisor = Usuario.objects.create_user(username='supervisor', password='senha')
+        self.supervisor.groups.add(Group.objects.create(name='SUPERVISOR'))
+        self.client.force_authenticate(self.supervisor)
+
+    def _vender(self, produto, quantidade, **extras):
+        response = self.client.post('/api/vendas/', {
+            'formaPagamento': 'PIX', 'statusVenda': 'CONCLUIDA',
+            'itens': [{'produto_id': produto.id, 'quantidade': quantidade, 'precoUnitarioVenda': '10.00'}], **extras,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data
+
+    def test_todos_os_caminhos_gravam_no_livro_razao(self):
+        categoria = CategoriaProduto.objects.create(nomeCategoria='Jogos')
+        response = self.client.post('/api/produtos/', {
+            'codigoBarras': '111', 'nomeProduto': 'Jogo', 'valorUnitario': '10.00', 'quantidadeEstoque': 10, 'categoria_id': categoria.id,
+        }, format='json')
+        produto = Produto.objects.get(pk=response.data['id'])
+        self.client.patch(f'/api/produtos/{produto.id}/', {'quantidadeEstoque': 12}, format='json')
+        self.client.patch(f'/api/produtos/{produto.id}/', {'nomeProduto': 'Jogo Renomeado'}, format='json') # Sem movimento
+
+        cancelada_em_lote = self._vender(produto, 3)
+        self.client.post('/api/vendas/cancelar-lote/', {'vendas_ids': [cancelada_em_lote['id']]}, format='json')
+        cancelada = self._vender(produto, 1)
+        self.client.put(f'/api/vendas/{cancelada["id"]}/', {'statusVenda': 'CANCELADA', 'itens': []}, format='json')
+        com_item_removido = self._vender(produto, 2)
+        self.client.post(f'/api/vendas/{com_item_removido["id"]}/autorizar-excluir-itens/',
+                         {'itens_venda_ids': [com_item_removido['itens'][0]['id']]}, format='json')
+        concluida = self._vender(produto, 4)
+        self.client.post('/api/produtos/ajuste-estoque/', {'itens': [{'id': produto.id, 'quantidade': 5}]}, format='json')
+        self.client.generic('POST', '/api/produtos/importar/',
+                            'codigoBarras,nomeProduto,valorUnitario,categoria,quantidadeEstoque\n111,Jogo,10,Jogos,9\n'.encode(),
+                            content_type='text/csv')
+
+        movimentos = list(MovimentoEstoque.objects.filter(produto=produto).order_by('pk').values_list('tipo', 'quantidade', 'venda_id'))
+        self.assertEqual(movimentos, [
+            ('CADASTRO', 10, None), ('EDICAO', 2, None),
+            ('VENDA', -3, cancelada_em_lote['id']), ('CANCELAMENTO', 3, cancelada_em_lote['id']),
+            ('VENDA', -1, cancelada['id']), ('CANCELAMENTO', 1, cancelada['id']),
+            ('VENDA', -2, com_item_removido['id']), ('REMOCAO_ITEM', 2, com_item_removido['id']),
+            ('VENDA', -4, concluida['id']),
+            ('AJUSTE', -3, None), ('IMPORTACAO', 4, None),
+        ])
+        produto.refresh_from_db()
+        self.assertEqual(produto.quantidadeEstoque, 9)
+        self.assertEqual(sum(quantidade for _, quantidade, _ in movimentos), produto.quantidadeEstoque)
+
+    def test_estoque_em_usa_foto_diaria_e_movimentos_seguintes(self):
+        produto, outro = criar_produtos(2, estoque=0) # Cadastro sem estoque: nenhum movimento
+        dia = datetime(2026, 3, 10, 12, 0, tzinfo=dt_timezone.utc)
+        for dias, quantidade in ((0, 10), (1, 5), (2, -3)):
+            MovimentoEstoque.objects.create(produto=produto, tipo='AJUSTE', quantidade=quantidade, registradoEm=dia + timedelta(days=dias))
+        MovimentoEstoque.objects.create(produto=outro, tipo='AJUSTE', quantidade=7, registradoEm=dia)
+
+        def estoque_em(**params):
+            response = self.client.get('/api/produtos/estoque-em/', params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return {linha['id']: linha['estoque_em'] for linha in response.data['results']}
+
+        esperado = {'2026-03-09': 0, '2026-03-10': 10, '2026-03-11': 15, '2026-03-12': 12}
+        for data, quantidade in esperado.items():
+            self.assertEqual(estoque_em(data=data)[produto.id], quantidade)
+        self.assertEqual(estoque_em(momento='2026-03-11T11:59:00', id=produto.id), {produto.id: 10})
+
+        for data in ('2026-03-10', '2026-03-11'):
+            call_command('fechar_estoque_diario', '--data', data, stdout=StringIO())
+        self.assertEqual(
+            list(EstoqueDiario.objects.order_by('data', 'produto_id').values_list('data', 'produto_id', 'quantidade')),
+            [(dia.date(), produto.id, 10), (dia.date(), outro.id, 7), (dia.date() + timedelta(days=1), produto.id, 15)],
+        )
+        self.assertEqual(dias_a_fechar(ate_dia=dia.date() + timedelta(days=3)), [dia.date() + timedelta(days=2), dia.date() + timedelta(days=3)])
+        # Os movimentos até a foto não são mais lidos: apagá-los não muda o resultado
+        MovimentoEstoque.objects.filter(registradoEm__lt=dia + timedelta(days=2)).delete()
+        for data, quantidade in esperado.items():
+            self.assertEqual(estoque_em(data=data)[produto.id], quantidade)
+        with self.assertNumQueries(2): # Permissão + a página, com qualquer número de produtos
+            self.client.get('/api/produtos/estoque-em/', {'data': '2026-03-12'})
+        self.assertEqual(self.client.get('/api/produtos/estoque-em/', {'data': '12/03/2026'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class LeituraAssincronaTests(APITestCase):
+    def setUp(self):
+        caches['referencia'].clear()
+        self.atendente = Usuario.objects.create_user(username='atendente', password='senha')
+        self.atendente.groups.add(Group.objects.create(name='ATENDENTE'))
+        token = adicionar_papeis_ao_token(AccessToken.for_user(self.atendente), self.atendente)
+        self.autorizacao = {'Authorization': f'Bearer {token}'}
+        self.client.credentials(HTTP_AUTHORIZATION=self.autorizacao['Authorization'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.produtos = criar_produtos(3)
+        response = self.client.post('/api/vendas/', {
+            'formaPagamento': 'PIX',
+            'statusVenda': 'CONCLUIDA',
+            'itens': [{'produto_id': p.id, 'quantidade': 1, 'precoUnitarioVenda': '10.00'} for p in self.produtos],
+        }, format='json')
+        self.venda_id = response.data['id']
+
+    def test_mesmas_respostas_da_api_sincrona(self):
+        for sufixo, params in (
+            ('produtos/', None),
+            ('produtos/', {'search': 'produto 1'}),
+            ('produtos/', {'ordering': '-valorUnitario'}),
+            (f'produtos/barcode/{self.produtos[1].codigoBarras}/', None),
+            ('produtos/barcode/000/', None),
+            (f'vendas/{self.venda_id}/', None),
+            ('vendas/999999/', None),
+        ):
+            sincrona = self.client.get(f'/api/{sufixo}', params)
+            assincrona = self.client.get(f'/api/async/{sufixo}', params)
+            self.assertEqual(assincrona.status_code, sincrona.status_code, sufixo)
+            self.assertEqual(assincrona.json(), sincrona.json(), sufixo)
+
+    def test_paginacao_por_cursor(self):
+        pagina = self.client.get('/api/async/produtos/', {'page_size': 2}).json()
+        self.assertEqual([p['id'] for p in pagina['results']], [p.id for p in self.produtos[:2]])
+        self.assertTrue(pagina['next'].startswith('http://testserver/api/async/produtos/?cursor='))
+        seguinte = self.client.get(pagina['next']).json()
+        self.assertEqual([p['id'] for p in seguinte['results']], [self.produtos[2].id])
+        self.assertIsNone(seguinte['next'])
+
+    async def test_cliente_async(self):
+        response = await self.async_client.get('/api/async/produtos/', headers=self.autorizacao)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()['results']), 3)
+        nao_modificado = await self.async_client.get(
+            '/api/async/produtos/', headers={'If-None-Match': response['ETag'], **self.autorizacao}
+        )
+        self.assertEqual(nao_modificado.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(nao_modificado['ETag'], response['ETag'])
+
+        venda = await self.async_client.get(f'/api/async/vendas/{self.venda_id}/', headers=self.autorizacao)
+        self.assertEqual(len(venda.json()['itens']), 3)
+
+        sem_token = await self.async_client.get('/api/async/produtos/')
+        self.assertEqual(sem_token.status_code, status.HTTP_401_UNAUTHORIZED)
+        escrita = await self.async_client.post('/api/async/produtos/', {}, headers=self.autorizacao)
+        self.assertEqual(escrita.status_code, 405)
+
+    def test_changed_since_usa_a_view_sincrona(self):
+        response = self.client.get('/api/async/produtos/', {'changed_since': 'invalido'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('changed_since', response.json())
+
+
+class VendasConcorrentesTests(TransactionTestCase):
+    """
+    Vários terminais vendendo os mesmos produtos ao mesmo tempo: o estoque final deve ser
+    exatamente o inicial menos o que foi vendido, sem venda além do estoque nem deadlock.
+    """
+    NUM_TERMINAIS = 8
+    VENDAS_POR_TERMINAL = 250
+    ESTOQUE_INICIAL = 300
+
+    def _terminal(self, usuario, produto_ids, semente, resultados, erros):
+        aleatorio = random.Random(semente)
+        try:
+            for _ in range(self.VENDAS_POR_TERMINAL):
+                # Dois produtos em ordem aleatória, para exercitar a ordenação das travas
+                escolhidos = aleatorio.sample(produto_ids, 2)
+                itens = [
+                    {'produto_id': pid, 'quantidade': aleatorio.randint(1, 3), 'precoUnitarioVenda': '10.00'}
+                    for pid in escolhidos
+                ]
+                serializer = VendaSerializer(data={'formaPagamento': 'PIX', 'itens': itens})
+                serializer.is_valid(raise_exception=True)
+                try:
+                    with transaction.atomic():
+                        serializer.save(usuario=usuario)
+                except ValidationError:
+                    continue # Estoque insuficiente: venda recusada, nada gravado
+                for item in itens:
+                    resultados[item['produto_id']] += item['quantidade']
+        except Exception as exc: # pragma: no cover - falha reportada pela thread principal
+            erros.append(exc)
+        finally:
+            connection.close()
+
+    def test_estoque_final_igual_ao_inicial_menos_vendido(self):
+        usuario = Usuario.objects.create_user(username='terminal', password='senha')
+        produto_ids = [p.id for p in criar_produtos(4, estoque=self.ESTOQUE_INICIAL)]
+        vendidos = {pid: 0 for pid in produto_ids}
+        resultados = [dict(vendidos) for _ in range(self.NUM_TERMINAIS)]
+        erros = []
+
+        threads = [
+            threading.Thread(target=self._terminal, args=(usuario, produto_ids, i, resultados[i], erros))
+            for i in range(self.NUM_TERMINAIS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(erros, [])
+        for resultado in resultados:
+            for pid, qtd in resultado.items():
+                vendidos[pid] += qtd
+        estoques = dict(Produto.objects.values_list('id', 'quantidadeEstoque'))
+        for pid in produto_ids:
+            self.assertEqual(estoques[pid], self.ESTOQUE_INICIAL - vendidos[pid])
+        vendido_por_itens = dict(ItemVenda.objects.values('produto').annotate(total=Sum('quantidade')).values_list('produto', 'total'))
+        self.assertEqual({pid: vendido_por_itens.get(pid, 0) for pid in produto_ids}, vendidos)
+
+    def _cancelar_em_paralelo(self, venda_id, barreira, erros):
+        try:
+            venda = Venda.objects.get(pk=venda_id) # Todos leem a venda ainda CONCLUIDA
+            barreira.wait()
+            serializer = VendaSerializer(venda, data={'statusVenda': 'CANCELADA'}, partial=True)
+            serializer.is_valid(raise_exception=True)
+            with transaction.atomic():
+                serializer.save()
+        except Exception as exc: # pragma: no cover - falha reportada pela thread principal
+            erros.append(exc)
+        finally:
+            connection.close()
+
+    def test_cancelamentos_simultaneos_estornam_uma_vez(self):
+        usuario = Usuario.objects.create_user(username='supervisor', password='senha')
+        produto = criar_produtos(1, estoque=10)[0]
+        serializer = VendaSerializer(data={
+            'formaPagamento': 'PIX', 'statusVenda': 'CONCLUIDA',
+            'itens': [{'produto_id': produto.id, 'quantidade': 3, 'precoUnitarioVenda': '10.00'}],
+        })
+        serializer.is_valid(raise_exception=True)
+        venda = serializer.save(usuario=usuario)
+
+        barreira = threading.Barrier(self.NUM_TERMINAIS)
+        erros = []
+        threads = [
+            threading.Thread(target=self._cancelar_em_paralelo, args=(venda.id, barreira, erros))
+            for _ in range(self.NUM_TERMINAIS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(erros, [])
+        produto.refresh_from_db()
+        self.assertEqual(produto.quantidadeEstoque, 10)
+        self.assertEqual(list(VendaResumoDiario.objects.values_list('statusVenda', 'quantidadeVendas')), [('CANCELADA', 1)])
@@ -8,6 +8,7 @@ from .views import (
     ClienteViewSet,
     VendaViewSet
 )
+from . import leitura_assincrona
 
 # Cria uma instância do DefaultRouter.
 # O Router gera automaticamente as URLs para os ViewSets.
@@ -24,6 +25,10 @@ router.register(r'vendas', VendaViewSet, basename='venda')
 
 # As urlpatterns da API são agora determinadas automaticamente pelo router.
 urlpatterns = [
+    # Leituras frequentes dos terminais em views async (ASGI), com as mesmas respostas (ver leitura_assincrona.py)
+    path('async/produtos/', leitura_assincrona.listar_produtos, name='produto-list-async'),
+    path('async/produtos/barcode/<str:codigo>/', leitura_assincrona.produto_por_codigo, name='produto-barcode-async'),
+    path('async/vendas/<int:pk>/', leitura_assincrona.detalhe_venda, name='venda-detail-async'),
     # Inclui todas as URLs geradas pelo router.
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -0,0 +1,111 @@
+# vendas_api/versoes.py
+
+import hashlib
+
+from django.contrib.auth.models import Group
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import CategoriaProduto, Produto, Cliente, VersaoTabela
+
+# Nome da versão de cada modelo de catálogo
+TABELAS_VERSIONADAS = {
+    Produto: 'produto',
+    CategoriaProduto: 'categoria',
+    Cliente: 'cliente',
+    Group: 'grupo',
+}
+
+
+def _incrementar(nome):
+    if VersaoTabela.objects.filter(nome=nome).update(versao=F('versao') + 1):
+        return
+    try:
+        with transaction.atomic():
+            VersaoTabela.objects.create(nome=nome, versao=1)
+    except IntegrityError:
+        # Outra conexão criou a linha entre o UPDATE e o INSERT
+        VersaoTabela.objects.filter(nome=nome).update(versao=F('versao') + 1)
+
+
+def incrementar_versao(nome):
+    """
+    Marca a tabela 'nome' como alterada. O incremento roda depois do COMMIT (em autocommit), para
+    que a linha da versão não fique travada durante a transação de quem gravou (ex: toda venda
+    baixa estoque de produtos). Quem lê deve ler a versão ANTES das linhas: no pior caso o ETag
+    fica mais antigo que os dados, e o cliente só baixa de novo na próxima vez.
+    """
+    transaction.on_commit(lambda: _incrementar(nome))
+
+
+def versoes_atuais(nomes):
+    versoes = dict(VersaoTabela.objects.filter(nome__in=nomes).values_list('nome', 'versao'))
+    return [versoes.get(nome, 0) for nome in nomes]
+
+
+async def aversoes_atuais(nomes):
+    """versoes_atuais para as views async (leitura_assincrona.py)."""
+    versoes = {nome: versao async for nome, versao in VersaoTabela.objects.filter(nome__in=nomes).values_list('nome', 'versao')}
+    return [versoes.get(nome, 0) for nome in nomes]
+
+
+def etag_confere(request, etag):
+    """Compara o ETag atual com o If-None-Match da requisição."""
+    if_none_match = request.headers.get('If-None-Match', '')
+    # Comparação fraca (RFC 9110): a resposta comprimida devolve W/"..." (ver compressao.py)
+    informados = [valor.strip().removeprefix('W/') for valor in if_none_match.split(',')]
+    return etag in informados or if_none_match.strip() == '*'
+
+
+def _ao_gravar(sender, **kwargs):
+    if kwargs.get('raw'):
+        return # loaddata
+    incrementar_versao(TABELAS_VERSIONADAS[sender])
+
+
+for _modelo in TABELAS_VERSIONADAS:
+    post_save.connect(_ao_gravar, sender=_modelo, dispatch_uid=f'versao_{_modelo._meta.label_lower}_save')
+    post_delete.connect(_ao_gravar, sender=_modelo, dispatch_uid=f'versao_{_modelo._meta.label_lower}_delete')
+
+
+class ETagPorVersaoMixin:
+    """
+    GET condicional para list/retrieve de ViewSets de catálogo.
+
+    O ETag (forte) combina as versões das tabelas em 'tabelas_etag' (ex: produtos também dependem
+    das categorias, que vêm aninhadas) com a URL completa (filtros, cursor, page_size). Se o
+    If-None-Match bater, responde 304 sem consultar as linhas nem serializar nada.
+    """
+    tabelas_etag = ()
+
+    def usar_etag(self, request):
+        return bool(self.tabelas_etag)
+
+    def etag_atual(self, request):
+        return self.etag_das_versoes(request, versoes_atuais(self.tabelas_etag))
+
+    def etag_das_versoes(self, request, versoes):
+        self.versoes_lidas = dict(zip(self.tabelas_etag, versoes)) # Reaproveitadas pelo cache_referencia.py
+        marca = '.'.join(f'{nome}{versao}' for nome, versao in zip(self.tabelas_etag, versoes))
+        url = hashlib.sha1(request.get_full_path().encode()).hexdigest()[:12]
+        return f'"{marca}-{url}"'
+
+    def _responder_condicional(self, request, gerar_resposta):
+        if not self.usar_etag(request):
+            return gerar_resposta()
+        etag = self.etag_atual(request) # Antes de ler as linhas (ver incrementar_versao)
+        if etag_confere(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        response = gerar_resposta()
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._responder_condicional(request, lambda: super(ETagPorVersaoMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._responder_condicional(request, lambda: super(ETagPorVersaoMixin, self).retrieve(request, *args, **kwargs))
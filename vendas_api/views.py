@@ -3,17 +3,47 @@
 from rest_framework import viewsets, permissions, status, filters # Adicionado filters
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.contrib.auth.models import Group
 from django.db import transaction # Para operações atômicas no banco de dados
-
-from .models import Usuario, CategoriaProduto, Produto, Cliente, Venda, ItemVenda
+from django.db.models import F, OuterRef, Prefetch, Subquery, Sum, prefetch_related_objects
+from django.http import StreamingHttpResponse
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import timedelta
+from decimal import Decimal
+from django_filters.rest_framework import DjangoFilterBackend
+
+from .models import Usuario, CategoriaProduto, Produto, Cliente, Venda, ItemVenda, VendaResumoDiario, ProdutoVendaDiaria
+from .filters import VendaFilter, inicio_do_dia
+from .busca import BuscaProdutoFilter, BuscaClienteFilter, termos_da_busca, classificar_busca_cliente
+from .cancelamento import cancelar_vendas
+from .versoes import ETagPorVersaoMixin
+from .sincronizacao import SincronizacaoMixin
+from .cache_referencia import CacheListagemMixin
+from .importacao import importar_produtos, ler_csv, ler_jsonl, FormatoImportacaoInvalido
+from .exportacao import gerar_csv
+from .estoque import ler_contagens, ajustar_estoque, AjusteInvalido
+from .movimentos import anotar_estoque_em
+from .itens import remover_itens, ItensNaoEncontrados, VendaJaCancelada
+from .authentication import usuario_tem_papel
+from .resumos import (
+    estado_resumo, registrar_venda_removida,
+    data_da_venda, totais_dos_itens, registrar_itens_vendidos
+)
 from .serializers import (
     UsuarioSerializer, GroupSerializer, CategoriaProdutoSerializer,
-    ProdutoSerializer, ClienteSerializer, VendaSerializer
+    ProdutoSerializer, ClienteSerializer, VendaSerializer, VendaListaSerializer,
+    VendaResumoSerializer, ProdutoRankingSerializer, CategoriaReceitaSerializer,
+    TokenComPapeisSerializer, TokenRefreshComPapeisSerializer
     # ItemVendaSerializer não precisa ser importado aqui se não tiver um ViewSet próprio
 )
 
 # --- Permissões Customizadas ---
+# Os grupos e o is_superuser vêm dos claims do JWT (ver authentication.py), então
+# nenhuma destas permissões consulta o banco para usuários autenticados por token.
 class IsAdminOrSupervisor(permissions.BasePermission):
     """
     Permite acesso apenas a Admin (superuser do Django) ou usuários no grupo SUPERVISOR.
@@ -21,25 +51,59 @@ class IsAdminOrSupervisor(permissions.BasePermission):
     def has_permission(self, request, view):
         # request.user.is_staff pode ser usado para administradores que podem acessar o /admin/
         # request.user.is_superuser é para superusuários
-        return request.user and (request.user.is_superuser or request.user.groups.filter(name='SUPERVISOR').exists())
+        return request.user and (request.user.is_superuser or usuario_tem_papel(request.user, 'SUPERVISOR'))
 
 class IsSupervisorUser(permissions.BasePermission):
     def has_permission(self, request, view):
-        return request.user and (request.user.is_superuser or request.user.groups.filter(name='SUPERVISOR').exists())
+        return request.user and (request.user.is_superuser or usuario_tem_papel(request.user, 'SUPERVISOR'))
 
 class IsEstoquistaUser(permissions.BasePermission):
     def has_permission(self, request, view):
-        return request.user and request.user.groups.filter(name='ESTOQUISTA').exists()
+        return request.user and usuario_tem_papel(request.user, 'ESTOQUISTA')
 
 class IsAtendenteUser(permissions.BasePermission):
     def has_permission(self, request, view):
-        return request.user and request.user.groups.filter(name='ATENDENTE').exists()
+        return request.user and usuario_tem_papel(request.user, 'ATENDENTE')
+
+# --- Autenticação (JWT com os papéis do usuário) ---
+
+class TokenComPapeisView(TokenObtainPairView):
+    """Login (/api/token/): emite os tokens já com grupos e is_superuser nos claims."""
+    serializer_class = TokenComPapeisSerializer
+
+class TokenRefreshComPapeisView(TokenRefreshView):
+    """Refresh (/api/token/refresh/): relê os grupos do banco ao emitir o novo token de acesso."""
+    serializer_class = TokenRefreshComPapeisSerializer
+
+def ler_periodo(query_params):
+    """Lê ?data_inicio= e ?data_fim= (YYYY-MM-DD) e retorna (inicio, fim), com None para os ausentes."""
+    periodo = []
+    for parametro in ('data_inicio', 'data_fim'):
+        valor = query_params.get(parametro)
+        data = None
+        if valor:
+            try:
+                data = parse_date(valor)
+            except ValueError:
+                pass
+            if data is None:
+                raise ValidationError({'detail': f"{parametro} inválida, use o formato YYYY-MM-DD."})
+        periodo.append(data)
+    return tuple(periodo)
+
+def ler_limite(query_params, padrao=10, maximo=100):
+    try:
+        limite = int(query_params.get('limite', padrao))
+    except ValueError:
+        raise ValidationError({'detail': "limite deve ser um número inteiro."})
+    return max(1, min(limite, maximo))
 
 # --- ViewSets ---
 
 class UsuarioViewSet(viewsets.ModelViewSet):
     queryset = Usuario.objects.all().order_by('id')
     serializer_class = UsuarioSerializer
+    ordering = ('id',) # Chave da paginação (KeysetPagination)
     # Permissão base: Apenas Admin (superuser) ou Supervisor podem listar/ver todos os usuários.
     # Criação/Edição/Deleção terá permissões mais granulares nos métodos ou no serializer.
     permission_classes = [IsAdminOrSupervisor]
@@ -67,7 +131,9 @@ class UsuarioViewSet(viewsets.ModelViewSet):
     # A action 'me' permanece a mesma
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated], url_path='me', name='Get Current User Details')
     def me(self, request):
-        serializer = self.get_serializer(request.user)
+        # request.user é montado a partir do token; os dados completos vêm do banco
+        usuario = Usuario.objects.prefetch_related('groups').get(pk=request.user.pk)
+        serializer = self.get_serializer(usuario)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     # (Opcional) Action para um supervisor atribuir/modificar grupos de um usuário não-superuser
@@ -77,7 +143,7 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         current_user = request.user
 
         # Um supervisor não pode modificar grupos de um superusuário ou de outro supervisor (a menos que a lógica permita)
-        if user_to_modify.is_superuser or (user_to_modify.groups.filter(name='SUPERVISOR').exists() and user_to_modify != current_user):
+        if user_to_modify.is_superuser or (user_to_modify.groups.filter(name='SUPERVISOR').exists() and user_to_modify.pk != current_user.pk):
             if not current_user.is_superuser: # Apenas um superuser pode modificar outro superuser/supervisor
                 return Response({'detail': 'Você não tem permissão para modificar os grupos deste usuário.'},
                                 status=status.HTTP_403_FORBIDDEN)
@@ -96,18 +162,24 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         except Group.DoesNotExist:
             return Response({'detail': "Um ou mais IDs de grupo não existem."}, status=status.HTTP_400_BAD_REQUEST)
 
-class GroupViewSet(viewsets.ReadOnlyModelViewSet):
+class GroupViewSet(ETagPorVersaoMixin, CacheListagemMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet para listar Grupos (apenas leitura).
     Útil para o front-end saber quais grupos existem.
     """
     queryset = Group.objects.all().order_by('name')
     serializer_class = GroupSerializer
+    ordering = ('name',)
     permission_classes = [permissions.IsAuthenticated] # Qualquer usuário autenticado pode ver os grupos
+    tabelas_etag = ('grupo',) # GET condicional: If-None-Match -> 304 (ver versoes.py)
+    tabelas_cache = ('grupo',) # Listagem serializada guardada no cache 'referencia' (ver cache_referencia.py)
 
-class CategoriaProdutoViewSet(viewsets.ModelViewSet):
+class CategoriaProdutoViewSet(ETagPorVersaoMixin, CacheListagemMixin, viewsets.ModelViewSet):
     queryset = CategoriaProduto.objects.all().order_by('nomeCategoria')
     serializer_class = CategoriaProdutoSerializer
+    ordering = ('nomeCategoria',)
+    tabelas_etag = ('categoria',)
+    tabelas_cache = ('categoria',)
 
     def get_permissions(self):
         if self.action in ['list', 'retrieve']: # Todos autenticados podem ver
@@ -117,28 +189,214 @@ class CategoriaProdutoViewSet(viewsets.ModelViewSet):
             permission_classes = [IsSupervisorUser | IsEstoquistaUser]
         return [permission() for permission in permission_classes]
 
-class ProdutoViewSet(viewsets.ModelViewSet):
-    queryset = Produto.objects.all().order_by('nomeProduto')
+    @action(detail=False, methods=['get'], url_path='receita', name='Receita por Categoria')
+    def receita(self, request):
+        """
+        Receita e unidades vendidas por categoria no período (?data_inicio=&data_fim=),
+        somadas a partir de ProdutoVendaDiaria, da maior para a menor receita.
+        """
+        vendas = ProdutoVendaDiaria.objects.all()
+        data_inicio, data_fim = ler_periodo(request.query_params)
+        if data_inicio:
+            vendas = vendas.filter(data__gte=data_inicio)
+        if data_fim:
+            vendas = vendas.filter(data__lte=data_fim)
+        linhas = (
+            vendas.values(categoria_id=F('produto__categoria_id'), nomeCategoria=F('produto__categoria__nomeCategoria'))
+            .annotate(quantidade_vendida=Sum('quantidadeVendida'), receita=Sum('receita'))
+            .order_by('-receita', 'nomeCategoria')
+        )
+        return Response(CategoriaReceitaSerializer(linhas, many=True).data, status=status.HTTP_200_OK)
+
+class ProdutoViewSet(ETagPorVersaoMixin, SincronizacaoMixin, viewsets.ModelViewSet):
+    queryset = Produto.objects.select_related('categoria').order_by('nomeProduto') # categoria é serializada em cada produto
     serializer_class = ProdutoSerializer
     # Configurações para filtros da API
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['nomeProduto', 'codigoBarras', 'descricao', 'plataforma'] # Campos para busca ?search=termo
-    ordering_fields = ['nomeProduto', 'valorUnitario', 'quantidadeEstoque', 'idCategoria__nomeCategoria'] # Campos para ?ordering=campo
+    # ?search=termo busca em nome, código, plataforma e descrição sem diferenciar acentos (ver busca.py)
+    filter_backends = [BuscaProdutoFilter, filters.OrderingFilter]
+    ordering_fields = ['nomeProduto', 'valorUnitario', 'quantidadeEstoque', 'categoria__nomeCategoria'] # Campos para ?ordering=campo
+    ORDENACAO_PADRAO = ('nomeProduto', 'id') # Ordenação padrão e chave da paginação
+    tabelas_etag = ('produto', 'categoria') # A categoria vem aninhada em cada produto
+    # ?changed_since=<cursor>: só as alterações e exclusões desde o cursor (ver sincronizacao.py)
+
+    def usar_etag(self, request):
+        # vendidos_30d muda a cada venda sem alterar nenhum produto: sem ETag nessa listagem
+        return 'vendidos_30d' not in request.query_params
+
+    @property
+    def ordering(self):
+        # Com ?search= (e sem ?ordering=), os resultados mais relevantes vêm primeiro
+        if termos_da_busca(getattr(self, 'request', None)):
+            return ('-relevancia', 'id')
+        return self.ORDENACAO_PADRAO
 
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']: # Todos autenticados podem ver
+        if self.action in ['list', 'retrieve', 'barcode']: # Todos autenticados podem ver
             permission_classes = [permissions.IsAuthenticated]
         else: # Apenas Supervisor ou Estoquista podem criar, editar, deletar
             permission_classes = [IsSupervisorUser | IsEstoquistaUser]
         return [permission() for permission in permission_classes]
 
-class ClienteViewSet(viewsets.ModelViewSet):
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # ?vendidos_30d=1 na listagem: unidades vendidas nos últimos 30 dias, lidas de ProdutoVendaDiaria
+        if self.action == 'list' and self.request.query_params.get('vendidos_30d') in ('1', 'true', 'True'):
+            desde = timezone.localdate() - timedelta(days=30)
+            vendidos = (
+                ProdutoVendaDiaria.objects.filter(produto=OuterRef('pk'), data__gte=desde)
+                .values('produto').annotate(total=Sum('quantidadeVendida')).values('total')
+            )
+            queryset = queryset.annotate(vendidos_30d=Coalesce(Subquery(vendidos), 0))
+        return queryset
+
+    @action(detail=False, methods=['get'], url_path=r'barcode/(?P<codigo>[^/]+)', name='Produto por Código de Barras')
+    def barcode(self, request, codigo=None):
+        """
+        GET /api/produtos/barcode/<codigo>/: busca exata pelo código de barras (leitor do PDV).
+        Usa o índice único de codigoBarras (uma leitura de índice), ao contrário do ?search=,
+        que faz icontains em nome, código, descrição e plataforma e varre a tabela inteira.
+        """
+        try:
+            produto = self.get_queryset().order_by().get(codigoBarras=codigo)
+        except Produto.DoesNotExist:
+            return Response({'detail': f"Nenhum produto com o código de barras '{codigo}'."}, status=status.HTTP_404_NOT_FOUND)
+        serializer = self.get_serializer(produto)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    LEITORES_IMPORTACAO = {'csv': ler_csv, 'jsonl': ler_jsonl}
+    FORMATOS_POR_CONTENT_TYPE = {
+        'text/csv': 'csv', 'application/csv': 'csv',
+        'application/x-ndjson': 'jsonl', 'application/jsonl': 'jsonl', 'application/x-jsonlines': 'jsonl',
+    }
+
+    @action(detail=False, methods=['post'], url_path='importar', name='Importar Produtos')
+    def importar(self, request):
+        """
+        POST /api/produtos/importar/ com o arquivo no corpo da requisição (não multipart): CSV com
+        cabeçalho (Content-Type: text/csv) ou JSON lines (application/x-ndjson); ?formato=csv|jsonl
+        tem prioridade sobre o Content-Type. Upsert por codigoBarras, lido e gravado em lotes à medida
+        que o corpo chega (ver importacao.py). Responde com as contagens e o relatório de erros por linha.
+        """
+        formato = request.query_params.get('formato') or self.FORMATOS_POR_CONTENT_TYPE.get(
+            request.content_type.split(';')[0].strip().lower()
+        )
+        if formato not in self.LEITORES_IMPORTACAO:
+            return Response(
+                {'detail': "Envie CSV (text/csv) ou JSON lines (application/x-ndjson), ou informe ?formato=csv|jsonl."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if request.stream is None:
+            return Response({'detail': "Envie o arquivo no corpo da requisição."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            resultado = importar_produtos(self.LEITORES_IMPORTACAO[formato](request.stream))
+        except FormatoImportacaoInvalido as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(resultado, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='ajuste-estoque', name='Ajuste de Estoque')
+    def ajuste_estoque(self, request):
+        """
+        POST /api/produtos/ajuste-estoque/ com o resultado de uma contagem física:
+        {"itens": [{"id": 12, "quantidade": 7}, {"codigoBarras": "789...", "quantidade": 0}, ...]}
+        Grava a quantidade contada como o novo estoque (ver estoque.ajustar_estoque) e responde com
+        os deltas dos produtos alterados. Se algum item for inválido, nada é alterado (400 com os erros).
+        """
+        itens = request.data.get('itens') if isinstance(request.data, dict) else request.data
+        try:
+            contagens = ler_contagens(itens)
+        except AjusteInvalido as exc:
+            return Response({'detail': str(exc), 'erros': exc.erros}, status=status.HTTP_400_BAD_REQUEST)
+        ajustes = ajustar_estoque(contagens)
+        return Response({
+            'itens': len(contagens),
+            'ajustados': len(ajustes),
+            'inalterados': len(contagens) - len(ajustes),
+            'ajustes': [
+                {'id': produto_id, 'quantidadeAnterior': anterior, 'quantidadeContada': contada, 'delta': contada - anterior}
+                for produto_id, anterior, contada in ajustes
+            ],
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], url_path='estoque-em', name='Estoque em uma Data')
+    def estoque_em(self, request):
+        """
+        GET /api/produtos/estoque-em/?data=YYYY-MM-DD (estoque no fim do dia) ou ?momento=<ISO 8601>:
+        o estoque de cada produto naquele momento, calculado pelo livro-razão a partir da última
+        foto diária (ver movimentos.anotar_estoque_em). Aceita ?search=, ?ordering= e ?id= (repetível)
+        como a listagem, e é paginado do mesmo jeito.
+        """
+        data, momento = request.query_params.get('data'), request.query_params.get('momento')
+        try:
+            if data:
+                momento = inicio_do_dia(parse_date(data) + timedelta(days=1))
+            elif momento:
+                momento = parse_datetime(momento)
+                if momento is not None and timezone.is_naive(momento):
+                    momento = timezone.make_aware(momento)
+        except (TypeError, ValueError): # parse_date devolve None (TypeError na soma) para formatos inválidos
+            momento = None
+        if momento is None:
+            return Response(
+                {'detail': "Informe ?data=YYYY-MM-DD ou ?momento=YYYY-MM-DDTHH:MM:SS."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        produtos = self.filter_queryset(self.get_queryset())
+        ids = request.query_params.getlist('id')
+        if ids:
+            if not all(produto_id.isdigit() for produto_id in ids):
+                return Response({'detail': "id deve ser um número inteiro."}, status=status.HTTP_400_BAD_REQUEST)
+            produtos = produtos.filter(pk__in=ids)
+        pagina = self.paginate_queryset(anotar_estoque_em(produtos, momento))
+        return self.get_paginated_response([
+            {
+                'id': produto.pk, 'codigoBarras': produto.codigoBarras, 'nomeProduto': produto.nomeProduto,
+                'quantidadeEstoque': produto.quantidadeEstoque, 'estoque_em': produto.estoque_em,
+            }
+            for produto in pagina
+        ])
+
+    @action(detail=False, methods=['get'], url_path='mais-vendidos', name='Produtos Mais Vendidos')
+    def mais_vendidos(self, request):
+        """
+        Top N produtos do período, somados a partir de ProdutoVendaDiaria.
+        ?data_inicio=YYYY-MM-DD&data_fim=YYYY-MM-DD&limite=10&ordenar_por=quantidade|receita
+        """
+        ordenar_por = request.query_params.get('ordenar_por', 'quantidade')
+        if ordenar_por not in ('quantidade', 'receita'):
+            return Response({'detail': "ordenar_por deve ser 'quantidade' ou 'receita'."}, status=status.HTTP_400_BAD_REQUEST)
+        vendas = ProdutoVendaDiaria.objects.all()
+        data_inicio, data_fim = ler_periodo(request.query_params)
+        if data_inicio:
+            vendas = vendas.filter(data__gte=data_inicio)
+        if data_fim:
+            vendas = vendas.filter(data__lte=data_fim)
+        campo_ordem = 'quantidade_vendida' if ordenar_por == 'quantidade' else 'receita'
+        linhas = (
+            vendas.values('produto_id', nomeProduto=F('produto__nomeProduto'), codigoBarras=F('produto__codigoBarras'))
+            .annotate(quantidade_vendida=Sum('quantidadeVendida'), receita=Sum('receita'))
+            .order_by(f'-{campo_ordem}', 'produto_id')[:ler_limite(request.query_params)]
+        )
+        return Response(ProdutoRankingSerializer(linhas, many=True).data, status=status.HTTP_200_OK)
+
+class ClienteViewSet(ETagPorVersaoMixin, SincronizacaoMixin, viewsets.ModelViewSet):
     queryset = Cliente.objects.all().order_by('nome')
     serializer_class = ClienteSerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['nome', 'cpf', 'email', 'cidade']
+    # ?search= reconhece CPF/telefone (só dígitos), e-mail ou começo do nome e usa o índice de cada um (ver busca.py)
+    filter_backends = [BuscaClienteFilter, filters.OrderingFilter]
     ordering_fields = ['nome', 'dataCadastro', 'cidade']
-
+    ORDENACAO_PADRAO = ('nome', 'id')
+    tabelas_etag = ('cliente',)
+    # ?changed_since=<cursor>: só as alterações e exclusões desde o cursor (ver sincronizacao.py)
+
+    @property
+    def ordering(self):
+        # Na busca por nome, a ordem segue o índice (nomeNormalizado, id) percorrido pelo filtro: a primeira
+        # página sai sem ordenar os resultados. CPF/telefone e e-mail filtram por outras colunas: ordem padrão
+        request = getattr(self, 'request', None)
+        busca = classificar_busca_cliente(request.query_params.get('search', '')) if request is not None else None
+        if busca is not None and busca[0] == 'nome':
+            return ('nomeNormalizado', 'id')
+        return self.ORDENACAO_PADRAO
 
     def get_permissions(self):
         if self.action in ['list', 'retrieve']: # Todos autenticados podem ver
@@ -150,9 +408,36 @@ class ClienteViewSet(viewsets.ModelViewSet):
 class VendaViewSet(viewsets.ModelViewSet):
     queryset = Venda.objects.all().order_by('-dataHoraVenda')
     serializer_class = VendaSerializer
-    filter_backends = [filters.OrderingFilter] # Poderia adicionar SearchFilter se necessário
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = VendaFilter # ?data_inicio=&data_fim=&cliente_nome=&vendedor_username=&statusVenda=&formaPagamento=
     ordering_fields = ['dataHoraVenda', 'valorTotalVenda', 'statusVenda', 'cliente__nome', 'usuario__username']
+    ordering = ('-dataHoraVenda', '-id')
 
+    # Actions que serializam a venda completa (itens -> produto -> categoria) a partir do queryset.
+    # A remoção de itens fica de fora: ela apaga itens e carrega os restantes depois (ver _remover_itens).
+    ACTIONS_COM_ITENS = ('retrieve', 'update', 'partial_update')
+
+    def get_serializer_class(self):
+        # A listagem usa a representação resumida; o detalhe (ReceiptDialog) continua com os itens
+        if self.action == 'list':
+            return VendaListaSerializer
+        return super().get_serializer_class()
+
+    def get_queryset(self):
+        """
+        Plano de consulta por action, para evitar N+1 no VendaSerializer:
+        - list: um único SELECT com JOIN em cliente/usuario, lido como dicts (.values()).
+        - detalhe/atualização: cliente e usuario no mesmo SELECT e os itens, com produto e categoria,
+          em um único SELECT extra, independente do número de itens.
+        """
+        if self.action == 'list':
+            return super().get_queryset().values(*VendaListaSerializer.CAMPOS_VALUES)
+        queryset = super().get_queryset().select_related('cliente', 'usuario')
+        if self.action in self.ACTIONS_COM_ITENS:
+            queryset = queryset.prefetch_related(
+                Prefetch('itens', queryset=ItemVenda.objects.select_related('produto__categoria').order_by('id'))
+            )
+        return queryset
 
     def get_permissions(self):
         if self.action == 'create':
@@ -173,15 +458,136 @@ class VendaViewSet(viewsets.ModelViewSet):
         # - Criar os ItensVenda
         # - Decrementar o estoque dos Produtos
         # - Calcular o valorTotalVenda
-        serializer.save(usuario=self.request.user) # Associa o usuário logado à venda
+        serializer.save(usuario_id=self.request.user.pk) # Associa o usuário logado à venda (id vem do token)
 
     @transaction.atomic
     def perform_update(self, serializer):
         # O serializer VendaSerializer já tem a lógica para:
         # - Estornar o estoque se a venda for CANCELADA
         # - Simular comunicação com sistema financeiro (via print)
+        # - Atualizar o resumo de vendas (VendaResumoDiario)
         serializer.save()
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        estado_anterior = estado_resumo(instance)
+        itens_venda = list(instance.itens.all()) # Lidos antes do delete (CASCADE)
+        instance.delete()
+        registrar_venda_removida(estado_anterior)
+        if instance.statusVenda != 'CANCELADA':
+            registrar_itens_vendidos(data_da_venda(instance), totais_dos_itens(itens_venda), sinal=-1)
+
+    # Limite de vendas por chamada do cancelamento em lote
+    MAX_CANCELAMENTO_LOTE = 1000
+
+    @action(detail=False, methods=['post'], permission_classes=[IsSupervisorUser], url_path='cancelar-lote', name='Cancelar Vendas em Lote')
+    def cancelar_lote(self, request):
+        """
+        RF016 em lote: cancela várias vendas de uma vez (estornos de fim de dia, limpeza de fraudes).
+        Espera {"vendas_ids": [1, 2, 3]} e retorna o resultado de cada venda:
+        CANCELADA, JA_CANCELADA, TRANSICAO_INVALIDA ou NAO_ENCONTRADA.
+        Repetir a mesma chamada é seguro: as vendas já canceladas voltam como JA_CANCELADA.
+        """
+        vendas_ids = request.data.get('vendas_ids')
+        if not isinstance(vendas_ids, list) or not vendas_ids:
+            return Response({'detail': 'Informe a lista de vendas a cancelar (vendas_ids).'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(vendas_ids) > self.MAX_CANCELAMENTO_LOTE:
+            return Response({'detail': f'No máximo {self.MAX_CANCELAMENTO_LOTE} vendas por lote.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            vendas_ids = [int(venda_id) for venda_id in vendas_ids]
+        except (TypeError, ValueError):
+            return Response({'detail': 'vendas_ids deve conter apenas IDs numéricos.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        resultados = cancelar_vendas(vendas_ids)
+        return Response({
+            'canceladas': sum(1 for resultado in resultados.values() if resultado == 'CANCELADA'),
+            'resultados': [{'venda_id': venda_id, 'resultado': resultado} for venda_id, resultado in resultados.items()],
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], url_path='exportar', name='Exportar Itens Vendidos (CSV)')
+    def exportar(self, request):
+        """
+        GET /api/vendas/exportar/: CSV com uma linha por item vendido (dados da venda, vendedor,
+        cliente e produto), para a contabilidade. Aceita os mesmos filtros da listagem
+        (?data_inicio=&data_fim=&statusVenda=...) e ?separador=; (padrão ','). A resposta é gerada
+        em streaming, janela a janela (ver exportacao.py): a memória do servidor não cresce com o período.
+        """
+        separador = request.query_params.get('separador', ',')
+        if separador not in (',', ';'):
+            return Response({'detail': "separador deve ser ',' ou ';'."}, status=status.HTTP_400_BAD_REQUEST)
+        vendas = self.filter_queryset(Venda.objects.all())
+        periodo = '_'.join(filter(None, (request.query_params.get('data_inicio'), request.query_params.get('data_fim'))))
+        response = StreamingHttpResponse(gerar_csv(vendas, separador), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="itens_vendidos{"_" + periodo if periodo else ""}.csv"'
+        return response
+
+    # Dimensões aceitas em ?agrupar_por= e o campo correspondente em VendaResumoDiario
+    DIMENSOES_RESUMO = {
+        'dia': 'data',
+        'hora': 'hora',
+        'vendedor': 'usuario__username',
+        'formaPagamento': 'formaPagamento',
+        'statusVenda': 'statusVenda',
+    }
+
+    @action(detail=False, methods=['get'], url_path='resumo', name='Resumo de Vendas')
+    def resumo(self, request):
+        """
+        Receita, quantidade de vendas e ticket médio agrupados, lidos da tabela VendaResumoDiario
+        (e não de Venda). Parâmetros (todos opcionais):
+        ?data_inicio=YYYY-MM-DD&data_fim=YYYY-MM-DD&agrupar_por=dia,hora,vendedor,formaPagamento,statusVenda
+        &statusVenda=CONCLUIDA&formaPagamento=PIX&vendedor_username=fulano
+        """
+        agrupar_por = [d.strip() for d in request.query_params.get('agrupar_por', 'dia').split(',') if d.strip()]
+        invalidas = [d for d in agrupar_por if d not in self.DIMENSOES_RESUMO]
+        if invalidas:
+            return Response({'detail': f"Dimensão inválida em agrupar_por: {', '.join(invalidas)}. "
+                                       f"Use: {', '.join(self.DIMENSOES_RESUMO)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        resumos = VendaResumoDiario.objects.all()
+        data_inicio, data_fim = ler_periodo(request.query_params)
+        if data_inicio:
+            resumos = resumos.filter(data__gte=data_inicio)
+        if data_fim:
+            resumos = resumos.filter(data__lte=data_fim)
+        for parametro, lookup in (('statusVenda', 'statusVenda'), ('formaPagamento', 'formaPagamento'),
+                                  ('vendedor_username', 'usuario__username__iexact')):
+            valor = request.query_params.get(parametro)
+            if valor:
+                resumos = resumos.filter(**{lookup: valor})
+
+        campos = [self.DIMENSOES_RESUMO[d] for d in agrupar_por]
+        linhas = (
+            resumos.values(*campos)
+            .annotate(receita=Sum('valorTotal'), quantidade_vendas=Sum('quantidadeVendas'))
+            .order_by(*campos)
+        )
+        resultado = []
+        for linha in linhas:
+            item = {dimensao: linha[campo] for dimensao, campo in zip(agrupar_por, campos)}
+            item['receita'] = linha['receita']
+            item['quantidade_vendas'] = linha['quantidade_vendas']
+            if linha['quantidade_vendas']:
+                item['ticket_medio'] = (linha['receita'] / linha['quantidade_vendas']).quantize(Decimal('0.01'))
+            else:
+                item['ticket_medio'] = Decimal('0.00')
+            resultado.append(item)
+        return Response(VendaResumoSerializer(resultado, many=True).data, status=status.HTTP_200_OK)
+
+    def _remover_itens(self, venda, item_ids):
+        try:
+            venda = remover_itens(venda.pk, item_ids)
+        except ItensNaoEncontrados as exc:
+            return Response({'detail': str(exc), 'itens_venda_ids': exc.item_ids}, status=status.HTTP_404_NOT_FOUND)
+        except VendaJaCancelada:
+            return Response({'detail': 'Venda cancelada: os itens já foram estornados e não podem ser removidos.'}, status=status.HTTP_400_BAD_REQUEST)
+        # Retorna a venda atualizada, com os itens restantes carregados em um único SELECT
+        prefetch_related_objects(
+            [venda], Prefetch('itens', queryset=ItemVenda.objects.select_related('produto__categoria').order_by('id'))
+        )
+        serializer = self.get_serializer(venda)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=['post'], permission_classes=[IsSupervisorUser], url_path='autorizar-excluir-item', name='Autorizar Exclusao Item Venda')
     def autorizar_exclusao_item(self, request, pk=None):
         """
@@ -199,39 +605,23 @@ class VendaViewSet(viewsets.ModelViewSet):
         except ValueError:
             return Response({'detail': 'ID do item da venda inválido.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            # O ItemVenda tem 'id' como PK automática se não definimos outra.
-            # Precisamos garantir que nosso modelo ItemVenda realmente tem 'id' como PK.
-            # Se ItemVenda usa chave composta ou outra PK, ajuste aqui.
-            # Vamos assumir que ItemVenda tem um 'id' (AutoField) como PK.
-            # No nosso models.py, ItemVenda não tinha um ID explícito, então Django cria 'id'.
-            item_para_excluir = ItemVenda.objects.get(id=item_venda_id, venda=venda)
-        except ItemVenda.DoesNotExist:
-            return Response({'detail': 'Item não encontrado nesta venda ou ID do item inválido.'}, status=status.HTTP_404_NOT_FOUND)
-        except ItemVenda.MultipleObjectsReturned: # Segurança
-             return Response({'detail': 'Múltiplos itens encontrados com este ID, verifique os dados.'}, status=status.HTTP_400_BAD_REQUEST)
-
-
-        # RF008 - Estornar quantidade para o estoque
-        produto_original = item_para_excluir.produto
-        produto_original.quantidadeEstoque += item_para_excluir.quantidade
-        produto_original.save()
-
-        # Remover o item e recalcular o total da venda
-        valor_item_excluido = item_para_excluir.subtotal # Usa a property @subtotal
-        item_para_excluir.delete() # Exclui o objeto ItemVenda
-
-        # Recalcula o valorTotalVenda
-        novo_total_venda = 0
-        for item_restante in venda.itens.all(): # venda.itens é o related_name
-            novo_total_venda += item_restante.subtotal
-        
-        venda.valorTotalVenda = novo_total_venda
-        venda.save()
+        return self._remover_itens(venda, [item_venda_id])
 
-        # Retorna a venda atualizada
-        serializer = self.get_serializer(venda)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    @action(detail=True, methods=['post'], permission_classes=[IsSupervisorUser], url_path='autorizar-excluir-itens', name='Autorizar Exclusao Itens Venda')
+    def autorizar_exclusao_itens(self, request, pk=None):
+        """
+        RF015 em lote: remove vários itens da venda de uma vez (tudo ou nada).
+        Espera {"itens_venda_ids": [1, 2, 3]} no corpo.
+        """
+        venda = self.get_object()
+        itens_venda_ids = request.data.get('itens_venda_ids')
+        if not isinstance(itens_venda_ids, list) or not itens_venda_ids:
+            return Response({'detail': 'Informe a lista de itens a remover (itens_venda_ids).'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            itens_venda_ids = [int(item_id) for item_id in itens_venda_ids]
+        except (TypeError, ValueError):
+            return Response({'detail': 'itens_venda_ids deve conter apenas IDs numéricos.'}, status=status.HTTP_400_BAD_REQUEST)
+        return self._remover_itens(venda, itens_venda_ids)
 
 # Não é necessário um ViewSet para ItemVenda se eles são gerenciados
 # exclusivamente através do nested serializer do VendaViewSet.
\ No newline at end of file